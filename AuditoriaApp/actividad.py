@@ -0,0 +1,181 @@
+# ===============================================================
+# AuditoriaApp/actividad.py
+#
+# Resumen diario de actividad (modelo ActividadDiaria).
+#
+#   acumular()    → suma un lote de auditorías recién escritas al
+#                   resumen (lo llama escribir_registros(), en la
+#                   misma transacción que el bulk_create)
+#   anonimizar()  → pasa la actividad de un usuario eliminado a los
+#                   grupos sin usuario
+#   reconstruir() → recalcula un rango de días desde la tabla
+#                   Auditoria (manage.py reconstruir_actividad)
+#   reporte()     → tendencia diaria, totales por módulo y usuarios
+#                   más activos de un rango, leyendo solo el resumen
+#
+# El día de cada registro es el día local (TIME_ZONE), igual que
+# TruncDate en reconstruir(), para que ambos caminos coincidan.
+# ===============================================================
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .archivo import ultimo_dia_archivado
+from .models import ActividadDiaria, Auditoria
+
+
+# ---------------------------------------------------------------
+# acumular():
+# Agrupa el lote en memoria por (dia, usuario, modulo, accion) y
+# suma cada grupo con un UPDATE cantidad = cantidad + n; si el
+# grupo todavía no existe lo crea. Un lote produce pocas filas de
+# resumen (normalmente una o dos por usuario), no una por registro.
+# ---------------------------------------------------------------
+def acumular(auditorias):
+    grupos = Counter(
+        (timezone.localdate(a.fecha), a.usuario_id, a.modulo, a.accion)
+        for a in auditorias
+    )
+
+    for (dia, usuario_id, modulo, accion), cantidad in grupos.items():
+        _sumar({"dia": dia, "usuario_id": usuario_id, "modulo": modulo, "accion": accion}, cantidad)
+
+
+def _sumar(clave, cantidad):
+    if ActividadDiaria.objects.filter(**clave).update(cantidad=F("cantidad") + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            ActividadDiaria.objects.create(cantidad=cantidad, **clave)
+    except IntegrityError:
+        # Otro proceso creó el grupo entre el UPDATE y el INSERT
+        ActividadDiaria.objects.filter(**clave).update(cantidad=F("cantidad") + cantidad)
+
+
+# ---------------------------------------------------------------
+# anonimizar():
+# Pasa la actividad de un usuario que se va a eliminar a los grupos
+# sin usuario. Con SET_NULL la base dejaría dos filas del mismo
+# grupo en NULL, lo que la restricción única sin usuario rechaza
+# (y el borrado del usuario fallaría). Se conecta a pre_delete de
+# UsuariosModels (ver apps.py).
+# ---------------------------------------------------------------
+def anonimizar(usuario_id):
+    filas = ActividadDiaria.objects.filter(usuario_id=usuario_id)
+
+    with transaction.atomic():
+        grupos = list(filas.values_list("dia", "modulo", "accion", "cantidad"))
+        filas.delete()
+        for dia, modulo, accion, cantidad in grupos:
+            _sumar({"dia": dia, "usuario_id": None, "modulo": modulo, "accion": accion}, cantidad)
+
+
+# ===============================================================
+# reconstruir()
+#
+# Recalcula el resumen de los días [desde, hasta] (date, ambos
+# incluidos) con una consulta agregada sobre Auditoria. Por defecto
+# cubre los días que todavía tienen registros en la tabla, a partir
+# del día siguiente al último con registros archivados: los días
+# archivados (archivo.py), aunque sea en parte, conservan su
+# resumen.
+#
+# Retorna el número de filas de resumen generadas.
+#
+# Lanza ValueError si un "desde" explícito incluye días archivados:
+# recalcularlos desde la tabla borraría lo que ya no está en ella.
+# ===============================================================
+def reconstruir(desde=None, hasta=None) -> int:
+    archivado = ultimo_dia_archivado()
+
+    if desde is None:
+        primera = Auditoria.objects.order_by("fecha").values_list("fecha", flat=True).first()
+        if primera is None:
+            return 0
+        desde = timezone.localdate(primera)
+        if archivado and desde <= archivado:
+            desde = archivado + timedelta(days=1)
+    elif archivado and desde <= archivado:
+        raise ValueError(
+            f"Hay registros archivados hasta el {archivado:%Y-%m-%d}: su resumen "
+            f"no se puede recalcular desde la tabla (use un rango posterior)."
+        )
+    if hasta is None:
+        hasta = timezone.localdate()
+    if desde > hasta:
+        return 0
+
+    # Rango por fecha (usa el índice de fecha), agrupado por día local
+    filas = (
+        Auditoria.objects
+        .filter(
+            fecha__gte=timezone.make_aware(datetime.combine(desde, time.min)),
+            fecha__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)),
+        )
+        .annotate(dia=TruncDate("fecha"))
+        .values("dia", "usuario_id", "modulo", "accion")
+        .annotate(cantidad=Count("id"))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        ActividadDiaria.objects.filter(dia__gte=desde, dia__lte=hasta).delete()
+        creadas = ActividadDiaria.objects.bulk_create(
+            (ActividadDiaria(**fila) for fila in filas.iterator()),
+            batch_size=1000,
+        )
+
+    return len(creadas)
+
+
+# ===============================================================
+# reporte()
+#
+# Parámetros:
+#   desde, hasta → date (ambos incluidos)
+#   top          → cantidad de usuarios en el ranking
+#
+# Retorna:
+#   {
+#       "tendencia":  [{"dia": date, "total": n}, ...]  todos los días
+#                     del rango (0 si no hubo actividad)
+#       "modulos":    [{"modulo", "total"}, ...]          mayor a menor
+#       "acciones":   [{"accion", "total"}, ...]          mayor a menor
+#       "usuarios":   [{"username", "total"}, ...]        top usuarios
+#       "total":      n
+#   }
+#
+# Cuatro consultas agregadas sobre ActividadDiaria.
+# ===============================================================
+def reporte(desde, hasta, top=10) -> dict:
+    qs = ActividadDiaria.objects.filter(dia__gte=desde, dia__lte=hasta)
+
+    por_dia = dict(
+        qs.values("dia").annotate(total=Sum("cantidad")).order_by().values_list("dia", "total")
+    )
+    dias = (hasta - desde).days + 1
+    tendencia = [
+        {"dia": dia, "total": por_dia.get(dia, 0)}
+        for dia in (desde + timedelta(days=i) for i in range(dias))
+    ]
+
+    modulos = list(qs.values("modulo").annotate(total=Sum("cantidad")).order_by("-total", "modulo"))
+    acciones = list(qs.values("accion").annotate(total=Sum("cantidad")).order_by("-total", "accion"))
+    usuarios = list(
+        qs.values(username=F("usuario__Username"))
+        .annotate(total=Sum("cantidad"))
+        .order_by("-total", "username")[:top]
+    )
+
+    return {
+        "tendencia": tendencia,
+        "modulos": modulos,
+        "acciones": acciones,
+        "usuarios": usuarios,
+        "total": sum(por_dia.values()),
+    }
@@ -1,6 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_delete
+
+
+# ============================================================
+# _anonimizar_actividad():
+# Receptor de señales: antes de eliminar un usuario, su resumen
+# de actividad pasa a los grupos sin usuario (ver
+# AuditoriaApp/actividad.py, anonimizar()).
+# ============================================================
+def _anonimizar_actividad(sender, instance, **kwargs):
+    from .actividad import anonimizar
+
+    anonimizar(instance.pk)
 
 
 class AuditoriaappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'AuditoriaApp'
+
+    # ------------------------------------------------------------
+    # Método ready():
+    # - Conecta la anonimización del resumen de actividad al
+    #   borrado de UsuariosModels
+    # ------------------------------------------------------------
+    def ready(self):
+        from UsuariosApp.models import UsuariosModels
+
+        pre_delete.connect(_anonimizar_actividad, sender=UsuariosModels, dispatch_uid="actividad_usuario")
@@ -0,0 +1,332 @@
+# ===============================================================
+# AuditoriaApp/archivo.py
+#
+# Retención de auditoría con archivos mensuales comprimidos.
+#
+# Los registros más antiguos que AUDITORIA_RETENCION_DIAS salen de
+# la tabla Auditoria y pasan a archivos JSONL comprimidos, uno por
+# mes, en AUDITORIA_ARCHIVO_DIR:
+#
+#   auditoria-2024-03.jsonl.gz   → una línea JSON por registro:
+#       {"id", "fecha", "usuario_id", "usuario", "accion",
+#        "modulo", "detalle"}
+#       (el Username se copia: el usuario puede dejar de existir)
+#
+#   auditoria-2024-03.idx.json   → índice pequeño del archivo:
+#       {"registros": n,
+#        "usuarios": {"<usuario_id>": n, ...},
+#        "modulos":  {"Stock": n, ...},
+#        "acciones": {"crear": n, ...}}
+#
+# La búsqueda (buscar()) elige los archivos por mes (nombre) e
+# índice, y solo descomprime los que pueden contener coincidencias,
+# línea a línea (sin cargar el archivo en memoria).
+#
+# Seguridad del proceso (archivar()):
+#   1. El mes se reescribe completo en un archivo temporal (lo ya
+#      archivado + los registros nuevos) y se reemplaza con
+#      os.replace(), que es atómico.
+#   2. Recién entonces se eliminan esas filas de la tabla.
+#   Si el proceso se interrumpe entre 1 y 2, la siguiente ejecución
+#   omite los id que ya están en el archivo: no hay duplicados ni
+#   pérdidas.
+#
+# El corte se redondea a la medianoche local: un día nunca queda
+# repartido entre la tabla y los archivos, de modo que el resumen
+# diario (actividad.py) se puede reconstruir desde la tabla para
+# cualquier día que todavía tenga registros en ella.
+#
+# Usado por:
+#   - manage.py archivar_auditoria
+#   - manage.py buscar_auditoria y la vista auditoria_buscar
+# ===============================================================
+
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .consultas import filtrar
+from .models import Auditoria
+
+
+PREFIJO = "auditoria-"
+
+
+def _directorio() -> Path:
+    return Path(getattr(settings, "AUDITORIA_ARCHIVO_DIR", Path(settings.BASE_DIR) / "archivo_auditoria"))
+
+
+def _rutas(anio, mes):
+    base = _directorio() / f"{PREFIJO}{anio:04d}-{mes:02d}"
+    return base.with_suffix(".jsonl.gz"), base.with_suffix(".idx.json")
+
+
+# ---------------------------------------------------------------
+# _leer_lineas(): registros de un archivo mensual, en streaming
+# ---------------------------------------------------------------
+def _leer_lineas(ruta):
+    with gzip.open(ruta, "rt", encoding="utf-8") as archivo:
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def _a_registro(a) -> dict:
+    return {
+        "id": a.id,
+        "fecha": a.fecha.isoformat(),
+        "usuario_id": a.usuario_id,
+        "usuario": a.usuario.Username if a.usuario_id else None,
+        "accion": a.accion,
+        "modulo": a.modulo,
+        "detalle": a.detalle,
+    }
+
+
+# ---------------------------------------------------------------
+# _IndiceMensual: conteos por usuario / módulo / acción
+# ---------------------------------------------------------------
+class _IndiceMensual:
+
+    def __init__(self):
+        self.registros = 0
+        self.usuarios = {}
+        self.modulos = {}
+        self.acciones = {}
+
+    def agregar(self, r):
+        self.registros += 1
+        usuario = str(r["usuario_id"])
+        self.usuarios[usuario] = self.usuarios.get(usuario, 0) + 1
+        self.modulos[r["modulo"]] = self.modulos.get(r["modulo"], 0) + 1
+        self.acciones[r["accion"]] = self.acciones.get(r["accion"], 0) + 1
+
+    def guardar(self, ruta):
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        temporal.write_text(json.dumps({
+            "registros": self.registros,
+            "usuarios": self.usuarios,
+            "modulos": self.modulos,
+            "acciones": self.acciones,
+        }, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporal, ruta)
+
+
+# ---------------------------------------------------------------
+# _archivar_mes():
+# Reescribe el archivo del mes con lo ya archivado + las filas de
+# "qs" (ordenadas por fecha, id) y retorna los id escritos desde la
+# base de datos (para eliminarlos después).
+# ---------------------------------------------------------------
+def _archivar_mes(anio, mes, qs) -> list[int]:
+    ruta, ruta_indice = _rutas(anio, mes)
+    temporal = ruta.with_name(ruta.name + ".tmp")
+
+    indice = _IndiceMensual()
+    ya_archivados = set()
+    ids = []
+
+    with gzip.open(temporal, "wt", encoding="utf-8") as salida:
+        if ruta.exists():
+            for r in _leer_lineas(ruta):
+                ya_archivados.add(r["id"])
+                indice.agregar(r)
+                salida.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+        for a in qs.iterator(chunk_size=2000):
+            ids.append(a.id)
+            if a.id in ya_archivados:
+                continue
+            r = _a_registro(a)
+            indice.agregar(r)
+            salida.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    os.replace(temporal, ruta)
+    indice.guardar(ruta_indice)
+    return ids
+
+
+# ---------------------------------------------------------------
+# corte_archivo():
+# Límite efectivo de archivar(): "antes_de" (por defecto ahora −
+# AUDITORIA_RETENCION_DIAS) redondeado a la medianoche local.
+# ---------------------------------------------------------------
+def corte_archivo(antes_de=None):
+    if antes_de is None:
+        antes_de = timezone.now() - timedelta(
+            days=getattr(settings, "AUDITORIA_RETENCION_DIAS", 365)
+        )
+    dia = timezone.localdate(antes_de)
+    return timezone.make_aware(datetime(dia.year, dia.month, dia.day))
+
+
+# ---------------------------------------------------------------
+# ultimo_dia_archivado():
+# Día local del registro archivado más reciente, o None si no hay
+# archivos. Solo recorre el archivo del mes más reciente.
+# ---------------------------------------------------------------
+def ultimo_dia_archivado():
+    directorio = _directorio()
+    if not directorio.exists():
+        return None
+
+    archivos = sorted(directorio.glob(f"{PREFIJO}*.jsonl.gz"))
+    if not archivos:
+        return None
+
+    ultima = max(
+        (datetime.fromisoformat(r["fecha"]) for r in _leer_lineas(archivos[-1])),
+        default=None,
+    )
+    return timezone.localdate(ultima) if ultima else None
+
+
+# ===============================================================
+# archivar()
+#
+# Mueve a los archivos mensuales los registros con fecha anterior
+# a corte_archivo(antes_de): días completos, anteriores al día de
+# "antes_de" (por defecto: ahora − AUDITORIA_RETENCION_DIAS).
+#
+# Retorna {"YYYY-MM": registros movidos} por mes procesado.
+# ===============================================================
+def archivar(antes_de=None) -> dict:
+    antes_de = corte_archivo(antes_de)
+
+    _directorio().mkdir(parents=True, exist_ok=True)
+    viejos = Auditoria.objects.filter(fecha__lt=antes_de)
+
+    resultado = {}
+    for mes_fecha in viejos.dates("fecha", "month"):
+        inicio = timezone.make_aware(datetime(mes_fecha.year, mes_fecha.month, 1))
+        fin = timezone.make_aware(
+            datetime(mes_fecha.year + mes_fecha.month // 12, mes_fecha.month % 12 + 1, 1)
+        )
+
+        del_mes = (
+            viejos.filter(fecha__gte=inicio, fecha__lt=fin)
+            .select_related("usuario")
+            .order_by("fecha", "id")
+        )
+        ids = _archivar_mes(mes_fecha.year, mes_fecha.month, del_mes)
+
+        # El archivo ya quedó escrito: se eliminan las filas
+        with transaction.atomic():
+            for i in range(0, len(ids), 900):
+                Auditoria.objects.filter(id__in=ids[i:i + 900]).delete()
+
+        resultado[f"{mes_fecha.year:04d}-{mes_fecha.month:02d}"] = len(ids)
+
+    return resultado
+
+
+# ---------------------------------------------------------------
+# _archivos_candidatos():
+# Archivos mensuales que pueden tener registros para los criterios,
+# del más reciente al más antiguo: se descartan por mes (fuera del
+# rango de fechas) y por índice (usuario / módulo / acción ausente).
+# ---------------------------------------------------------------
+def _archivos_candidatos(criterios):
+    directorio = _directorio()
+    if not directorio.exists():
+        return []
+
+    candidatos = []
+    for ruta in sorted(directorio.glob(f"{PREFIJO}*.jsonl.gz"), reverse=True):
+        try:
+            anio, mes = map(int, ruta.name[len(PREFIJO):-len(".jsonl.gz")].split("-"))
+        except ValueError:
+            continue
+
+        inicio = timezone.make_aware(datetime(anio, mes, 1))
+        fin = timezone.make_aware(datetime(anio + mes // 12, mes % 12 + 1, 1))
+        if "desde" in criterios and fin <= criterios["desde"]:
+            continue
+        if "hasta" in criterios and inicio >= criterios["hasta"]:
+            continue
+
+        _, ruta_indice = _rutas(anio, mes)
+        if ruta_indice.exists():
+            indice = json.loads(ruta_indice.read_text(encoding="utf-8"))
+            if "usuario_id" in criterios and str(criterios["usuario_id"]) not in indice["usuarios"]:
+                continue
+            if "modulo" in criterios and criterios["modulo"] not in indice["modulos"]:
+                continue
+            if "accion" in criterios and criterios["accion"] not in indice["acciones"]:
+                continue
+
+        candidatos.append(ruta)
+
+    return candidatos
+
+
+def _coincide(r, criterios) -> bool:
+    if "usuario_id" in criterios and r["usuario_id"] != criterios["usuario_id"]:
+        return False
+    if "modulo" in criterios and r["modulo"] != criterios["modulo"]:
+        return False
+    if "accion" in criterios and r["accion"] != criterios["accion"]:
+        return False
+    if "desde" in criterios and r["fecha"] < criterios["desde"]:
+        return False
+    if "hasta" in criterios and r["fecha"] >= criterios["hasta"]:
+        return False
+    return True
+
+
+# ---------------------------------------------------------------
+# _buscar_en_archivo():
+# Recorre un archivo en streaming y conserva solo los "limite"
+# registros más recientes que coinciden (heap acotado).
+# ---------------------------------------------------------------
+def _buscar_en_archivo(ruta, criterios, limite):
+    mejores = []
+    for r in _leer_lineas(ruta):
+        r["fecha"] = datetime.fromisoformat(r["fecha"])
+        if not _coincide(r, criterios):
+            continue
+        clave = (r["fecha"], r["id"])
+        if len(mejores) < limite:
+            heapq.heappush(mejores, (clave, r))
+        elif clave > mejores[0][0]:
+            heapq.heapreplace(mejores, (clave, r))
+
+    return [r for _, r in sorted(mejores, key=lambda x: x[0], reverse=True)]
+
+
+# ===============================================================
+# buscar()
+#
+# Busca en la tabla Auditoria y en los archivos mensuales con los
+# mismos criterios que el listado (FiltroAuditoriaForm.criterios()).
+#
+# Retorna hasta "limite" registros, del más reciente al más antiguo,
+# como dicts {id, fecha (datetime), usuario, usuario_id, accion,
+# modulo, detalle, origen ("tabla" | "archivo")}.
+#
+# Los registros archivados son siempre más antiguos que los de la
+# tabla, y los archivos se recorren del mes más reciente al más
+# antiguo: la búsqueda se detiene apenas junta "limite" registros.
+# ===============================================================
+def buscar(criterios, limite=200) -> list[dict]:
+    vivos = filtrar(Auditoria.objects.select_related("usuario"), criterios)
+
+    resultado = [
+        {**_a_registro(a), "fecha": a.fecha, "origen": "tabla"}
+        for a in vivos.order_by("-fecha", "-id")[:limite]
+    ]
+
+    for ruta in _archivos_candidatos(criterios):
+        if len(resultado) >= limite:
+            break
+        for r in _buscar_en_archivo(ruta, criterios, limite - len(resultado)):
+            resultado.append({**r, "origen": "archivo"})
+
+    return resultado
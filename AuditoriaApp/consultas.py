@@ -0,0 +1,220 @@
+# ===============================================================
+# AuditoriaApp/consultas.py
+#
+# Consultas del listado de auditorías con paginación por cursor
+# (keyset) en vez de OFFSET.
+#
+# Orden fijo: (fecha, id) descendente. Una página es:
+#
+#     WHERE <filtros> AND (fecha, id) < (cursor.fecha, cursor.id)
+#     ORDER BY fecha DESC, id DESC
+#     LIMIT tamaño + 1
+#
+# Con los índices compuestos de Auditoria (ver models.py) la base
+# recorre el índice desde el cursor y se detiene tras tamaño + 1
+# filas: el costo de una página no crece con el tamaño de la tabla
+# ni con lo "lejos" que esté la página (un OFFSET sí leería y
+# descartaría todas las filas anteriores).
+#
+# La fila extra solo indica si hay página siguiente.
+#
+# buscar_texto() resuelve la búsqueda por texto libre con el índice
+# de texto completo de la migración 0004 (FTS5 / FULLTEXT) y ordena
+# por relevancia.
+# ===============================================================
+
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Auditoria
+
+
+# ---------------------------------------------------------------
+# codificar_cursor() / decodificar_cursor():
+# Cursor = "<fecha ISO>_<id>" de la última fila de la página.
+# decodificar_cursor() retorna None si el cursor no es válido.
+# ---------------------------------------------------------------
+def codificar_cursor(auditoria) -> str:
+    return f"{auditoria.fecha.isoformat()}_{auditoria.id}"
+
+
+def decodificar_cursor(cursor):
+    try:
+        fecha, _, id_ = cursor.rpartition("_")
+        return datetime.fromisoformat(fecha), int(id_)
+    except (AttributeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------
+# filtrar():
+# Aplica los criterios de FiltroAuditoriaForm.criterios():
+#   desde, hasta (rango [desde, hasta)), usuario_id, modulo, accion
+# ---------------------------------------------------------------
+def filtrar(qs, criterios):
+    if "desde" in criterios:
+        qs = qs.filter(fecha__gte=criterios["desde"])
+    if "hasta" in criterios:
+        qs = qs.filter(fecha__lt=criterios["hasta"])
+    if "usuario_id" in criterios:
+        qs = qs.filter(usuario_id=criterios["usuario_id"])
+    if "modulo" in criterios:
+        qs = qs.filter(modulo=criterios["modulo"])
+    if "accion" in criterios:
+        qs = qs.filter(accion=criterios["accion"])
+    return qs
+
+
+# ===============================================================
+# obtener_pagina()
+#
+# Parámetros:
+#   criterios → dict de filtros (ver filtrar())
+#   cursor    → str de codificar_cursor(), o None para la primera
+#   tamano    → filas por página
+#
+# Retorna (auditorias, siguiente_cursor | None). Es UNA consulta,
+# con el usuario incluido (select_related) para que el template
+# no haga una consulta por fila.
+# ===============================================================
+def obtener_pagina(criterios, cursor=None, tamano=50):
+    qs = filtrar(Auditoria.objects.select_related("usuario"), criterios)
+
+    posicion = decodificar_cursor(cursor) if cursor else None
+    if posicion is not None:
+        fecha, id_ = posicion
+        qs = qs.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=id_))
+
+    filas = list(qs.order_by("-fecha", "-id")[:tamano + 1])
+
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        return filas, codificar_cursor(filas[-1])
+    return filas, None
+
+
+# ---------------------------------------------------------------
+# _terminos():
+# Palabras del texto buscado (letras y dígitos). Se descarta todo
+# lo demás para que la sintaxis de FTS5 / MATCH ... AGAINST no se
+# pueda inyectar desde el formulario.
+# ---------------------------------------------------------------
+def _terminos(texto) -> list[str]:
+    return re.findall(r"\w+", texto or "")
+
+
+# ---------------------------------------------------------------
+# _buscar_fts5():
+# SQLite. Una consulta a la tabla FTS5 entrega los id ya ordenados
+# por bm25 (rank) y cortados en "limite"; los filtros del listado
+# entran como subconsulta de id (se evalúa una vez). Luego in_bulk() trae los registros
+# (con usuario) y se respeta el orden.
+# ---------------------------------------------------------------
+def _buscar_fts5(qs, terminos, limite):
+    sql = "SELECT rowid FROM auditoria_fts WHERE auditoria_fts MATCH %s"
+    parametros = [" ".join(f'"{t}"' for t in terminos)]
+
+    if qs.query.where:
+        sub_sql, sub_parametros = qs.values("id").query.sql_with_params()
+        # "+rowid": evita que FTS5 tome el IN como lista de rowid a
+        # buscar uno por uno; se filtra después del MATCH
+        sql += f" AND +rowid IN ({sub_sql})"
+        parametros += list(sub_parametros)
+
+    sql += " ORDER BY rank, rowid DESC LIMIT %s"
+    parametros.append(limite)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        ids = [fila[0] for fila in cursor.fetchall()]
+
+    por_id = qs.in_bulk(ids)
+    return [por_id[i] for i in ids if i in por_id]
+
+
+# ---------------------------------------------------------------
+# Palabras que InnoDB no indexa en FULLTEXT: su lista de stopwords
+# por defecto (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD) y las
+# más cortas que innodb_ft_min_token_size (AUDITORIA_FT_MIN_TOKEN,
+# 3 por defecto). Un "+palabra" así no coincide con ninguna fila y
+# vaciaría toda la búsqueda.
+# ---------------------------------------------------------------
+STOPWORDS_INNODB = frozenset({
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de",
+    "en", "for", "from", "how", "i", "in", "is", "it", "la", "of",
+    "on", "or", "that", "the", "this", "to", "was", "what", "when",
+    "where", "who", "will", "with", "und", "www",
+})
+
+
+def _indexable_fulltext(termino) -> bool:
+    minimo = getattr(settings, "AUDITORIA_FT_MIN_TOKEN", 3)
+    return len(termino) >= minimo and termino.lower() not in STOPWORDS_INNODB
+
+
+def _contiene_todos(qs, terminos):
+    for t in terminos:
+        qs = qs.filter(Q(detalle__icontains=t) | Q(modulo__icontains=t) | Q(accion__icontains=t))
+    return qs
+
+
+# ---------------------------------------------------------------
+# _filtro_texto():
+# Otros motores: queryset restringido a los registros que contienen
+# TODOS los términos (en detalle, modulo o accion), anotado con
+# "relevancia" (mayor = más relevante):
+#
+#   MySQL  → MATCH (…) AGAINST (… IN BOOLEAN MODE), que usa el
+#            índice FULLTEXT, con "+" en los términos indexables;
+#            los que el índice no ve (cortos o stopwords) se exigen
+#            con icontains sobre las filas que ya coincidieron
+#   otros  → icontains por término, sin relevancia
+# ---------------------------------------------------------------
+def _filtro_texto(qs, terminos):
+    if connection.vendor == "mysql":
+        indexables = [t for t in terminos if _indexable_fulltext(t)]
+        qs = _contiene_todos(qs, [t for t in terminos if not _indexable_fulltext(t)])
+
+        if indexables:
+            tabla = connection.ops.quote_name(Auditoria._meta.db_table)
+            consulta = " ".join(f"+{t}" for t in indexables)
+            return qs.annotate(relevancia=RawSQL(
+                f"MATCH ({tabla}.detalle, {tabla}.modulo, {tabla}.accion) AGAINST (%s IN BOOLEAN MODE)",
+                [consulta],
+                output_field=FloatField(),
+            )).filter(relevancia__gt=0)
+
+    else:
+        qs = _contiene_todos(qs, terminos)
+    return qs.annotate(relevancia=RawSQL("0", [], output_field=FloatField()))
+
+
+# ===============================================================
+# buscar_texto()
+#
+# Parámetros:
+#   texto     → texto libre (ej: "maxisaco 1234"); se buscan los
+#               registros que contienen todas las palabras
+#   criterios → filtros del listado (ver filtrar())
+#   limite    → máximo de resultados
+#
+# Retorna los registros (con usuario) ordenados por relevancia y,
+# a igual relevancia, del más reciente al más antiguo.
+# ===============================================================
+def buscar_texto(texto, criterios, limite=50):
+    terminos = _terminos(texto)
+    if not terminos:
+        return []
+
+    qs = filtrar(Auditoria.objects.select_related("usuario"), criterios)
+
+    if connection.vendor == "sqlite":
+        return _buscar_fts5(qs, terminos, limite)
+
+    qs = _filtro_texto(qs, terminos)
+    return list(qs.order_by("-relevancia", "-fecha", "-id")[:limite])
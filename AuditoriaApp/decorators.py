@@ -1,31 +1,9 @@
 from functools import wraps
 from AuditoriaApp.utils import registrar_auditoria
-from UsuariosApp.models import UsuariosModels
 
-
-# ===============================================================
-# FUNCIÓN AUXILIAR: get_user_from_session
-#
-# Obtiene el usuario actualmente logueado mediante el nombre
-# de usuario almacenado en la sesión.
-#
-# Retorna:
-#   - instancia de UsuariosModels si existe
-#   - None si no hay usuario o no existe en BD
-#
-# NOTA:
-#   Esta función no registra auditoría por sí sola.
-# ===============================================================
-def get_user_from_session(request):
-    username = request.session.get("Usuario_Ingresado")
-
-    if not username:
-        return None
-
-    try:
-        return UsuariosModels.objects.get(Username=username)
-    except UsuariosModels.DoesNotExist:
-        return None
+# get_user_from_session vive en UsuariosApp/middleware.py (compartida
+# con permisos y vistas); se re-exporta aquí por compatibilidad
+from UsuariosApp.middleware import get_user_from_session  # noqa: F401
 
 
 # ===============================================================
@@ -0,0 +1,227 @@
+# ===============================================================
+# AuditoriaApp/escritor.py
+#
+# Escritor asíncrono de auditoría.
+#
+# registrar_auditoria() ya no escribe en la base de datos dentro
+# del request: deja el registro en una cola en memoria y un hilo de
+# fondo lo guarda junto con otros, en lotes, con bulk_create().
+#
+#   request  →  cola (Queue acotada)  →  hilo escritor  →  bulk_create
+#
+# El hilo escribe un lote cuando:
+#   - junta AUDITORIA_LOTE registros, o
+#   - pasan AUDITORIA_INTERVALO segundos desde el primer registro
+#     pendiente.
+#
+# El usuario se guarda en la cola por su id si el request ya lo
+# resolvió (UsuariosApp/middleware.py) o si no por su Username (está
+# en la sesión), que se resuelve en el hilo con UNA consulta por
+# lote: el request no hace ninguna consulta de auditoría.
+#
+# Cada lote también se suma al resumen diario ActividadDiaria (ver
+# actividad.py), en la misma transacción que el bulk_create.
+#
+# Garantías:
+#   - Cola llena (AUDITORIA_COLA_MAX) → ese registro se escribe en
+#     forma síncrona en el request (no se pierde).
+#   - Lote que falla → se reintenta AUDITORIA_REINTENTOS veces con
+#     backoff exponencial (AUDITORIA_BACKOFF); si sigue fallando se
+#     escribe registro por registro, y solo los que fallan solos se
+#     descartan, cada uno con su traza en el log.
+#   - Al terminar el proceso (atexit) se escribe lo pendiente.
+#   - La fecha del registro es la del evento, no la de escritura.
+#
+# Configuración (settings.py):
+#   AUDITORIA_ASINCRONA  → False = escritura síncrona (comportamiento
+#                          original, útil en tests)
+#   AUDITORIA_LOTE, AUDITORIA_INTERVALO, AUDITORIA_COLA_MAX,
+#   AUDITORIA_REINTENTOS, AUDITORIA_BACKOFF
+# ===============================================================
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .actividad import acumular
+from .models import Auditoria
+from UsuariosApp.models import UsuariosModels
+
+
+logger = logging.getLogger(__name__)
+
+# Marca que pide al hilo escribir de inmediato lo que tiene pendiente
+_VACIAR = object()
+
+
+# ---------------------------------------------------------------
+# escribir_registros():
+# Guarda una lista de registros (dicts con username, usuario_id
+# opcional, accion, modulo, detalle, fecha) con una consulta para
+# los usuarios y un bulk_create, y actualiza el resumen diario. Se
+# usa tanto desde el hilo como en modo síncrono.
+# ---------------------------------------------------------------
+def escribir_registros(registros):
+    if not registros:
+        return
+
+    # Solo se buscan los usuarios que no vienen ya resueltos
+    usernames = {r["username"] for r in registros if r["username"] and not r.get("usuario_id")}
+    usuarios = dict(
+        UsuariosModels.objects.filter(Username__in=usernames).values_list("Username", "pk")
+    ) if usernames else {}
+
+    auditorias = [
+        Auditoria(
+            usuario_id=r.get("usuario_id") or usuarios.get(r["username"]),
+            accion=r["accion"],
+            modulo=r["modulo"],
+            detalle=r["detalle"],
+            fecha=r["fecha"],
+        )
+        for r in registros
+    ]
+
+    with transaction.atomic():
+        Auditoria.objects.bulk_create(auditorias)
+        acumular(auditorias)
+
+
+# ===============================================================
+# CLASE: EscritorAuditoria
+#
+# Una instancia por proceso (escritor_auditoria, abajo). El hilo se
+# crea con el primer registro; si el proceso se bifurca (fork de
+# workers) el hijo crea su propia cola e hilo.
+# ===============================================================
+class EscritorAuditoria:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._cola = None
+        self._hilo = None
+        atexit.register(self.detener)
+
+    # -----------------------------------------------------------
+    # _iniciar(): crea cola + hilo (perezosamente, por proceso)
+    # -----------------------------------------------------------
+    def _iniciar(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._cola = queue.Queue(maxsize=getattr(settings, "AUDITORIA_COLA_MAX", 10000))
+            self._hilo = threading.Thread(
+                target=self._ejecutar, name="escritor-auditoria", daemon=True
+            )
+            self._hilo.start()
+            self._pid = os.getpid()
+
+    # -----------------------------------------------------------
+    # encolar():
+    # Agrega un registro. Si la cola está llena lo escribe en el
+    # momento (fallback síncrono).
+    # -----------------------------------------------------------
+    def encolar(self, registro):
+        self._iniciar()
+        try:
+            self._cola.put_nowait(registro)
+        except queue.Full:
+            logger.warning("Cola de auditoría llena; escritura síncrona.")
+            escribir_registros([registro])
+
+    # -----------------------------------------------------------
+    # vaciar():
+    # Bloquea hasta que todo lo encolado quede escrito.
+    # -----------------------------------------------------------
+    def vaciar(self):
+        if self._pid != os.getpid() or not self._hilo.is_alive():
+            return
+        self._cola.put(_VACIAR)
+        self._cola.join()
+
+    # -----------------------------------------------------------
+    # detener(): escribe lo pendiente al terminar el proceso
+    # -----------------------------------------------------------
+    def detener(self):
+        self.vaciar()
+
+    # -----------------------------------------------------------
+    # _ejecutar(): ciclo del hilo escritor
+    # -----------------------------------------------------------
+    def _ejecutar(self):
+        lote_max = getattr(settings, "AUDITORIA_LOTE", 100)
+        intervalo = getattr(settings, "AUDITORIA_INTERVALO", 2.0)
+
+        pendientes = []
+        limite = None
+
+        while True:
+            espera = None if limite is None else max(limite - time.monotonic(), 0)
+            try:
+                item = self._cola.get(timeout=espera)
+            except queue.Empty:
+                item = _VACIAR  # venció el intervalo
+                recibido = False
+            else:
+                recibido = True
+
+            if item is not _VACIAR:
+                pendientes.append(item)
+                if limite is None:
+                    limite = time.monotonic() + intervalo
+
+            if pendientes and (item is _VACIAR or len(pendientes) >= lote_max):
+                self._escribir(pendientes)
+                for _ in pendientes:
+                    self._cola.task_done()
+                pendientes = []
+                limite = None
+
+            if recibido and item is _VACIAR:
+                self._cola.task_done()
+
+    # -----------------------------------------------------------
+    # _escribir():
+    # Escribe un lote con reintentos y backoff exponencial. Si el
+    # lote sigue fallando, se escribe registro por registro: un
+    # registro inválido no arrastra al resto, y lo que de verdad no
+    # se puede guardar queda en el log con su traza.
+    # -----------------------------------------------------------
+    def _escribir(self, registros):
+        reintentos = getattr(settings, "AUDITORIA_REINTENTOS", 3)
+        backoff = getattr(settings, "AUDITORIA_BACKOFF", 0.5)
+
+        for intento in range(reintentos + 1):
+            # Descarta la conexión si quedó inutilizable tras un error
+            close_old_connections()
+            try:
+                escribir_registros(registros)
+                return
+            except Exception as e:
+                if intento < reintentos:
+                    logger.warning(
+                        "No se pudieron guardar %d registros de auditoría (intento %d): %s",
+                        len(registros), intento + 1, e,
+                    )
+                    time.sleep(backoff * 2 ** intento)
+
+        for registro in registros:
+            close_old_connections()
+            try:
+                escribir_registros([registro])
+            except Exception:
+                logger.exception("Registro de auditoría descartado: %r", registro)
+
+
+escritor_auditoria = EscritorAuditoria()
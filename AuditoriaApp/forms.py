@@ -0,0 +1,130 @@
+from datetime import datetime, time, timedelta
+
+from django import forms
+from django.utils import timezone
+
+from UsuariosApp.models import UsuariosModels
+
+
+# ===============================================================
+# FORMULARIO: FiltroAuditoriaForm
+#
+# Filtros del listado de auditorías (parámetros GET):
+#
+#   • desde / hasta → rango de fechas (ambos días incluidos)
+#   • usuario       → usuario responsable
+#   • modulo        → módulo exacto (Stock, Contrato, ...)
+#   • accion        → acción exacta (crear, editar, ...)
+#   • q             → texto libre sobre detalle / módulo / acción
+#                     (búsqueda por relevancia, ver buscar_texto())
+#
+# Todos son opcionales. criterios() entrega los filtros ya
+# normalizados para AuditoriaApp/consultas.py; "q" se lee aparte
+# desde cleaned_data.
+# ===============================================================
+class FiltroAuditoriaForm(forms.Form):
+
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Desde",
+    )
+
+    hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Hasta",
+    )
+
+    usuario = forms.ModelChoiceField(
+        queryset=UsuariosModels.objects.order_by("Username"),
+        required=False,
+        empty_label="Todos",
+        label="Usuario",
+    )
+
+    modulo = forms.CharField(required=False, max_length=100, label="Módulo")
+    accion = forms.CharField(required=False, max_length=50, label="Acción")
+    q = forms.CharField(required=False, max_length=200, label="Buscar")
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        desde = cleaned_data.get("desde")
+        hasta = cleaned_data.get("hasta")
+        if desde and hasta and desde > hasta:
+            self.add_error("hasta", "La fecha final debe ser posterior a la inicial.")
+
+        return cleaned_data
+
+    # -----------------------------------------------------------
+    # criterios():
+    # Filtros válidos como dict (solo los que vienen informados):
+    #   desde / hasta → datetime con zona horaria: [desde, hasta)
+    #                   (hasta = día siguiente a las 00:00, así el
+    #                   filtro usa el índice de fecha sin cortar
+    #                   la columna por día)
+    #   usuario_id, modulo, accion
+    # -----------------------------------------------------------
+    def criterios(self) -> dict:
+        datos = self.cleaned_data
+        criterios = {}
+
+        if datos.get("desde"):
+            criterios["desde"] = timezone.make_aware(datetime.combine(datos["desde"], time.min))
+        if datos.get("hasta"):
+            criterios["hasta"] = timezone.make_aware(
+                datetime.combine(datos["hasta"] + timedelta(days=1), time.min)
+            )
+        if datos.get("usuario"):
+            criterios["usuario_id"] = datos["usuario"].pk
+        if datos.get("modulo"):
+            criterios["modulo"] = datos["modulo"].strip()
+        if datos.get("accion"):
+            criterios["accion"] = datos["accion"].strip()
+
+        return criterios
+
+
+# ===============================================================
+# FORMULARIO: RangoActividadForm
+#
+# Rango de días del reporte de actividad (parámetros GET). Sin
+# fechas, el reporte cubre los últimos AUDITORIA_ACTIVIDAD_DIAS.
+# ===============================================================
+class RangoActividadForm(forms.Form):
+
+    desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Desde",
+    )
+
+    hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Hasta",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        desde = cleaned_data.get("desde")
+        hasta = cleaned_data.get("hasta")
+        if desde and hasta and desde > hasta:
+            self.add_error("hasta", "La fecha final debe ser posterior a la inicial.")
+
+        return cleaned_data
+
+    # -----------------------------------------------------------
+    # rango(): (desde, hasta) como date, completando lo que falte
+    # -----------------------------------------------------------
+    def rango(self, dias_defecto=30):
+        datos = self.cleaned_data if self.is_valid() else {}
+        hasta = datos.get("hasta") or timezone.localdate()
+        desde = datos.get("desde") or hasta - timedelta(days=dias_defecto - 1)
+        return desde, hasta
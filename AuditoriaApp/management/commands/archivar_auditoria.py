@@ -0,0 +1,62 @@
+# ===============================================================
+# manage.py archivar_auditoria
+#
+# Mueve los registros de auditoría más antiguos que la ventana de
+# retención a los archivos mensuales comprimidos (ver
+# AuditoriaApp/archivo.py). Pensado para ejecutarse a diario
+# (cron). Es idempotente: si se interrumpe, basta volver a correrlo.
+#
+#   python manage.py archivar_auditoria
+#   python manage.py archivar_auditoria --dias 730
+#   python manage.py archivar_auditoria --dry-run
+# ===============================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from AuditoriaApp.archivo import archivar, corte_archivo
+from AuditoriaApp.models import Auditoria
+
+
+class Command(BaseCommand):
+    help = "Archiva en .jsonl.gz mensuales las auditorías fuera de la ventana de retención."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias", type=int,
+            default=getattr(settings, "AUDITORIA_RETENCION_DIAS", 365),
+            help="Días que se conservan en la tabla (por defecto AUDITORIA_RETENCION_DIAS).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Solo informa cuántos registros se archivarían por mes.",
+        )
+
+    def handle(self, *args, **options):
+        # Días completos (ver corte_archivo()), igual que archivar()
+        antes_de = corte_archivo(timezone.now() - timedelta(days=options["dias"]))
+
+        if options["dry_run"]:
+            por_mes = (
+                Auditoria.objects.filter(fecha__lt=antes_de)
+                .annotate(mes=TruncMonth("fecha"))
+                .values("mes")
+                .annotate(total=Count("id"))
+                .order_by("mes")
+            )
+            for fila in por_mes:
+                self.stdout.write(f"{fila['mes']:%Y-%m}: {fila['total']} registros")
+            return
+
+        resultado = archivar(antes_de)
+
+        for mes, total in resultado.items():
+            self.stdout.write(f"{mes}: {total} registros archivados")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivados {sum(resultado.values())} registros anteriores a {antes_de:%Y-%m-%d}."
+        ))
@@ -0,0 +1,51 @@
+# ===============================================================
+# manage.py buscar_auditoria
+#
+# Busca en las auditorías vigentes y archivadas (ver
+# AuditoriaApp/archivo.py) y escribe los resultados como JSONL,
+# del más reciente al más antiguo.
+#
+#   python manage.py buscar_auditoria --usuario Admin --desde 2023-01-01
+#   python manage.py buscar_auditoria --modulo Stock --accion eliminar
+# ===============================================================
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AuditoriaApp.archivo import buscar
+from AuditoriaApp.forms import FiltroAuditoriaForm
+from UsuariosApp.models import UsuariosModels
+
+
+class Command(BaseCommand):
+    help = "Busca auditorías en la tabla y en los archivos mensuales."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Fecha inicial (YYYY-MM-DD).")
+        parser.add_argument("--hasta", help="Fecha final, incluida (YYYY-MM-DD).")
+        parser.add_argument("--usuario", help="Username del responsable.")
+        parser.add_argument("--modulo")
+        parser.add_argument("--accion")
+        parser.add_argument("--limite", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        datos = {
+            campo: options[campo]
+            for campo in ("desde", "hasta", "modulo", "accion")
+            if options[campo]
+        }
+
+        if options["usuario"]:
+            usuario = UsuariosModels.objects.filter(Username=options["usuario"]).first()
+            if usuario is None:
+                raise CommandError(f"No existe el usuario {options['usuario']!r}.")
+            datos["usuario"] = usuario.pk
+
+        # Mismas validaciones y normalización que la vista
+        form = FiltroAuditoriaForm(datos)
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        for r in buscar(form.criterios(), limite=options["limite"]):
+            self.stdout.write(json.dumps({**r, "fecha": r["fecha"].isoformat()}, ensure_ascii=False))
@@ -0,0 +1,43 @@
+# ===============================================================
+# manage.py reconstruir_actividad
+#
+# Recalcula el resumen diario ActividadDiaria desde la tabla
+# Auditoria (ver AuditoriaApp/actividad.py). Se usa una vez al
+# instalar el resumen, o para corregirlo tras cargas manuales.
+#
+#   python manage.py reconstruir_actividad
+#   python manage.py reconstruir_actividad --desde 2025-01-01 --hasta 2025-01-31
+#
+# Sin --desde parte del registro más antiguo que sigue en la tabla,
+# después del último día con registros archivados: esos días
+# conservan su resumen. Un --desde que incluya días archivados se
+# rechaza.
+# ===============================================================
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AuditoriaApp.actividad import reconstruir
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida {valor!r} (use YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen diario de actividad desde la auditoría."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=_fecha, help="Primer día (YYYY-MM-DD).")
+        parser.add_argument("--hasta", type=_fecha, help="Último día, incluido (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            filas = reconstruir(options["desde"], options["hasta"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido: {filas} filas."))
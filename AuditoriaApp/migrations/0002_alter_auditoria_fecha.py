@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuditoriaApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditoria',
+            name='fecha',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Fecha y hora en que ocurrió la acción.'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuditoriaApp', '0002_alter_auditoria_fecha'),
+        ('UsuariosApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['fecha', 'id'], name='auditoria_fecha_id'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['usuario', 'fecha', 'id'], name='auditoria_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['modulo', 'fecha', 'id'], name='auditoria_modulo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['accion', 'fecha', 'id'], name='auditoria_accion_fecha'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Índice de texto completo sobre detalle, modulo y accion
+# (ver AuditoriaApp/consultas.py, buscar_texto()).
+#
+#   SQLite → tabla virtual FTS5 "auditoria_fts" de contenido externo
+#            (no duplica el texto), sincronizada con triggers
+#   MySQL  → índice FULLTEXT "auditoria_texto"
+#
+# Otros motores no crean nada: buscar_texto() usa LIKE.
+#
+# Ojo (SQLite): una migración futura que reconstruya la tabla de
+# Auditoria (AlterField, RemoveField) borra los triggers; esa
+# migración debe volver a llamar a crear_indice_texto().
+
+from django.db import migrations
+
+
+FTS_TABLA = "auditoria_fts"
+FULLTEXT_INDICE = "auditoria_texto"
+
+
+def crear_indice_texto(apps, schema_editor):
+    conexion = schema_editor.connection
+    tabla = apps.get_model("AuditoriaApp", "Auditoria")._meta.db_table
+    q = conexion.ops.quote_name
+
+    if conexion.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLA} USING fts5("
+            f"detalle, modulo, accion, content={q(tabla)}, content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        # Triggers: el índice se actualiza en la misma transacción
+        # que la fila (también con bulk_create y delete masivos)
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLA}_ai AFTER INSERT ON {q(tabla)} BEGIN "
+            f"INSERT INTO {FTS_TABLA}(rowid, detalle, modulo, accion) "
+            f"VALUES (new.id, new.detalle, new.modulo, new.accion); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLA}_ad AFTER DELETE ON {q(tabla)} BEGIN "
+            f"INSERT INTO {FTS_TABLA}({FTS_TABLA}, rowid, detalle, modulo, accion) "
+            f"VALUES ('delete', old.id, old.detalle, old.modulo, old.accion); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLA}_au AFTER UPDATE ON {q(tabla)} BEGIN "
+            f"INSERT INTO {FTS_TABLA}({FTS_TABLA}, rowid, detalle, modulo, accion) "
+            f"VALUES ('delete', old.id, old.detalle, old.modulo, old.accion); "
+            f"INSERT INTO {FTS_TABLA}(rowid, detalle, modulo, accion) "
+            f"VALUES (new.id, new.detalle, new.modulo, new.accion); END"
+        )
+        # Indexa los registros existentes
+        schema_editor.execute(f"INSERT INTO {FTS_TABLA}({FTS_TABLA}) VALUES ('rebuild')")
+
+    elif conexion.vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {q(tabla)} ADD FULLTEXT INDEX {FULLTEXT_INDICE} (detalle, modulo, accion)"
+        )
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    conexion = schema_editor.connection
+    tabla = apps.get_model("AuditoriaApp", "Auditoria")._meta.db_table
+
+    if conexion.vendor == "sqlite":
+        for sufijo in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLA}_{sufijo}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLA}")
+
+    elif conexion.vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE {conexion.ops.quote_name(tabla)} DROP INDEX {FULLTEXT_INDICE}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuditoriaApp', '0003_auditoria_auditoria_fecha_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+    ]
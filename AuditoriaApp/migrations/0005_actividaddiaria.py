@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuditoriaApp', '0004_auditoria_busqueda_texto'),
+        ('UsuariosApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActividadDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('modulo', models.CharField(max_length=100)),
+                ('accion', models.CharField(max_length=50)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='UsuariosApp.usuariosmodels')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', 'dia'], name='actividad_usuario_dia')],
+                'constraints': [models.UniqueConstraint(fields=('dia', 'usuario', 'modulo', 'accion'), name='actividad_diaria_unica')],
+            },
+        ),
+    ]
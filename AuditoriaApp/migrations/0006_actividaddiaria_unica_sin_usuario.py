@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+#
+# Restricción única para los grupos de ActividadDiaria sin usuario
+# (ver AuditoriaApp/models.py). Antes de crearla se fusionan los
+# duplicados que la restricción original dejaba pasar: se conserva
+# una fila por grupo con la suma de las cantidades.
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def fusionar_duplicados_sin_usuario(apps, schema_editor):
+    ActividadDiaria = apps.get_model("AuditoriaApp", "ActividadDiaria")
+
+    duplicados = (
+        ActividadDiaria.objects.filter(usuario__isnull=True)
+        .values("dia", "modulo", "accion")
+        .annotate(filas=Count("id"), primera=Min("id"), total=Sum("cantidad"))
+        .filter(filas__gt=1)
+        .order_by()
+    )
+    for grupo in duplicados:
+        del_grupo = ActividadDiaria.objects.filter(
+            usuario__isnull=True, dia=grupo["dia"], modulo=grupo["modulo"], accion=grupo["accion"]
+        )
+        del_grupo.exclude(id=grupo["primera"]).delete()
+        del_grupo.update(cantidad=grupo["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AuditoriaApp', '0005_actividaddiaria'),
+        ('UsuariosApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_duplicados_sin_usuario, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='actividaddiaria',
+            constraint=models.UniqueConstraint(condition=models.Q(('usuario__isnull', True)), fields=('dia', 'modulo', 'accion'), name='actividad_diaria_unica_sin_usuario'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 # Create your models here.
 from django.db import models
+from django.utils import timezone
 from UsuariosApp.models import UsuariosModels
 
 
@@ -97,19 +98,101 @@ class Auditoria(models.Model):
     # -----------------------------------------------------------
     # Fecha y hora del evento
     #
-    # auto_now_add=True :
-    #   Registra automáticamente el momento exacto de creación,
-    #   sin posibilidad de ser modificado manualmente.
+    # default=timezone.now :
+    #   registrar_auditoria() fija la hora en que ocurrió la acción
+    #   al encolarla; el registro se escribe después, en lote (ver
+    #   escritor.py), sin cambiar esa hora.
     #
     # Esto garantiza precisión en la trazabilidad.
     # -----------------------------------------------------------
     fecha = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
         help_text="Fecha y hora en que ocurrió la acción."
     )
 
+    # -----------------------------------------------------------
+    # Índices para el listado paginado (ver consultas.py)
+    #
+    # Todos terminan en (fecha, id), el orden del listado: con un
+    # filtro de igualdad (usuario, módulo o acción) más rango de
+    # fechas, la base recorre un solo índice ya ordenado desde el
+    # cursor, sin ordenar ni leer filas de más.
+    # -----------------------------------------------------------
+    class Meta:
+        indexes = [
+            models.Index(fields=["fecha", "id"], name="auditoria_fecha_id"),
+            models.Index(fields=["usuario", "fecha", "id"], name="auditoria_usuario_fecha"),
+            models.Index(fields=["modulo", "fecha", "id"], name="auditoria_modulo_fecha"),
+            models.Index(fields=["accion", "fecha", "id"], name="auditoria_accion_fecha"),
+        ]
+
     # -----------------------------------------------------------
     # Representación legible del registro de auditoría
     # -----------------------------------------------------------
     def __str__(self):
         return f"{self.modulo} - {self.accion} ({self.fecha:%d/%m/%Y %H:%M})"
+
+
+# ===============================================================
+# MODELO: ActividadDiaria
+#
+# Resumen diario de la auditoría: cuántas acciones hizo cada
+# usuario, por módulo y acción, cada día.
+#
+#   (dia, usuario, modulo, accion) → cantidad
+#
+# Se mantiene en forma incremental al escribir cada lote de
+# auditoría (ver actividad.py y escritor.py), de modo que los
+# reportes de actividad recorren esta tabla chica y no el log
+# completo. Sobrevive a la retención: archivar auditorías antiguas
+# (archivo.py) no borra su actividad.
+#
+# Se puede recalcular desde Auditoria con:
+#     python manage.py reconstruir_actividad
+# ===============================================================
+class ActividadDiaria(models.Model):
+
+    # Día local (TIME_ZONE) en que ocurrieron las acciones
+    dia = models.DateField()
+
+    # Usuario responsable (NULL = acciones sin usuario identificado)
+    usuario = models.ForeignKey(
+        UsuariosModels,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    modulo = models.CharField(max_length=100)
+    accion = models.CharField(max_length=50)
+
+    # Número de registros de auditoría del grupo
+    cantidad = models.PositiveIntegerField(default=0)
+
+    # -----------------------------------------------------------
+    # Una fila por grupo; la restricción empieza por "dia", así los
+    # reportes por rango de fechas recorren su índice.
+    #
+    # En SQL dos NULL no son iguales: la primera restricción no
+    # impide dos filas del mismo grupo sin usuario. La segunda
+    # (índice parcial) cubre ese caso. MySQL no soporta índices
+    # parciales y la ignora; ahí solo acumular() evita duplicados.
+    # -----------------------------------------------------------
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "usuario", "modulo", "accion"],
+                name="actividad_diaria_unica",
+            ),
+            models.UniqueConstraint(
+                fields=["dia", "modulo", "accion"],
+                condition=models.Q(usuario__isnull=True),
+                name="actividad_diaria_unica_sin_usuario",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["usuario", "dia"], name="actividad_usuario_dia"),
+        ]
+
+    def __str__(self):
+        return f"{self.dia:%d/%m/%Y} {self.modulo} - {self.accion}: {self.cantidad}"
@@ -1,3 +1,545 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as tz
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connection, transaction
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from UsuariosApp.models import UsuariosModels
+
+from . import archivo, consultas, escritor
+from .consultas import buscar_texto, decodificar_cursor, obtener_pagina
+from .actividad import acumular, reconstruir, reporte
+from .escritor import escribir_registros
+from .models import ActividadDiaria, Auditoria
+
+
+# ===============================================================
+# EscritorAuditoriaTests
+#
+# Hilo escritor de auditoría (AuditoriaApp/escritor.py): arma
+# lotes por tamaño y por intervalo, vacía lo pendiente a pedido,
+# reintenta los lotes que fallan y, como último recurso, escribe
+# registro por registro. escribir_registros() se reemplaza por un
+# registro de llamadas: aquí solo se prueba el hilo.
+# ===============================================================
+@override_settings(
+    AUDITORIA_LOTE=3, AUDITORIA_INTERVALO=60, AUDITORIA_COLA_MAX=100,
+    AUDITORIA_REINTENTOS=2, AUDITORIA_BACKOFF=0,
+)
+class EscritorAuditoriaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.lotes = []
+        self.falla = None
+
+        def escribir(registros):
+            if self.falla and self.falla(registros):
+                raise RuntimeError("base de datos no disponible")
+            self.lotes.append([r["detalle"] for r in registros])
+
+        for nombre, nuevo in (("escribir_registros", escribir), ("close_old_connections", lambda: None)):
+            parche = mock.patch.object(escritor, nombre, nuevo)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+        self.escritor = escritor.EscritorAuditoria()
+        self.addCleanup(self.escritor.vaciar)
+
+    @staticmethod
+    def _registro(i):
+        return {"username": "Admin", "accion": "crear", "modulo": "Stock", "detalle": str(i), "fecha": None}
+
+    def _encolar(self, cantidad):
+        for i in range(cantidad):
+            self.escritor.encolar(self._registro(i))
+
+    def test_lotes_por_tamano_y_vaciado(self):
+        self._encolar(7)
+        self.escritor.vaciar()
+
+        self.assertEqual(self.lotes, [["0", "1", "2"], ["3", "4", "5"], ["6"]])
+
+    @override_settings(AUDITORIA_LOTE=100, AUDITORIA_INTERVALO=0.05)
+    def test_lote_por_intervalo(self):
+        self._encolar(2)
+
+        limite = time.monotonic() + 5
+        while not self.lotes and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertEqual(self.lotes, [["0", "1"]])
+
+    def test_reintenta_el_lote(self):
+        intentos = []
+
+        def dos_fallas(registros):
+            intentos.append(registros)
+            return len(intentos) <= 2
+
+        self.falla = dos_fallas
+
+        with self.assertLogs(escritor.logger, "WARNING") as log:
+            self._encolar(3)
+            self.escritor.vaciar()
+
+        self.assertEqual(len(intentos), 3)
+        self.assertEqual(self.lotes, [["0", "1", "2"]])
+        self.assertEqual(len(log.records), 2)
+
+    def test_ultimo_recurso_registro_por_registro(self):
+        # El lote nunca entra; solo el registro "1" falla también solo
+        self.falla = lambda registros: len(registros) > 1 or registros[0]["detalle"] == "1"
+
+        with self.assertLogs(escritor.logger, "WARNING") as log:
+            self._encolar(3)
+            self.escritor.vaciar()
+
+        self.assertEqual(self.lotes, [["0"], ["2"]])
+        descartados = [r for r in log.records if r.levelname == "ERROR"]
+        self.assertEqual(len(descartados), 1)
+        self.assertIn("'detalle': '1'", descartados[0].getMessage())
+        self.assertIsNotNone(descartados[0].exc_info)
+
+    @override_settings(AUDITORIA_LOTE=1, AUDITORIA_COLA_MAX=1)
+    def test_cola_llena_escribe_en_el_request(self):
+        # El hilo se queda escribiendo el primer registro hasta que
+        # se libere; el segundo ocupa la cola y el tercero no cabe
+        liberar = threading.Event()
+        tomado = threading.Event()
+        escribir = escritor.escribir_registros
+
+        def lento(registros):
+            if threading.current_thread().name == "escritor-auditoria":
+                tomado.set()
+                liberar.wait(5)
+            escribir(registros)
+
+        with mock.patch.object(escritor, "escribir_registros", lento):
+            self.escritor.encolar(self._registro(0))
+            tomado.wait(5)
+            with self.assertLogs(escritor.logger, "WARNING"):
+                self.escritor.encolar(self._registro(1))
+                self.escritor.encolar(self._registro(2))
+
+            self.assertEqual(self.lotes, [["2"]])
+            liberar.set()
+            self.escritor.vaciar()
+
+        self.assertEqual(sorted(self.lotes), [["0"], ["1"], ["2"]])
+
+
+# ===============================================================
+# PaginacionCursorTests
+#
+# El cursor (fecha, id) de consultas.py recorre filas con la misma
+# fecha sin saltarse ni repetir ninguna, aunque el corte de página
+# caiga en medio de un grupo de fechas iguales.
+# ===============================================================
+class PaginacionCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=tz.utc)
+        Auditoria.objects.bulk_create([
+            Auditoria(
+                accion="editar", modulo="Stock" if i % 2 else "Contrato",
+                detalle=f"registro {i}", fecha=base + timedelta(minutes=i // 4),
+            )
+            for i in range(14)
+        ])
+
+    def _recorrer(self, criterios, tamano):
+        vistos, cursor = [], None
+        while True:
+            filas, cursor = obtener_pagina(criterios, cursor=cursor, tamano=tamano)
+            vistos += [a.id for a in filas]
+            if cursor is None:
+                return vistos
+
+    def test_fechas_iguales_sin_saltos_ni_repetidos(self):
+        for criterios in ({}, {"modulo": "Stock"}):
+            esperado = list(
+                Auditoria.objects.filter(**criterios)
+                .order_by("-fecha", "-id").values_list("id", flat=True)
+            )
+            for tamano in (1, 3, 5, len(esperado)):
+                with self.subTest(criterios=criterios, tamano=tamano):
+                    self.assertEqual(self._recorrer(criterios, tamano), esperado)
+
+    def test_cursor_conserva_fecha_exacta(self):
+        filas, cursor = obtener_pagina({}, tamano=3)
+        self.assertEqual(decodificar_cursor(cursor), (filas[-1].fecha, filas[-1].id))
+
+        # Un cursor inválido vuelve a la primera página
+        self.assertEqual(obtener_pagina({}, cursor="basura", tamano=3)[0], filas)
+
+
+# ---------------------------------------------------------------
+# _archivo_temporal(): AUDITORIA_ARCHIVO_DIR en un directorio
+# temporal durante la prueba (no se leen ni escriben los archivos
+# reales del proyecto)
+# ---------------------------------------------------------------
+def _archivo_temporal(prueba):
+    directorio = tempfile.TemporaryDirectory()
+    prueba.addCleanup(directorio.cleanup)
+    ajustes = override_settings(AUDITORIA_ARCHIVO_DIR=directorio.name)
+    ajustes.enable()
+    prueba.addCleanup(ajustes.disable)
+
+
+# ===============================================================
+# ArchivoAuditoriaTests
+#
+# Retención (archivo.py): archivar un mes lo saca de la tabla y la
+# búsqueda lo devuelve junto a los registros vivos; re-ejecutar
+# sobre un mes a medio archivar no duplica ni pierde registros.
+# ===============================================================
+class ArchivoAuditoriaTests(TestCase):
+
+    def setUp(self):
+        _archivo_temporal(self)
+        self.admin = UsuariosModels.objects.get(Username="Admin")
+
+    def _auditoria(self, anio, mes, dia, modulo="Stock", usuario=None):
+        return Auditoria.objects.create(
+            usuario=usuario, accion="editar", modulo=modulo, detalle=f"{anio}-{mes}-{dia}",
+            fecha=timezone.make_aware(datetime(anio, mes, dia, 10)),
+        )
+
+    def _archivados(self, anio, mes):
+        ruta, ruta_indice = archivo._rutas(anio, mes)
+        ids = [r["id"] for r in archivo._leer_lineas(ruta)]
+        return ids, json.loads(ruta_indice.read_text(encoding="utf-8"))
+
+    def test_archivar_y_buscar_con_los_vivos(self):
+        enero = [
+            self._auditoria(2025, 1, 5, usuario=self.admin),
+            self._auditoria(2025, 1, 20, modulo="Contrato"),
+        ]
+        febrero = [self._auditoria(2025, 2, 3)]
+        vivos = [self._auditoria(2026, 3, 1), self._auditoria(2026, 3, 2, modulo="Contrato")]
+
+        movidos = archivo.archivar(antes_de=timezone.make_aware(datetime(2026, 1, 1)))
+
+        self.assertEqual(movidos, {"2025-01": 2, "2025-02": 1})
+        self.assertEqual(
+            set(Auditoria.objects.values_list("id", flat=True)), {a.id for a in vivos}
+        )
+        ids, indice = self._archivados(2025, 1)
+        self.assertEqual(ids, [a.id for a in enero])
+        self.assertEqual(indice["registros"], 2)
+        self.assertEqual(indice["modulos"], {"Stock": 1, "Contrato": 1})
+
+        resultado = archivo.buscar({})
+        self.assertEqual(
+            [(r["id"], r["origen"]) for r in resultado],
+            [(vivos[1].id, "tabla"), (vivos[0].id, "tabla"),
+             (febrero[0].id, "archivo"), (enero[1].id, "archivo"), (enero[0].id, "archivo")],
+        )
+        self.assertEqual(resultado[-1]["usuario"], "Admin")
+        self.assertEqual(resultado[-1]["fecha"], enero[0].fecha)
+
+        # Filtro y límite: el índice descarta febrero sin abrirlo
+        por_modulo = archivo.buscar({"modulo": "Contrato"})
+        self.assertEqual([r["id"] for r in por_modulo], [vivos[1].id, enero[1].id])
+        self.assertEqual(len(archivo.buscar({}, limite=3)), 3)
+
+    def test_reejecutar_mes_a_medio_archivar(self):
+        enero = [self._auditoria(2025, 1, dia) for dia in (2, 9, 16)]
+        antes_de = timezone.make_aware(datetime(2026, 1, 1))
+
+        # Proceso interrumpido: el archivo quedó escrito con los dos
+        # primeros, pero las filas no alcanzaron a eliminarse
+        parcial = Auditoria.objects.filter(id__in=[a.id for a in enero[:2]]).order_by("fecha", "id")
+        archivo._archivar_mes(2025, 1, parcial.select_related("usuario"))
+        # ...y después llegó un registro más del mismo mes
+        enero.append(self._auditoria(2025, 1, 30))
+
+        self.assertEqual(archivo.archivar(antes_de=antes_de), {"2025-01": 4})
+        self.assertFalse(Auditoria.objects.exists())
+
+        ids, indice = self._archivados(2025, 1)
+        self.assertEqual(sorted(ids), sorted(a.id for a in enero))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(indice["registros"], 4)
+
+        # Un registro tardío de un mes ya archivado se agrega al mismo archivo
+        tardio = self._auditoria(2025, 1, 31)
+        self.assertEqual(archivo.archivar(antes_de=antes_de), {"2025-01": 1})
+        ids, indice = self._archivados(2025, 1)
+        self.assertEqual(sorted(ids), sorted([a.id for a in enero] + [tardio.id]))
+        self.assertEqual(indice["registros"], 5)
+        self.assertEqual(
+            [r["id"] for r in archivo.buscar({})],
+            [tardio.id] + [a.id for a in reversed(enero)],
+        )
+
+
+# ===============================================================
+# BusquedaTextoTests
+#
+# buscar_texto() (consultas.py) con SQLite: usa la tabla FTS5 que
+# mantienen los triggers de la migración 0004 y ordena por bm25;
+# los caracteres de la sintaxis de búsqueda se descartan.
+# ===============================================================
+class BusquedaTextoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        def auditoria(modulo, detalle):
+            return Auditoria.objects.create(accion="editar", modulo=modulo, detalle=detalle)
+
+        cls.repetido = auditoria("Stock", "Maxisaco 1234 movido; maxisaco revisado, maxisaco ok")
+        cls.simple = auditoria("Stock", "Maxisaco 1234 editado en bodega norte con observaciones")
+        cls.contrato = auditoria("Contrato", "Maxisaco 1234 asignado al contrato")
+        cls.otro = auditoria("Stock", "Especie Luga Roja editada")
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 solo existe en SQLite")
+
+    def test_resultados_por_relevancia(self):
+        ids = [a.id for a in buscar_texto("maxisaco 1234", {})]
+        self.assertEqual(ids[0], self.repetido.id)
+        self.assertEqual(set(ids), {self.repetido.id, self.simple.id, self.contrato.id})
+
+        por_modulo = buscar_texto("maxisaco", {"modulo": "Contrato"})
+        self.assertEqual([a.id for a in por_modulo], [self.contrato.id])
+        self.assertEqual(len(buscar_texto("maxisaco", {}, limite=2)), 2)
+
+        # Los triggers mantienen el índice al editar y borrar
+        self.otro.detalle = "Maxisaco 1234 reasignado"
+        self.otro.save()
+        self.contrato.delete()
+        ids = {a.id for a in buscar_texto("maxisaco 1234", {})}
+        self.assertEqual(ids, {self.repetido.id, self.simple.id, self.otro.id})
+
+    def test_caracteres_de_sintaxis(self):
+        self.assertEqual(
+            [a.id for a in buscar_texto('maxisaco* +1234 -"editado"', {})], [self.simple.id]
+        )
+        for texto in ('NEAR(maxisaco', 'modulo:Stock', '"', "*^-"):
+            with self.subTest(texto=texto):
+                self.assertEqual(buscar_texto(texto, {}), [])
+
+
+# ===============================================================
+# FiltroFulltextMySQLTests
+#
+# Con MySQL, los términos que FULLTEXT no indexa (cortos o
+# stopwords) no llevan "+" en MATCH: se exigen con icontains. Se
+# revisa el SQL generado; no hace falta un servidor MySQL.
+# ===============================================================
+class FiltroFulltextMySQLTests(SimpleTestCase):
+
+    def test_terminos_no_indexables_sin_mas(self):
+        mysql = mock.Mock(vendor="mysql", ops=connection.ops)
+        with mock.patch.object(consultas, "connection", mysql):
+            qs = consultas._filtro_texto(Auditoria.objects.all(), ["Maxisaco", "de", "ok", "1234"])
+            sql = str(qs.query)
+
+        self.assertIn("+Maxisaco +1234", sql)
+        self.assertNotIn("+de", sql)
+        self.assertNotIn("+ok", sql)
+        self.assertIn("%de%", sql)
+        self.assertIn("%ok%", sql)
+
+        with mock.patch.object(consultas, "connection", mysql):
+            sql = str(consultas._filtro_texto(Auditoria.objects.all(), ["de", "ok"]).query)
+        self.assertNotIn("MATCH", sql)
+
+
+# ===============================================================
+# ActividadDiariaTests
+#
+# Resumen diario (actividad.py): acumular() por lotes y
+# reconstruir() desde Auditoria llegan al mismo resumen, una fila
+# por grupo también sin usuario, y reporte() lo agrega por día,
+# módulo, acción y usuario.
+# ===============================================================
+class ActividadDiariaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UsuariosModels.objects.get(Username="Admin")
+        cls.gerente = UsuariosModels.objects.get(Username="gerente")
+
+    def setUp(self):
+        _archivo_temporal(self)
+
+    def _registros(self):
+        def registro(usuario, modulo, accion, dia, hora=10):
+            return {
+                "username": usuario.Username if usuario else None,
+                "usuario_id": usuario.pk if usuario else None,
+                "accion": accion, "modulo": modulo, "detalle": "",
+                "fecha": datetime(2026, 5, dia, hora, tzinfo=tz.utc),
+            }
+
+        return [
+            registro(self.admin, "Stock", "crear", 4),
+            registro(self.admin, "Stock", "crear", 4, hora=23),
+            registro(self.admin, "Contrato", "editar", 4),
+            registro(self.gerente, "Stock", "crear", 4),
+            registro(None, "Autenticación", "login_fallido", 4),
+            registro(None, "Autenticación", "login_fallido", 4),
+            registro(self.admin, "Stock", "eliminar", 6),
+            registro(None, "Autenticación", "login_fallido", 6),
+        ]
+
+    def _resumen(self):
+        return set(ActividadDiaria.objects.values_list("dia", "usuario_id", "modulo", "accion", "cantidad"))
+
+    def test_acumular_por_lotes(self):
+        registros = self._registros()
+        # En lotes separados: los grupos se suman, no se duplican
+        escribir_registros(registros[:5])
+        escribir_registros(registros[5:])
+
+        sin_usuario = ActividadDiaria.objects.filter(usuario__isnull=True, dia=date(2026, 5, 4))
+        self.assertEqual(list(sin_usuario.values_list("cantidad", flat=True)), [2])
+        self.assertIn((date(2026, 5, 4), self.admin.pk, "Stock", "crear", 2), self._resumen())
+        self.assertEqual(sum(fila[-1] for fila in self._resumen()), len(registros))
+
+    def test_reconstruir_coincide_con_acumular(self):
+        escribir_registros(self._registros())
+        acumulado = self._resumen()
+
+        ActividadDiaria.objects.all().delete()
+        self.assertEqual(reconstruir(), len(acumulado))
+        self.assertEqual(self._resumen(), acumulado)
+
+        # Un rango solo reemplaza sus días
+        ActividadDiaria.objects.filter(dia=date(2026, 5, 6)).update(cantidad=99)
+        reconstruir(date(2026, 5, 4), date(2026, 5, 4))
+        self.assertEqual(
+            set(ActividadDiaria.objects.filter(dia=date(2026, 5, 6)).values_list("cantidad", flat=True)),
+            {99},
+        )
+        reconstruir(date(2026, 5, 6), date(2026, 5, 6))
+        self.assertEqual(self._resumen(), acumulado)
+
+    def test_reporte(self):
+        escribir_registros(self._registros())
+        datos = reporte(date(2026, 5, 3), date(2026, 5, 6), top=2)
+
+        self.assertEqual(
+            [(d["dia"].day, d["total"]) for d in datos["tendencia"]],
+            [(3, 0), (4, 6), (5, 0), (6, 2)],
+        )
+        self.assertEqual(datos["total"], 8)
+        self.assertEqual(
+            [(m["modulo"], m["total"]) for m in datos["modulos"]],
+            [("Stock", 4), ("Autenticación", 3), ("Contrato", 1)],
+        )
+        self.assertEqual(datos["acciones"][0], {"accion": "crear", "total": 3})
+        self.assertEqual(
+            [(u["username"], u["total"]) for u in datos["usuarios"]], [("Admin", 4), (None, 3)]
+        )
+        self.assertEqual(reporte(date(2026, 5, 5), date(2026, 5, 5))["total"], 0)
+
+    def test_grupo_sin_usuario_unico(self):
+        clave = {"dia": date(2026, 5, 4), "modulo": "Stock", "accion": "crear"}
+        ActividadDiaria.objects.create(cantidad=1, **clave)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ActividadDiaria.objects.create(cantidad=1, **clave)
+
+        # Con usuario sigue siendo una fila por usuario
+        ActividadDiaria.objects.create(usuario=self.admin, cantidad=1, **clave)
+        ActividadDiaria.objects.create(usuario=self.gerente, cantidad=1, **clave)
+
+        acumular([Auditoria(fecha=datetime(2026, 5, 4, 12, tzinfo=tz.utc), **{
+            k: v for k, v in clave.items() if k != "dia"
+        })])
+        self.assertEqual(ActividadDiaria.objects.get(usuario__isnull=True, **clave).cantidad, 2)
+
+    def test_eliminar_usuario_pasa_su_actividad_a_sin_usuario(self):
+        escribir_registros(self._registros())
+        login = {"dia": date(2026, 5, 4), "modulo": "Autenticación", "accion": "login_fallido"}
+        escribir_registros([{
+            "username": "gerente", "usuario_id": self.gerente.pk, "detalle": "",
+            "fecha": datetime(2026, 5, 4, 9, tzinfo=tz.utc), **{k: v for k, v in login.items() if k != "dia"},
+        }])
+
+        gerente_id = self.gerente.pk
+        self.gerente.delete()
+
+        self.assertFalse(ActividadDiaria.objects.filter(usuario_id=gerente_id).exists())
+        self.assertEqual(ActividadDiaria.objects.get(usuario__isnull=True, **login).cantidad, 3)
+        self.assertEqual(
+            ActividadDiaria.objects.get(usuario__isnull=True, dia=date(2026, 5, 4), modulo="Stock").cantidad, 1
+        )
+        self.assertEqual(reporte(date(2026, 5, 4), date(2026, 5, 6))["total"], 9)
+
+
+# ===============================================================
+# ReconstruirConArchivoTests
+#
+# El resumen de un día con registros archivados no se recalcula
+# desde la tabla: archivar() corta en días completos, reconstruir()
+# sin rango parte después del último día archivado y un rango
+# explícito que lo incluye se rechaza.
+# ===============================================================
+class ReconstruirConArchivoTests(TestCase):
+
+    DIA = date(2025, 1, 10)
+
+    def setUp(self):
+        _archivo_temporal(self)
+        escribir_registros([
+            {
+                "username": None, "accion": "editar", "modulo": "Stock", "detalle": str(hora),
+                "fecha": timezone.make_aware(datetime(2025, 1, 10, hora, 30)),
+            }
+            for hora in range(0, 24, 2)
+        ])
+
+    def _cantidad(self, dia):
+        return ActividadDiaria.objects.get(dia=dia).cantidad
+
+    def test_archivar_no_parte_el_dia(self):
+        movidos = archivo.archivar(antes_de=timezone.make_aware(datetime(2025, 1, 10, 12)))
+
+        self.assertEqual(movidos, {})
+        self.assertEqual(Auditoria.objects.count(), 12)
+        reconstruir()
+        self.assertEqual(self._cantidad(self.DIA), 12)
+
+        # Al día siguiente sí se archiva el día completo
+        self.assertEqual(
+            archivo.archivar(antes_de=timezone.make_aware(datetime(2025, 1, 11, 12))),
+            {"2025-01": 12},
+        )
+        self.assertEqual(archivo.ultimo_dia_archivado(), self.DIA)
+
+    def test_dia_archivado_en_parte_conserva_su_resumen(self):
+        # Un corte a mitad del día (archivos de antes del redondeo)
+        manana = Auditoria.objects.filter(fecha__lt=timezone.make_aware(datetime(2025, 1, 10, 12)))
+        archivo._archivar_mes(2025, 1, manana.select_related("usuario").order_by("fecha", "id"))
+        manana.delete()
+        self.assertEqual(Auditoria.objects.count(), 6)
+
+        reconstruir()
+        self.assertEqual(self._cantidad(self.DIA), 12)
+
+        # Los días posteriores sí se reconstruyen
+        escribir_registros([{
+            "username": None, "accion": "editar", "modulo": "Stock", "detalle": "",
+            "fecha": timezone.make_aware(datetime(2025, 1, 11, 9)),
+        }])
+        ActividadDiaria.objects.filter(dia=date(2025, 1, 11)).delete()
+        self.assertEqual(reconstruir(), 1)
+        self.assertEqual(self._cantidad(date(2025, 1, 11)), 1)
+        self.assertEqual(self._cantidad(self.DIA), 12)
+
+        with self.assertRaises(ValueError):
+            reconstruir(self.DIA, self.DIA)
+        with self.assertRaises(CommandError):
+            call_command("reconstruir_actividad", "--desde", "2025-01-01")
+        self.assertEqual(self._cantidad(self.DIA), 12)
@@ -10,6 +10,8 @@ from . import views
 #
 #   ✓ Ver la lista completa de auditorías registradas
 #   ✓ Ver el detalle de una auditoría individual
+#   ✓ Buscar en auditorías vigentes y archivadas
+#   ✓ Ver el reporte de actividad por día / módulo / usuario
 #
 # Seguridad:
 #   Todas las vistas están protegidas por el decorador:
@@ -20,6 +22,8 @@ from . import views
 # Convención de nombres:
 #   name="auditoria"           → listado general
 #   name="auditoria_detalle"   → detalle de un registro específico
+#   name="auditoria_buscar"    → búsqueda en tabla + archivos
+#   name="auditoria_actividad" → reporte de actividad
 #
 # Integración:
 #   Estas rutas se incluyen normalmente bajo:
@@ -54,4 +58,26 @@ urlpatterns = [
     #       - fecha/hora
     # -----------------------------------------------------------
     path("detalle/<int:id>/", views.auditoria_detalle, name="auditoria_detalle"),
+
+    # -----------------------------------------------------------
+    # BÚSQUEDA EN AUDITORÍAS ARCHIVADAS
+    #
+    # URL: /buscar/
+    # Vista: auditoria_buscar
+    # Descripción:
+    #   Busca con los filtros del listado en la tabla y en los
+    #   archivos mensuales comprimidos (registros ya retenidos).
+    # -----------------------------------------------------------
+    path("buscar/", views.auditoria_buscar, name="auditoria_buscar"),
+
+    # -----------------------------------------------------------
+    # REPORTE DE ACTIVIDAD
+    #
+    # URL: /actividad/
+    # Vista: auditoria_actividad
+    # Descripción:
+    #   Tendencia diaria, totales por módulo / acción y usuarios
+    #   más activos, desde el resumen ActividadDiaria.
+    # -----------------------------------------------------------
+    path("actividad/", views.auditoria_actividad, name="auditoria_actividad"),
 ]
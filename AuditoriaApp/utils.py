@@ -1,5 +1,8 @@
-from .models import Auditoria
-from UsuariosApp.models import UsuariosModels
+from django.conf import settings
+from django.utils import timezone
+
+from UsuariosApp.middleware import usuario_en_cache
+from .escritor import escribir_registros, escritor_auditoria
 
 
 # ===============================================================
@@ -33,32 +36,38 @@ from UsuariosApp.models import UsuariosModels
 #         "Edición de contrato ID 12"
 #
 # Funcionamiento interno:
-#   1. Obtiene el Username desde la sesión.
-#   2. Intenta recuperar el objeto UsuariosModels asociado.
-#   3. Si el usuario no existe (no debería ocurrir), almacena None.
-#   4. Crea un registro en la tabla Auditoria.
+#   1. Obtiene el Username desde la sesión y la fecha del evento.
+#      Si el usuario ya se resolvió en este request (por ejemplo en
+#      @requiere_permiso) se guarda también su id y el escritor no
+#      vuelve a buscarlo.
+#   2. Con AUDITORIA_ASINCRONA (por defecto) deja el registro en la
+#      cola del escritor de fondo (ver escritor.py): el request no
+#      hace consultas de auditoría.
+#   3. Sin ella, lo escribe en el momento.
+#   En ambos casos, si no se resolvió su id, el usuario se busca
+#   por Username al escribir (si no existe, se almacena None).
 #
 # El modelo Auditoria se encarga de almacenar:
 #   - usuario (FK)
 #   - acción realizada
 #   - módulo afectado
 #   - detalle del evento
-#   - fecha/hora automática del sistema
+#   - fecha/hora del evento
 #
 # ===============================================================
 def registrar_auditoria(request, accion, modulo, detalle=""):
-    username = request.session.get("Usuario_Ingresado")
+    usuario = usuario_en_cache(request)
 
-    usuario = None
-    if username:
-        try:
-            usuario = UsuariosModels.objects.get(Username=username)
-        except UsuariosModels.DoesNotExist:
-            usuario = None
+    registro = {
+        "username": request.session.get("Usuario_Ingresado"),
+        "usuario_id": usuario.pk if usuario else None,
+        "accion": accion,    # tipo de operación ("crear", "editar"...)
+        "modulo": modulo,    # módulo afectado
+        "detalle": detalle,  # mensaje descriptivo opcional
+        "fecha": timezone.now(),
+    }
 
-    Auditoria.objects.create(
-        usuario=usuario,  # FK hacia usuario que realizó la acción
-        accion=accion,    # tipo de operación ("crear", "editar"...)
-        modulo=modulo,    # módulo afectado
-        detalle=detalle   # mensaje descriptivo opcional
-    )
+    if getattr(settings, "AUDITORIA_ASINCRONA", True):
+        escritor_auditoria.encolar(registro)
+    else:
+        escribir_registros([registro])
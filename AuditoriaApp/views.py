@@ -5,9 +5,18 @@ from RolApp.decorators import requiere_permiso
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 
+import json
+
 # Modelo de auditoría
 from .models import Auditoria
 
+# Filtros y paginación por cursor
+from .consultas import buscar_texto, obtener_pagina
+from .archivo import buscar
+from .actividad import reporte
+from .forms import FiltroAuditoriaForm, RangoActividadForm
+from django.conf import settings
+
 
 # ===============================================================
 # MÓDULO AuditoriaApp — VISTAS
@@ -15,6 +24,8 @@ from .models import Auditoria
 # Este módulo permite visualizar:
 #   - Listado completo de auditorías del sistema
 #   - Detalle de auditoría individual
+#   - Búsqueda en auditorías vigentes + archivadas
+#   - Reporte de actividad por día, módulo y usuario
 #
 # Importancia:
 #   El modelo Auditoria registra acciones críticas en el sistema:
@@ -37,17 +48,131 @@ from .models import Auditoria
 #   @requiere_permiso("PermisoVerDashboard")
 #
 # Función:
-#   - Obtiene todas las auditorías registradas
-#   - Orden descendente por fecha (últimas primero)
+#   - Aplica los filtros GET (FiltroAuditoriaForm): rango de
+#     fechas, usuario, módulo y acción
+#   - Muestra una página de AUDITORIA_PAGINA registros, orden
+#     descendente por fecha (últimas primero), paginada por cursor
+#     (parámetro GET "cursor", ver consultas.py)
+#   - Con texto de búsqueda (parámetro GET "q") muestra en cambio
+#     los AUDITORIA_PAGINA registros más relevantes que lo
+#     contienen (índice de texto completo, ver consultas.py)
 #   - Renderiza la plantilla auditoria/lista.html
 #
 # Contexto enviado al template:
-#   auditorias → queryset con todas las auditorías
+#   auditorias       → registros de la página (con usuario)
+#   busqueda         → texto buscado ("" si no hay búsqueda)
+#   form             → formulario de filtros
+#   siguiente_query  → querystring de la página siguiente (o None)
+#   filtros_query    → querystring de la primera página con los filtros
+#   es_primera       → True si no se está paginando
 # ===============================================================
 @requiere_permiso("PermisoVerDashboard")
 def auditoria_list(request):
-    auditorias = Auditoria.objects.all().order_by("-fecha")
-    return render(request, "auditoria/lista.html", {"auditorias": auditorias})
+    form = FiltroAuditoriaForm(request.GET or None)
+
+    valido = form.is_valid()
+    criterios = form.criterios() if valido else {}
+    busqueda = form.cleaned_data.get("q", "").strip() if valido else ""
+    cursor = request.GET.get("cursor")
+    tamano = getattr(settings, "AUDITORIA_PAGINA", 50)
+
+    if busqueda:
+        # Resultados por relevancia: solo la primera página
+        auditorias, siguiente = buscar_texto(busqueda, criterios, limite=tamano), None
+    else:
+        auditorias, siguiente = obtener_pagina(criterios, cursor=cursor, tamano=tamano)
+
+    # Querystrings conservando los filtros
+    parametros = request.GET.copy()
+    parametros.pop("cursor", None)
+    filtros_query = parametros.urlencode()
+
+    siguiente_query = None
+    if siguiente:
+        parametros["cursor"] = siguiente
+        siguiente_query = parametros.urlencode()
+
+    return render(request, "auditoria/lista.html", {
+        "auditorias": auditorias,
+        "busqueda": busqueda,
+        "form": form,
+        "siguiente_query": siguiente_query,
+        "filtros_query": filtros_query,
+        "es_primera": not cursor,
+    })
+
+
+# ===============================================================
+# BÚSQUEDA EN AUDITORÍAS ARCHIVADAS
+#
+# Decorador:
+#   @requiere_permiso("PermisoVerDashboard")
+#
+# Función:
+#   - Aplica los mismos filtros GET que el listado
+#   - Busca en la tabla y en los archivos mensuales comprimidos
+#     (ver archivo.py), hasta AUDITORIA_BUSQUEDA_MAX resultados
+#   - Sin filtros no busca: recorrer todos los archivos no aporta
+#   - Renderiza auditoria/archivo.html
+#
+# Contexto enviado al template:
+#   resultados → dicts de archivo.buscar() (con "origen")
+#   form       → formulario de filtros
+#   limite     → máximo de resultados mostrados
+# ===============================================================
+@requiere_permiso("PermisoVerDashboard")
+def auditoria_buscar(request):
+    form = FiltroAuditoriaForm(request.GET or None)
+    limite = getattr(settings, "AUDITORIA_BUSQUEDA_MAX", 200)
+
+    resultados = []
+    if form.is_valid() and form.criterios():
+        resultados = buscar(form.criterios(), limite=limite)
+
+    return render(request, "auditoria/archivo.html", {
+        "resultados": resultados,
+        "form": form,
+        "limite": limite,
+    })
+
+
+# ===============================================================
+# REPORTE DE ACTIVIDAD
+#
+# Decorador:
+#   @requiere_permiso("PermisoVerDashboard")
+#
+# Función:
+#   - Rango de días por GET (RangoActividadForm); por defecto los
+#     últimos AUDITORIA_ACTIVIDAD_DIAS
+#   - Lee el resumen diario ActividadDiaria (ver actividad.py),
+#     nunca la tabla completa de auditoría
+#   - Renderiza auditoria/actividad.html
+#
+# Contexto enviado al template:
+#   form, desde, hasta
+#   reporte          → dict de actividad.reporte()
+#   chart_tendencia  → JSON {labels, data} para Chart.js
+# ===============================================================
+@requiere_permiso("PermisoVerDashboard")
+def auditoria_actividad(request):
+    form = RangoActividadForm(request.GET or None)
+    desde, hasta = form.rango(getattr(settings, "AUDITORIA_ACTIVIDAD_DIAS", 30))
+
+    datos = reporte(desde, hasta)
+
+    chart_tendencia = {
+        "labels": [t["dia"].strftime("%d/%m") for t in datos["tendencia"]],
+        "data": [t["total"] for t in datos["tendencia"]],
+    }
+
+    return render(request, "auditoria/actividad.html", {
+        "form": form,
+        "desde": desde,
+        "hasta": hasta,
+        "reporte": datos,
+        "chart_tendencia": json.dumps(chart_tendencia),
+    })
 
 
 # ===============================================================
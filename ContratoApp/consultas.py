@@ -0,0 +1,99 @@
+# ===============================================================
+# ContratoApp/consultas.py
+#
+# Listado de contratos con su avance de entregas, en UNA consulta.
+#
+# Cada contrato se anota (GROUP BY sobre sus entregas) con:
+#
+#   requerido   → Σ toneladas_requeridas de sus entregas
+#   cumplido    → Σ toneladas_cumplidas de sus entregas
+#   porcentaje  → cumplido * 100 / requerido (None sin entregas)
+#   proximo_mes → mes más antiguo con entrega pendiente
+#                 (cumplidas < requeridas); None si no queda nada
+#   atrasado    → contrato activo cuya entrega pendiente más
+#                 antigua es de un mes ya terminado
+#
+# Paginación por cursor (keyset) sobre id descendente, igual que el
+# listado de auditorías: WHERE id < cursor ORDER BY id DESC LIMIT
+# tamaño + 1. La fila extra solo indica si hay página siguiente.
+#
+# Los filtros de estado y fecha de término usan los índices
+# (estado, fecha_fin) y (fecha_fin) de Contrato.
+# ===============================================================
+
+from django.db.models import BooleanField, Case, F, FloatField, Min, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Contrato
+
+
+# ---------------------------------------------------------------
+# filtrar():
+# Aplica los criterios de FiltroContratoForm.criterios():
+#   estado, vence_desde / vence_hasta (fecha_fin, ambos incluidos)
+# ---------------------------------------------------------------
+def filtrar(qs, criterios):
+    if "estado" in criterios:
+        qs = qs.filter(estado=criterios["estado"])
+    if "vence_desde" in criterios:
+        qs = qs.filter(fecha_fin__gte=criterios["vence_desde"])
+    if "vence_hasta" in criterios:
+        qs = qs.filter(fecha_fin__lte=criterios["vence_hasta"])
+    return qs
+
+
+# ---------------------------------------------------------------
+# con_avance():
+# Anota el avance de entregas de cada contrato (ver encabezado).
+# "hoy" se puede fijar para pruebas; por defecto es la fecha local.
+# ---------------------------------------------------------------
+def con_avance(qs, hoy=None):
+    inicio_mes = (hoy or timezone.localdate()).replace(day=1)
+    pendiente = Q(entregas__toneladas_cumplidas__lt=F("entregas__toneladas_requeridas"))
+
+    return qs.annotate(
+        requerido=Coalesce(Sum("entregas__toneladas_requeridas"), Value(0), output_field=FloatField()),
+        cumplido=Coalesce(Sum("entregas__toneladas_cumplidas"), Value(0), output_field=FloatField()),
+        proximo_mes=Min("entregas__mes", filter=pendiente),
+    ).annotate(
+        porcentaje=Case(
+            When(requerido__gt=0, then=Cast("cumplido", FloatField()) * 100 / F("requerido")),
+            default=None,
+            output_field=FloatField(),
+        ),
+        atrasado=Case(
+            When(estado="activo", proximo_mes__lt=inicio_mes, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+
+
+# ===============================================================
+# obtener_pagina()
+#
+# Parámetros:
+#   criterios → dict de filtros (ver filtrar())
+#   cursor    → id del último contrato de la página anterior, o
+#               None para la primera
+#   tamano    → contratos por página
+#
+# Retorna (contratos, siguiente_cursor | None). Es UNA consulta.
+# ===============================================================
+def obtener_pagina(criterios, cursor=None, tamano=25, hoy=None):
+    qs = filtrar(Contrato.objects.all(), criterios)
+
+    try:
+        posicion = int(cursor) if cursor else None
+    except (TypeError, ValueError):
+        posicion = None
+    if posicion is not None:
+        qs = qs.filter(id__lt=posicion)
+
+    filas = list(con_avance(qs, hoy=hoy).order_by("-id")[:tamano + 1])
+
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        return filas, str(filas[-1].id)
+    return filas, None
@@ -168,4 +168,58 @@ class EntregaContratoForm(forms.ModelForm):
                 (especie.id, f"{especie.nombre} | Stock: {stock:.2f} KG")
             )
 
-        self.fields["especie"].choices = opciones
\ No newline at end of file
+        self.fields["especie"].choices = opciones
+
+# ===============================================================
+# FORMULARIO: FiltroContratoForm
+#
+# Filtros del listado de contratos (parámetros GET):
+#
+#   • estado                    → activo / completado / cancelado
+#   • vence_desde / vence_hasta → rango de fecha de término
+#                                 (ambos días incluidos)
+#
+# Todos son opcionales. criterios() entrega los filtros informados
+# para ContratoApp/consultas.py.
+# ===============================================================
+class FiltroContratoForm(forms.Form):
+
+    estado = forms.ChoiceField(
+        choices=[("", "Todos")] + Contrato._meta.get_field("estado").choices,
+        required=False,
+        label="Estado",
+    )
+
+    vence_desde = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Vence desde",
+    )
+
+    vence_hasta = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        input_formats=["%Y-%m-%d", "%d-%m-%Y"],
+        label="Vence hasta",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        desde = cleaned_data.get("vence_desde")
+        hasta = cleaned_data.get("vence_hasta")
+        if desde and hasta and desde > hasta:
+            self.add_error("vence_hasta", "La fecha final debe ser posterior a la inicial.")
+
+        return cleaned_data
+
+    # -----------------------------------------------------------
+    # criterios(): filtros válidos como dict (solo los informados)
+    # -----------------------------------------------------------
+    def criterios(self) -> dict:
+        return {
+            campo: valor
+            for campo, valor in self.cleaned_data.items()
+            if valor
+        }
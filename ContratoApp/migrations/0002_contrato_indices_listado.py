@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ContratoApp', '0001_initial'),
+        ('UsuariosApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['estado', 'fecha_fin'], name='contrato_estado_fecha_fin'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['fecha_fin'], name='contrato_fecha_fin'),
+        ),
+    ]
@@ -97,6 +97,18 @@ class Contrato(models.Model):
         help_text="Estado actual del contrato."
     )
 
+    # -----------------------------------------------------------
+    # Índices para los filtros del listado (ContratoApp/consultas.py)
+    #
+    #   (estado, fecha_fin) → estado exacto + rango de término
+    #   (fecha_fin)         → rango de término sin estado
+    # -----------------------------------------------------------
+    class Meta:
+        indexes = [
+            models.Index(fields=["estado", "fecha_fin"], name="contrato_estado_fecha_fin"),
+            models.Index(fields=["fecha_fin"], name="contrato_fecha_fin"),
+        ]
+
     # -----------------------------------------------------------
     # Representación legible
     # -----------------------------------------------------------
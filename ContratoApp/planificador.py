@@ -0,0 +1,243 @@
+# ===============================================================
+# ContratoApp/planificador.py
+#
+# Planificador de factibilidad de contratos.
+#
+# Para cada especie y cada mes del horizonte calcula el stock
+# proyectado al cierre del mes:
+#
+#     stock[e, m] = stock_actual[e]
+#                   + Σ_{k ≤ m} (entradas_proyectadas[e, k]
+#                                − entregas_pendientes[e, k])
+#
+#   stock_actual          → entradas − salidas de Maxisaco (hoy)
+#   entradas_proyectadas  → corrida vigente de proyecciones
+#                           (resumen anual por especie, ver
+#                           ProyeccionesApp/services.py)
+#   entregas_pendientes   → requerido − cumplido de las entregas de
+#                           contratos activos (las atrasadas cuentan
+#                           en el mes actual)
+#
+# Un mes con stock proyectado < 0 es un quiebre: con lo que hay y
+# lo que se espera producir no alcanza para cumplir TODOS los
+# contratos. Se reporta el primer mes de quiebre de cada especie
+# y el mayor déficit.
+#
+# Todo se calcula como matrices NumPy (especies × meses): tres
+# consultas + un resumen de proyecciones por año + un cumsum, sin
+# ciclos por especie ni por mes, de modo que varios años de
+# horizonte toman milisegundos.
+#
+# Las cantidades están en kg (igual que Maxisaco.peso_kg y las
+# entregas).
+#
+# Usado por:
+#   - HomeApp (alertas del dashboard)
+#   - ContratoApp.views.entrega_crear
+# ===============================================================
+
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Q, Sum
+
+from EspecieApp.models import Especie
+from ProyeccionesApp.services import obtener_resumen_anual
+from StockApp.models import Maxisaco
+from .models import EntregaContrato
+
+
+# ---------------------------------------------------------------
+# _indice_mes(): date → número de mes absoluto (anio * 12 + mes - 1)
+# ---------------------------------------------------------------
+def _indice_mes(fecha) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _fecha_mes(indice) -> date:
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+# ---------------------------------------------------------------
+# _stock_actual():
+# Entradas − salidas por especie en UNA consulta agregada.
+# ---------------------------------------------------------------
+def _stock_actual(posicion) -> np.ndarray:
+    stock = np.zeros(len(posicion))
+
+    filas = (
+        Maxisaco.objects.values("especie_id")
+        .annotate(
+            entradas=Sum("peso_kg", filter=Q(tipo_movimiento="entrada")),
+            salidas=Sum("peso_kg", filter=Q(tipo_movimiento="salida")),
+        )
+    )
+    for f in filas:
+        if f["especie_id"] in posicion:
+            stock[posicion[f["especie_id"]]] = float(f["entradas"] or 0) - float(f["salidas"] or 0)
+
+    return stock
+
+
+# ---------------------------------------------------------------
+# _filas_pendientes():
+# Lo que falta entregar (requerido − cumplido) de los contratos
+# activos, agregado por especie y mes en la base de datos:
+#     [(especie_id, anio, mes, kg), ...]
+# ---------------------------------------------------------------
+def _filas_pendientes() -> list[tuple]:
+    return list(
+        EntregaContrato.objects.filter(
+            contrato__estado="activo",
+            toneladas_requeridas__gt=F("toneladas_cumplidas"),
+        )
+        .values("especie_id", "mes__year", "mes__month")
+        .annotate(pendiente=Sum(F("toneladas_requeridas") - F("toneladas_cumplidas")))
+        .values_list("especie_id", "mes__year", "mes__month", "pendiente")
+    )
+
+
+# ---------------------------------------------------------------
+# _entregas_pendientes():
+# Matriz (especies × meses) a partir de _filas_pendientes().
+# Las entregas anteriores al mes inicial (atrasadas) se suman al
+# mes inicial.
+# ---------------------------------------------------------------
+def _entregas_pendientes(filas, posicion, inicio, meses) -> np.ndarray:
+    pendientes = np.zeros((len(posicion), meses))
+    if not filas:
+        return pendientes
+
+    especie_id, anio, mes, kg = zip(*filas)
+    fila = np.array([posicion.get(e, -1) for e in especie_id])
+    columna = np.maximum(np.array(anio) * 12 + np.array(mes) - 1 - inicio, 0)
+    kg = np.array(kg, dtype=np.float64)
+
+    validas = fila >= 0
+    np.add.at(pendientes, (fila[validas], columna[validas]), kg[validas])
+    return pendientes
+
+
+# ---------------------------------------------------------------
+# _entradas_proyectadas():
+# Matriz (especies × meses) con la producción proyectada por la
+# corrida vigente. Lee un resumen precalculado por año del horizonte.
+# Sin corrida vigente (o si el almacén no responde) queda en 0: el
+# plan se calcula solo con el stock actual.
+# ---------------------------------------------------------------
+def _entradas_proyectadas(nombres, inicio, meses) -> np.ndarray:
+    entradas = np.zeros((len(nombres), meses))
+    fila = {nombre: i for i, nombre in enumerate(nombres)}
+
+    for anio in range(inicio // 12, (inicio + meses - 1) // 12 + 1):
+        try:
+            resumen = obtener_resumen_anual(anio)
+        except Exception as e:
+            print(f"[WARN] Planificador sin proyecciones para {anio}: {e}")
+            resumen = None
+        if not resumen:
+            continue
+
+        for especie, por_mes in resumen["especies"].items():
+            if especie not in fila:
+                continue
+            for mes, kg in por_mes.items():
+                columna = anio * 12 + mes - 1 - inicio
+                if 0 <= columna < meses:
+                    entradas[fila[especie], columna] = kg
+
+    return entradas
+
+
+# ===============================================================
+# calcular_plan()
+#
+# Parámetros:
+#   - desde (date): primer mes del plan (por defecto, el actual)
+#   - meses (int):  horizonte mínimo (settings.PLANIFICADOR_MESES,
+#                   12 por defecto); se extiende hasta la última
+#                   entrega pendiente
+#   - extra (list): entregas hipotéticas (especie_id, anio, mes, kg)
+#                   que se suman a las pendientes (ver evaluar_entrega)
+#
+# Retorna un dict:
+#   {
+#       "meses":    [date, ...]            primer día de cada mes
+#       "especies": [(id, nombre), ...]
+#       "stock":    ndarray (especies, meses) stock proyectado al cierre
+#       "quiebres": [ {especie_id, especie, mes, deficit_kg}, ... ]
+#   }
+#
+# Un quiebre por especie (el primero), con el mayor déficit del
+# horizonte; ordenados por mes.
+# ===============================================================
+def calcular_plan(desde: date | None = None, meses: int | None = None, extra=()) -> dict:
+
+    inicio = _indice_mes(desde or date.today())
+    if meses is None:
+        meses = getattr(settings, "PLANIFICADOR_MESES", 12)
+
+    especies = list(Especie.objects.order_by("nombre").values_list("id", "nombre"))
+    posicion = {especie_id: i for i, (especie_id, _) in enumerate(especies)}
+
+    filas = _filas_pendientes() + list(extra)
+
+    # Horizonte: hasta la última entrega pendiente si va más allá
+    fin = max([inicio + meses - 1, *(a * 12 + m - 1 for _, a, m, _ in filas)])
+    meses = fin - inicio + 1
+
+    # -----------------------------------------------------------
+    # Matrices especies × meses y stock proyectado
+    # -----------------------------------------------------------
+    stock_actual = _stock_actual(posicion)
+    entradas = _entradas_proyectadas([nombre for _, nombre in especies], inicio, meses)
+    pendientes = _entregas_pendientes(filas, posicion, inicio, meses)
+
+    stock = stock_actual[:, None] + np.cumsum(entradas - pendientes, axis=1)
+
+    # -----------------------------------------------------------
+    # Quiebres: primer mes negativo y déficit máximo por especie
+    # -----------------------------------------------------------
+    negativo = stock < 0
+    con_quiebre = np.flatnonzero(negativo.any(axis=1))
+    primer_mes = negativo.argmax(axis=1)
+    deficit = -stock.min(axis=1, initial=0.0)
+
+    quiebres = sorted(
+        (
+            {
+                "especie_id": especies[i][0],
+                "especie": especies[i][1],
+                "mes": _fecha_mes(inicio + int(primer_mes[i])),
+                "deficit_kg": round(float(deficit[i]), 2),
+            }
+            for i in con_quiebre
+        ),
+        key=lambda q: (q["mes"], q["especie"]),
+    )
+
+    return {
+        "meses": [_fecha_mes(inicio + k) for k in range(meses)],
+        "especies": especies,
+        "stock": stock,
+        "quiebres": quiebres,
+    }
+
+
+# ===============================================================
+# evaluar_entrega()
+#
+# Calcula el plan como si además existiera una entrega de "kg" de
+# la especie en el mes indicado (todavía no guardada).
+#
+# Retorna el quiebre de esa especie (dict de calcular_plan) o None
+# si con la entrega nueva igual se cubren todos los compromisos.
+# ===============================================================
+def evaluar_entrega(especie_id: int, mes: date, kg) -> dict | None:
+    plan = calcular_plan(extra=[(especie_id, mes.year, mes.month, float(kg))])
+
+    for quiebre in plan["quiebres"]:
+        if quiebre["especie_id"] == especie_id:
+            return quiebre
+    return None
@@ -1,3 +1,231 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from EspecieApp.models import Especie
+from StockApp.models import Maxisaco
+from UsuariosApp.models import UsuariosModels
+
+from .consultas import obtener_pagina
+from .models import Contrato, EntregaContrato
+from .planificador import calcular_plan, evaluar_entrega
+
+
+# ===============================================================
+# ListadoContratosTests
+#
+# El listado trae el avance de entregas de cada contrato en la
+# misma consulta de la página (ContratoApp/consultas.py).
+# ===============================================================
+@override_settings(AUDITORIA_ASINCRONA=False)
+class ListadoContratosTests(TestCase):
+
+    HOY = date(2026, 6, 15)
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = UsuariosModels.objects.get(Username="Admin")
+        especie = Especie.objects.create(nombre="Luga Roja", proporcion_conversion=0.2)
+
+        def contrato(cliente, estado, fecha_fin):
+            return Contrato.objects.create(
+                cliente=cliente, tonelaje_total=300, fecha_inicio=date(2026, 1, 1),
+                fecha_fin=fecha_fin, estado=estado, creado_por=admin, actualizado_por=admin,
+            )
+
+        def entrega(c, mes, requeridas, cumplidas):
+            EntregaContrato.objects.create(
+                contrato=c, mes=mes, especie=especie,
+                toneladas_requeridas=Decimal(requeridas), toneladas_cumplidas=Decimal(cumplidas),
+            )
+
+        # Atrasado: abril quedó pendiente
+        cls.atrasado = contrato("Atrasado", "activo", date(2026, 12, 31))
+        entrega(cls.atrasado, date(2026, 3, 1), "100", "100")
+        entrega(cls.atrasado, date(2026, 4, 1), "100", "40")
+        entrega(cls.atrasado, date(2026, 7, 1), "100", "0")
+
+        # Al día: lo pendiente es del mes en curso
+        cls.al_dia = contrato("Al día", "activo", date(2026, 9, 30))
+        entrega(cls.al_dia, date(2026, 5, 1), "50", "50")
+        entrega(cls.al_dia, date(2026, 6, 1), "50", "0")
+
+        cls.sin_entregas = contrato("Sin entregas", "cancelado", date(2026, 3, 31))
+
+    def _por_id(self, criterios=None, tamano=10):
+        contratos, _ = obtener_pagina(criterios or {}, tamano=tamano, hoy=self.HOY)
+        return {c.id: c for c in contratos}
+
+    def test_avance_por_contrato(self):
+        contratos = self._por_id()
+
+        atrasado = contratos[self.atrasado.id]
+        self.assertAlmostEqual(atrasado.requerido, 300)
+        self.assertAlmostEqual(atrasado.cumplido, 140)
+        self.assertAlmostEqual(atrasado.porcentaje, 140 * 100 / 300)
+        self.assertEqual(atrasado.proximo_mes, date(2026, 4, 1))
+        self.assertTrue(atrasado.atrasado)
+
+        al_dia = contratos[self.al_dia.id]
+        self.assertAlmostEqual(al_dia.porcentaje, 50)
+        self.assertEqual(al_dia.proximo_mes, date(2026, 6, 1))
+        self.assertFalse(al_dia.atrasado)
+
+        vacio = contratos[self.sin_entregas.id]
+        self.assertEqual(vacio.requerido, 0)
+        self.assertIsNone(vacio.porcentaje)
+        self.assertIsNone(vacio.proximo_mes)
+        self.assertFalse(vacio.atrasado)
+
+    def test_filtros_y_paginacion(self):
+        self.assertEqual(set(self._por_id({"estado": "activo"})), {self.atrasado.id, self.al_dia.id})
+        self.assertEqual(
+            set(self._por_id({"vence_desde": date(2026, 4, 1), "vence_hasta": date(2026, 10, 1)})),
+            {self.al_dia.id},
+        )
+
+        primera, cursor = obtener_pagina({}, tamano=2, hoy=self.HOY)
+        segunda, fin = obtener_pagina({}, cursor=cursor, tamano=2, hoy=self.HOY)
+        self.assertEqual([c.id for c in primera], [self.sin_entregas.id, self.al_dia.id])
+        self.assertEqual([c.id for c in segunda], [self.atrasado.id])
+        self.assertIsNone(fin)
+
+    def test_vista_una_consulta_de_contratos(self):
+        self.client.post("/", {"UsernameField": "Admin", "PasswordField": "Admin123"})
+        tabla = connection.ops.quote_name(Contrato._meta.db_table)
+
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get("/dashboard/contratos/", {"estado": "activo"})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "46.7%")
+        self.assertNotContains(respuesta, "Sin entregas")
+        consultas = [q["sql"] for q in ctx.captured_queries if tabla in q["sql"]]
+        self.assertEqual(len(consultas), 1)
+
+
+# ===============================================================
+# PlanificadorTests
+#
+# calcular_plan() / evaluar_entrega() (ContratoApp/planificador.py)
+# sobre un caso chico calculado a mano, y la vista de entregas
+# cuando el plan no se puede calcular.
+#
+#   stock actual         100  (150 entradas − 50 salidas)
+#   proyección mensual    20  (ene, feb, mar)
+#   entregas pendientes   50, 50, 60
+#   stock al cierre       70, 40, 0   → calza justo
+# ===============================================================
+@override_settings(AUDITORIA_ASINCRONA=False)
+class PlanificadorTests(TestCase):
+
+    DESDE = date(2026, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = UsuariosModels.objects.get(Username="Admin")
+        cls.luga = Especie.objects.create(nombre="Luga Roja", proporcion_conversion=0.2)
+        cls.chasca = Especie.objects.create(nombre="Chasca", proporcion_conversion=0.2)
+
+        for tipo, kg in (("entrada", 150), ("salida", 50)):
+            Maxisaco.objects.create(
+                especie=cls.luga, peso_kg=kg, tipo_movimiento=tipo, registrado_por=admin
+            )
+
+        def contrato(estado):
+            return Contrato.objects.create(
+                cliente=estado, tonelaje_total=300, fecha_inicio=date(2026, 1, 1),
+                fecha_fin=date(2026, 12, 31), estado=estado, creado_por=admin, actualizado_por=admin,
+            )
+
+        cls.activo = contrato("activo")
+        for mes, requeridas, cumplidas in ((1, "60", "10"), (2, "50", "0"), (3, "60", "0")):
+            EntregaContrato.objects.create(
+                contrato=cls.activo, mes=date(2026, mes, 1), especie=cls.luga,
+                toneladas_requeridas=Decimal(requeridas), toneladas_cumplidas=Decimal(cumplidas),
+            )
+
+        # Los contratos no activos no comprometen stock
+        EntregaContrato.objects.create(
+            contrato=contrato("cancelado"), mes=date(2026, 2, 1), especie=cls.luga,
+            toneladas_requeridas=Decimal("500"), toneladas_cumplidas=Decimal("0"),
+        )
+
+    def setUp(self):
+        resumen = {"especies": {"Luga Roja": {1: 20.0, 2: 20.0, 3: 20.0}}}
+        parche = mock.patch(
+            "ContratoApp.planificador.obtener_resumen_anual",
+            side_effect=lambda anio: resumen if anio == 2026 else None,
+        )
+        self.resumen_anual = parche.start()
+        self.addCleanup(parche.stop)
+
+    def _plan(self, **kwargs):
+        return calcular_plan(desde=self.DESDE, meses=3, **kwargs)
+
+    def test_calza_justo(self):
+        plan = self._plan()
+
+        self.assertEqual(plan["meses"], [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)])
+        self.assertEqual(plan["especies"], [(self.chasca.id, "Chasca"), (self.luga.id, "Luga Roja")])
+        np.testing.assert_allclose(plan["stock"], [[0, 0, 0], [70, 40, 0]])
+        self.assertEqual(plan["quiebres"], [])
+
+    def test_mes_con_deficit(self):
+        plan = self._plan(extra=[(self.luga.id, 2026, 2, 50.0)])
+
+        np.testing.assert_allclose(plan["stock"][1], [70, -10, -50])
+        self.assertEqual(plan["quiebres"], [{
+            "especie_id": self.luga.id, "especie": "Luga Roja",
+            "mes": date(2026, 2, 1), "deficit_kg": 50.0,
+        }])
+
+    def test_evaluar_entrega(self):
+        with mock.patch("ContratoApp.planificador.date") as fecha:
+            fecha.today.return_value = self.DESDE
+            fecha.side_effect = date
+
+            self.assertIsNone(evaluar_entrega(self.chasca.id, date(2026, 3, 1), 0))
+            quiebre = evaluar_entrega(self.luga.id, date(2026, 3, 1), 1)
+
+        self.assertEqual((quiebre["mes"], quiebre["deficit_kg"]), (date(2026, 3, 1), 1.0))
+
+    def test_sin_proyecciones(self):
+        for falla in (None, RuntimeError("almacén caído")):
+            with self.subTest(falla=falla):
+                if falla:
+                    self.resumen_anual.side_effect = falla
+                else:
+                    self.resumen_anual.side_effect = None
+                    self.resumen_anual.return_value = None
+
+                plan = self._plan()
+                np.testing.assert_allclose(plan["stock"][1], [50, 0, -60])
+                self.assertEqual(
+                    [(q["mes"], q["deficit_kg"]) for q in plan["quiebres"]],
+                    [(date(2026, 3, 1), 60.0)],
+                )
+
+    def test_vista_de_entregas_sin_plan(self):
+        self.client.post("/", {"UsernameField": "Admin", "PasswordField": "Admin123"})
+        url = f"/dashboard/contratos/{self.activo.id}/entrega/crear/"
+
+        with mock.patch("ContratoApp.views.calcular_plan", side_effect=RuntimeError("caído")), \
+                mock.patch("ContratoApp.views.evaluar_entrega", side_effect=RuntimeError("caído")):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+            respuesta = self.client.post(url, {
+                "especie": self.luga.id, "mes": "2026-04-01",
+                "toneladas_requeridas": "10", "toneladas_cumplidas": "0",
+            })
+
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertTrue(
+            EntregaContrato.objects.filter(contrato=self.activo, mes=date(2026, 4, 1)).exists()
+        )
@@ -1,6 +1,7 @@
 from django.shortcuts import render
 
 # Utilidades Django
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 
@@ -8,35 +9,20 @@ from django.contrib import messages
 from .models import Contrato, EntregaContrato
 
 # Formularios asociados
-from .forms import ContratoForm, EntregaContratoForm
+from .forms import ContratoForm, EntregaContratoForm, FiltroContratoForm
+
+# Listado con avance de entregas (una consulta, paginado por cursor)
+from .consultas import obtener_pagina
+
+# Planificador de factibilidad (stock + proyecciones − entregas)
+from .planificador import calcular_plan, evaluar_entrega
 
 # Auditoría y permisos
 from AuditoriaApp.decorators import auditar
 from RolApp.decorators import requiere_permiso
 
 # Usuarios para trazabilidad
-from UsuariosApp.models import UsuariosModels
-
-
-# ===============================================================
-# FUNCIÓN AUXILIAR:
-#   Recupera el usuario actualmente logueado desde la sesión.
-#
-# Se utiliza para:
-#   - Registrar quién crea contratos
-#   - Registrar quién los edita
-#   - Llenar campos de auditoría (creado_por / actualizado_por)
-# ===============================================================
-def get_user_from_session(request):
-    username = request.session.get("Usuario_Ingresado")
-
-    if not username:
-        return None
-
-    try:
-        return UsuariosModels.objects.get(Username=username)
-    except UsuariosModels.DoesNotExist:
-        return None
+from UsuariosApp.middleware import get_user_from_session
 
 
 # ===============================================================
@@ -46,13 +32,40 @@ def get_user_from_session(request):
 #   @requiere_permiso("PermisoCrearContratos")
 #
 # Función:
-#   - Lista todos los contratos en orden descendente por ID
-#   - Renderiza la vista HTML correspondiente
+#   - Lista los contratos en orden descendente por ID, paginados
+#     por cursor (CONTRATOS_PAGINA por página)
+#   - Filtros opcionales por estado y fecha de término
+#   - Cada fila trae su avance de entregas (toneladas requeridas /
+#     cumplidas, porcentaje, próximo mes pendiente y atraso),
+#     calculado en la misma consulta (ContratoApp/consultas.py)
 # ===============================================================
 @requiere_permiso("PermisoCrearContratos")
 def contratos_list(request):
-    contratos = Contrato.objects.all().order_by("-id")
-    return render(request, "contratos/lista.html", {"contratos": contratos})
+    form = FiltroContratoForm(request.GET or None)
+
+    criterios = form.criterios() if form.is_valid() else {}
+    cursor = request.GET.get("cursor")
+    tamano = getattr(settings, "CONTRATOS_PAGINA", 25)
+
+    contratos, siguiente = obtener_pagina(criterios, cursor=cursor, tamano=tamano)
+
+    # Querystrings conservando los filtros
+    parametros = request.GET.copy()
+    parametros.pop("cursor", None)
+    filtros_query = parametros.urlencode()
+
+    siguiente_query = None
+    if siguiente:
+        parametros["cursor"] = siguiente
+        siguiente_query = parametros.urlencode()
+
+    return render(request, "contratos/lista.html", {
+        "contratos": contratos,
+        "form": form,
+        "siguiente_query": siguiente_query,
+        "filtros_query": filtros_query,
+        "es_primera": not cursor,
+    })
 
 
 # ===============================================================
@@ -190,8 +203,11 @@ def contrato_detalle(request, id):
 #   @auditar("crear", "Entrega Contrato", mensaje dinámico)
 #
 # Flujo:
-#   - GET → formulario vacío
+#   - GET → formulario vacío + quiebres de stock proyectados
+#     (ver planificador.py)
 #   - POST → validar formulario → asociar entrega al contrato
+#   - Si la entrega provoca un quiebre proyectado → aviso
+#     (si el plan falla, la entrega se guarda sin aviso)
 #   - Registrar auditoría
 #   - Redirigir al detalle del contrato
 # ===============================================================
@@ -208,9 +224,27 @@ def entrega_crear(request, contrato_id):
         if form.is_valid():
             entrega = form.save(commit=False)
             entrega.contrato = contrato
+
+            # Quiebre proyectado que provocaría la entrega (se evalúa
+            # antes de guardarla, como compromiso adicional)
+            quiebre = None
+            pendiente = entrega.toneladas_requeridas - entrega.toneladas_cumplidas
+            if contrato.estado == "activo" and pendiente > 0:
+                try:
+                    quiebre = evaluar_entrega(entrega.especie_id, entrega.mes, pendiente)
+                except Exception as e:
+                    print(f"[WARN] No se pudo evaluar la entrega en el plan de contratos: {e}")
+
             entrega.save()
 
             messages.success(request, "Entrega agregada.")
+            if quiebre:
+                messages.warning(
+                    request,
+                    f"Con esta entrega el stock proyectado de {quiebre['especie']} "
+                    f"no alcanza desde {quiebre['mes']:%m/%Y} "
+                    f"(déficit máximo {quiebre['deficit_kg']:,.2f} KG)."
+                )
             return redirect("contrato_detalle", id=contrato_id)
 
     else:
@@ -218,10 +252,25 @@ def entrega_crear(request, contrato_id):
 
     return render(request, "contratos/crear_entrega.html", {
         "form": form,
-        "contrato": contrato
+        "contrato": contrato,
+        "quiebres": _quiebres_proyectados(),
     })
 
 
+# ---------------------------------------------------------------
+# _quiebres_proyectados():
+# Quiebres del planificador para el formulario de entregas. Si el
+# plan no se puede calcular (p. ej. el almacén de proyecciones no
+# responde) el formulario se muestra igual, sin avisos.
+# ---------------------------------------------------------------
+def _quiebres_proyectados():
+    try:
+        return calcular_plan()["quiebres"]
+    except Exception as e:
+        print(f"[WARN] No se pudo calcular el plan de contratos: {e}")
+        return []
+
+
 # ===============================================================
 # EDITAR ENTREGA DE CONTRATO
 #
@@ -35,7 +35,8 @@ from django.shortcuts import render
 from ContratoApp.models import Contrato, EntregaContrato
 from StockApp.models import Maxisaco
 from EspecieApp.models import Especie
-from ProyeccionesApp.services import obtener_proyecciones_por_mes
+from ProyeccionesApp.services import obtener_resumen_anual
+from ContratoApp.planificador import calcular_plan
 
 
 # ===============================================================
@@ -188,6 +189,7 @@ def _get_ingresos_proyectados():
 #   * Contractual: toneladas requeridas (MySQL)
 #   * Real: toneladas cumplidas (MySQL)
 #   * Proyectado: derivado desde Mongo (microservicio FastAPI)
+#   * Banda P10–P90 del proyectado (si la corrida trae intervalos)
 #
 # Devuelve un diccionario listo para Chart.js:
 #   {
@@ -195,6 +197,8 @@ def _get_ingresos_proyectados():
 #     contractual: [...],
 #     real: [...],
 #     proyectado: [...],
+#     proyectado_p10: [...],   # None en meses sin banda
+#     proyectado_p90: [...],
 #   }
 # ===============================================================
 def _get_proyeccion_vs_contractual():
@@ -218,11 +222,15 @@ def _get_proyeccion_vs_contractual():
                 "real": float(row["real"] or 0),
             }
 
-    # Obtener proyecciones desde Mongo
+    # Obtener proyecciones (resumen precalculado) del almacén (Mongo o SQL)
     try:
-        mongo_proy = obtener_proyecciones_por_mes()
+        resumen = obtener_resumen_anual() or {"meses": {}, "bandas": {}}
     except:
-        mongo_proy = {}
+        resumen = {"meses": {}, "bandas": {}}
+
+    mongo_proy = resumen["meses"]
+    p10 = resumen["bandas"].get("p10", {})
+    p90 = resumen["bandas"].get("p90", {})
 
     labels, contractual, real, proyectado = [], [], [], []
 
@@ -238,6 +246,8 @@ def _get_proyeccion_vs_contractual():
         "contractual": contractual,
         "real": real,
         "proyectado": proyectado,
+        "proyectado_p10": [p10.get(mes) for mes in range(1, 13)],
+        "proyectado_p90": [p90.get(mes) for mes in range(1, 13)],
     }
 
 
@@ -305,6 +315,33 @@ def _get_alertas_tempranas(cumplimiento, insumos_bajos, inventario_total):
     return alertas
 
 
+# ===============================================================
+# ALERTAS DEL PLANIFICADOR DE CONTRATOS
+#
+# Una alerta por especie cuyo stock proyectado (stock actual +
+# producción proyectada − entregas pendientes) queda negativo en
+# algún mes del horizonte (ver ContratoApp/planificador.py).
+# ===============================================================
+def _get_alertas_planificador():
+    try:
+        quiebres = calcular_plan()["quiebres"]
+    except Exception as e:
+        print(f"[WARN] No se pudo calcular el plan de contratos: {e}")
+        return []
+
+    return [
+        {
+            "nivel": "alto",
+            "titulo": f"Quiebre de stock proyectado: {q['especie']}",
+            "detalle": (
+                f"Desde {q['mes']:%m/%Y} no alcanza para las entregas comprometidas "
+                f"(déficit máximo {q['deficit_kg']:,.2f} kg)."
+            ),
+        }
+        for q in quiebres
+    ]
+
+
 # ===============================================================
 # VISTA PRINCIPAL — DASHBOARD EJECUTIVO
 #
@@ -350,6 +387,7 @@ def dashboard_ejecutivo(request):
         insumos_bajos=[],
         inventario_total=inventario_total,
     )
+    alertas += _get_alertas_planificador()
 
     contexto = {
         "usuario": request.user,
@@ -23,35 +23,13 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from UsuariosApp.models import UsuariosModels
+from UsuariosApp.middleware import get_user_from_session
 from .models import Insumo
 from .forms import InsumoForm
 from AuditoriaApp.decorators import auditar
 from RolApp.decorators import requiere_permiso
 
 
-# ===============================================================
-# FUNCIÓN AUXILIAR: obtener el usuario desde la sesión
-#
-# Retorna:
-#   - objeto UsuariosModels si existe
-#   - None si no hay sesión o no coincide usuario
-#
-# Se usa para completar los campos:
-#   - creado_por
-#   - actualizado_por
-# ===============================================================
-def get_user_from_session(request):
-    username = request.session.get("Usuario_Ingresado")
-    if not username:
-        return None
-
-    try:
-        return UsuariosModels.objects.get(Username=username)
-    except UsuariosModels.DoesNotExist:
-        return None
-
-
 # ===============================================================
 # LISTAR INSUMOS
 #
@@ -0,0 +1,122 @@
+# ===============================================================
+# manage.py benchmark_login
+#
+# Mide la latencia del login (vista RenderLoginForm completa, con
+# el cliente de pruebas de Django) para tres caminos:
+#
+#   exito               → usuario y contraseña correctos
+#   clave_incorrecta    → usuario existente, contraseña errónea
+#                         (paga el hash igual que el éxito)
+#   usuario_inexistente → sin hash
+#
+# "consultas" cuenta todas las sentencias SQL del request; en el
+# camino de éxito incluye la escritura de auditoría, que aquí es
+# síncrona (en producción la hace el hilo escritor).
+#
+# Crea un usuario temporal dentro de una transacción que se revierte
+# al terminar (no deja datos), y desactiva el límite de intentos
+# (throttling.py) mientras mide.
+#
+#   python manage.py benchmark_login
+#   python manage.py benchmark_login --repeticiones 50
+# ===============================================================
+
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from LoginApp import throttling
+from RolApp.models import RolModels
+from UsuariosApp.models import UsuariosModels
+
+
+USERNAME = "benchmark_login"
+PASSWORD = "Benchmark123"
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia del login en los caminos de éxito y de error."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeticiones = options["repeticiones"]
+
+        sin_limite = override_settings(
+            LOGIN_LIMITE_USUARIO=(10 ** 9, 1),
+            LOGIN_LIMITE_IP=(10 ** 9, 1),
+            AUDITORIA_ASINCRONA=False,
+            ALLOWED_HOSTS=["testserver"],
+        )
+
+        try:
+            with sin_limite, transaction.atomic():
+                throttling._limitador = None
+                self._crear_usuario()
+
+                casos = [
+                    ("exito", USERNAME, PASSWORD, 302),
+                    ("clave_incorrecta", USERNAME, "Incorrecta123", 200),
+                    ("usuario_inexistente", "no_existe_benchmark", PASSWORD, 200),
+                ]
+                for nombre, username, password, estado in casos:
+                    self._medir(nombre, username, password, estado, repeticiones)
+
+                raise _Revertir
+        except _Revertir:
+            pass
+        finally:
+            throttling._limitador = None
+
+    def _crear_usuario(self):
+        # Rut y Email son únicos: valores aleatorios para no chocar
+        unico = uuid.uuid4().hex[:10]
+        UsuariosModels.objects.create(
+            Username=USERNAME,
+            Password=make_password(PASSWORD),
+            Email=f"{unico}@benchmark.local",
+            Nombre="Benchmark",
+            Apellido="Login",
+            Rut=unico,
+            Telefono="000000000",
+            EstadoUsuario=True,
+            Rol=RolModels.objects.get(NombreRol="RolAdmin"),
+        )
+
+    def _medir(self, nombre, username, password, estado, repeticiones):
+        datos = {"UsernameField": username, "PasswordField": password}
+
+        # Calentamiento (plantillas, conexión)
+        Client().post("/", datos)
+
+        tiempos = []
+        consultas = 0
+        for _ in range(repeticiones):
+            cliente = Client()
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = time.perf_counter()
+                respuesta = cliente.post("/", datos)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = len(ctx.captured_queries)
+
+            if respuesta.status_code != estado:
+                self.stderr.write(f"{nombre}: respuesta {respuesta.status_code}, se esperaba {estado}")
+                return
+
+        tiempos.sort()
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f"{nombre:<20} mediana {statistics.median(tiempos):8.2f} ms   "
+            f"p95 {p95:8.2f} ms   consultas {consultas}"
+        )
@@ -1,3 +1,111 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from LoginApp import throttling
+from UsuariosApp.models import UsuariosModels
+
+
+# ===============================================================
+# LimiteLoginTests
+#
+# Límite de intentos de login (LoginApp/throttling.py): al agotar
+# la cubeta del usuario o de la IP se responde 429 sin calcular el
+# hash de la contraseña.
+# ===============================================================
+@override_settings(
+    LOGIN_LIMITE_USUARIO=(3, 60),
+    LOGIN_LIMITE_IP=(5, 60),
+    LOGIN_BLOQUEO_BASE=30,
+    LOGIN_LIMITADOR="memoria",
+    AUDITORIA_ASINCRONA=False,
+)
+class LimiteLoginTests(TestCase):
+
+    def setUp(self):
+        throttling._limitador = None
+
+    def tearDown(self):
+        throttling._limitador = None
+
+    def _login(self, username, password="incorrecta", ip="10.0.0.1"):
+        return self.client.post(
+            "/", {"UsernameField": username, "PasswordField": password}, REMOTE_ADDR=ip
+        )
+
+    def test_bloqueo_por_usuario_sin_hash(self):
+        for _ in range(3):
+            self.assertEqual(self._login("Admin").status_code, 200)
+
+        with mock.patch("LoginApp.views.check_password") as check:
+            respuesta = self._login("Admin", ip="10.0.0.2")
+
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertEqual(respuesta["Retry-After"], "31")
+        check.assert_not_called()
+
+    def test_bloqueo_por_ip(self):
+        for i in range(5):
+            self._login(f"usuario{i}")
+
+        self.assertEqual(self._login("gerente").status_code, 429)
+        self.assertEqual(self._login("gerente", ip="10.0.0.9").status_code, 200)
+
+    def test_bloqueo_con_espera_creciente(self):
+        regla = throttling._Regla(capacidad=1, por_segundo=1 / 60)
+
+        estado, espera = throttling._consumir(None, regla, ahora=0)
+        self.assertEqual(espera, 0)
+
+        estado, espera = throttling._consumir(estado, regla, ahora=1)
+        self.assertEqual(espera, 30)
+
+        # Vence el bloqueo con media ficha: el siguiente dura el doble
+        estado, espera = throttling._consumir(estado, regla, ahora=31)
+        self.assertEqual(espera, 60)
+
+        # Con la cubeta llena se olvidan los bloqueos
+        estado, espera = throttling._consumir(estado, regla, ahora=200)
+        self.assertEqual((espera, estado.bloqueos), (0, 0))
+
+    def test_login_exitoso_reinicia_el_usuario(self):
+        for _ in range(2):
+            self._login("Admin")
+
+        self.assertEqual(self._login("Admin", "Admin123").status_code, 302)
+        for _ in range(3):
+            self.assertEqual(self._login("Admin").status_code, 200)
+
+
+# ===============================================================
+# FlujoLoginTests
+#
+# El login resuelve usuario + Rol en una consulta y re-calcula los
+# hashes guardados con un hasher distinto del configurado.
+# ===============================================================
+@override_settings(AUDITORIA_ASINCRONA=False)
+class FlujoLoginTests(TestCase):
+
+    def setUp(self):
+        throttling._limitador = None
+
+    def test_una_consulta_por_intento(self):
+        with self.assertNumQueries(1):
+            respuesta = self.client.post("/", {"UsernameField": "Admin", "PasswordField": "mala"})
+        self.assertEqual(respuesta.status_code, 200)
+
+        with self.assertNumQueries(1):
+            self.client.post("/", {"UsernameField": "nadie", "PasswordField": "mala"})
+
+    def test_rehash_con_hasher_desactualizado(self):
+        UsuariosModels.objects.filter(Username="Admin").update(
+            Password=make_password("Admin123", hasher="pbkdf2_sha1")
+        )
+
+        respuesta = self.client.post("/", {"UsernameField": "Admin", "PasswordField": "Admin123"})
+
+        self.assertEqual(respuesta.status_code, 302)
+        password = UsuariosModels.objects.get(Username="Admin").Password
+        self.assertTrue(password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(check_password("Admin123", password))
@@ -0,0 +1,249 @@
+# ===============================================================
+# LoginApp/throttling.py
+#
+# Límite de intentos de login (token bucket) por usuario y por IP.
+#
+# check_password() usa PBKDF2, caro a propósito: una ráfaga de
+# intentos con usuarios existentes puede ocupar la CPU compartida.
+# Cada intento consume una ficha de dos cubetas ANTES de consultar
+# usuarios o calcular hashes:
+#
+#   usuario → LOGIN_LIMITE_USUARIO = (intentos, segundos)
+#   ip      → LOGIN_LIMITE_IP      = (intentos, segundos)
+#
+# Una cubeta tiene "intentos" fichas y se rellena a razón de
+# intentos / segundos fichas por segundo. Si una cubeta está vacía
+# el intento se rechaza (HTTP 429) y la clave queda bloqueada
+# LOGIN_BLOQUEO_BASE segundos, el doble en cada bloqueo siguiente
+# (hasta LOGIN_BLOQUEO_MAX). Los bloqueos se olvidan cuando la
+# cubeta vuelve a llenarse.
+#
+# Un login exitoso vacía el historial del usuario y devuelve la
+# ficha de la IP (varias personas pueden salir por la misma IP).
+#
+# Implementaciones (settings.LOGIN_LIMITADOR):
+#   "memoria" → dict en proceso sin locks: cada cubeta es una tupla
+#               inmutable que se reemplaza con una sola asignación
+#               (atómica con el GIL). Una carrera a lo sumo deja
+#               pasar un intento extra.
+#   "cache"   → caché de Django (settings.CACHES): compartido entre
+#               procesos si el backend lo es (Redis, Memcached o
+#               DatabaseCache).
+# ===============================================================
+
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# ---------------------------------------------------------------
+# Estado de una cubeta
+# ---------------------------------------------------------------
+class _Cubeta(NamedTuple):
+    fichas: float
+    instante: float
+    bloqueado_hasta: float
+    bloqueos: int
+
+
+class _Regla(NamedTuple):
+    capacidad: float
+    por_segundo: float
+
+
+# ---------------------------------------------------------------
+# _consumir():
+# Función pura: estado nuevo de la cubeta y segundos de espera
+# (0 = intento permitido).
+# ---------------------------------------------------------------
+def _consumir(estado, regla, ahora):
+    if estado is None:
+        estado = _Cubeta(regla.capacidad, ahora, 0.0, 0)
+
+    if ahora < estado.bloqueado_hasta:
+        return estado, estado.bloqueado_hasta - ahora
+
+    fichas = min(regla.capacidad, estado.fichas + (ahora - estado.instante) * regla.por_segundo)
+    bloqueos = estado.bloqueos if fichas < regla.capacidad else 0
+
+    if fichas >= 1:
+        return _Cubeta(fichas - 1, ahora, 0.0, bloqueos), 0.0
+
+    espera = min(
+        getattr(settings, "LOGIN_BLOQUEO_BASE", 30) * 2 ** bloqueos,
+        getattr(settings, "LOGIN_BLOQUEO_MAX", 900),
+    )
+    return _Cubeta(fichas, ahora, ahora + espera, bloqueos + 1), espera
+
+
+def _vigencia(estado, regla, ahora) -> float:
+    # Segundos hasta que la cubeta vuelva a estar llena y sin bloqueo
+    faltan = (regla.capacidad - estado.fichas) / regla.por_segundo
+    return max(estado.bloqueado_hasta - ahora, 0) + faltan
+
+
+# ===============================================================
+# CLASE BASE: Limitador
+#
+# Las subclases solo leen / escriben / borran cubetas por clave.
+# ===============================================================
+class Limitador:
+
+    def _leer(self, clave):
+        raise NotImplementedError
+
+    def _escribir(self, clave, estado, vigencia):
+        raise NotImplementedError
+
+    def _borrar(self, clave):
+        raise NotImplementedError
+
+    # -----------------------------------------------------------
+    # intentar():
+    # reglas = [(clave, _Regla), ...]. Si todas las cubetas tienen
+    # ficha, consume una de cada una y retorna 0; si no, no consume
+    # nada y retorna los segundos de espera más largos.
+    # -----------------------------------------------------------
+    def intentar(self, reglas) -> float:
+        ahora = time.time()
+
+        resultados = []
+        for clave, regla in reglas:
+            anterior = self._leer(clave)
+            estado, espera = _consumir(anterior, regla, ahora)
+            resultados.append((clave, regla, anterior, estado, espera))
+
+        espera = max(r[4] for r in resultados)
+        for clave, regla, anterior, estado, espera_clave in resultados:
+            # Rechazado: solo se guardan los bloqueos nuevos
+            if espera and (not espera_clave or estado == anterior):
+                continue
+            self._escribir(clave, estado, _vigencia(estado, regla, ahora))
+
+        return espera
+
+    # -----------------------------------------------------------
+    # devolver(): suma una ficha a la cubeta (sin pasar la capacidad)
+    # -----------------------------------------------------------
+    def devolver(self, clave, regla):
+        estado = self._leer(clave)
+        if estado is None:
+            return
+        ahora = time.time()
+        estado = estado._replace(fichas=min(regla.capacidad, estado.fichas + 1))
+        self._escribir(clave, estado, _vigencia(estado, regla, ahora))
+
+    def reiniciar(self, clave):
+        self._borrar(clave)
+
+
+# ===============================================================
+# LimitadorMemoria: dict en proceso, sin locks
+#
+# Al pasar LOGIN_LIMITADOR_MAX_CLAVES se descartan las cubetas ya
+# llenas y sin bloqueo (equivalen a no tener entrada).
+# ===============================================================
+class LimitadorMemoria(Limitador):
+
+    def __init__(self):
+        self._cubetas = {}
+
+    def _leer(self, clave):
+        entrada = self._cubetas.get(clave)
+        return entrada[0] if entrada else None
+
+    def _escribir(self, clave, estado, vigencia):
+        self._cubetas[clave] = (estado, time.time() + vigencia)
+        if len(self._cubetas) > getattr(settings, "LOGIN_LIMITADOR_MAX_CLAVES", 10000):
+            self._purgar()
+
+    def _borrar(self, clave):
+        self._cubetas.pop(clave, None)
+
+    def _purgar(self):
+        ahora = time.time()
+        for clave, (_, vence) in list(self._cubetas.items()):
+            if vence <= ahora:
+                self._cubetas.pop(clave, None)
+
+
+# ===============================================================
+# LimitadorCache: caché de Django, con expiración por clave
+# ===============================================================
+class LimitadorCache(Limitador):
+
+    PREFIJO = "login_limite:"
+
+    def _leer(self, clave):
+        valor = cache.get(self.PREFIJO + clave)
+        return _Cubeta(*valor) if valor else None
+
+    def _escribir(self, clave, estado, vigencia):
+        cache.set(self.PREFIJO + clave, tuple(estado), timeout=max(int(vigencia) + 1, 1))
+
+    def _borrar(self, clave):
+        cache.delete(self.PREFIJO + clave)
+
+
+LIMITADORES = {
+    "memoria": LimitadorMemoria,
+    "cache": LimitadorCache,
+}
+
+_limitador = None
+
+
+def obtener_limitador() -> Limitador:
+    global _limitador
+    tipo = LIMITADORES[getattr(settings, "LOGIN_LIMITADOR", "memoria")]
+    if not isinstance(_limitador, tipo):
+        _limitador = tipo()
+    return _limitador
+
+
+# ---------------------------------------------------------------
+# Claves y reglas de un intento
+# ---------------------------------------------------------------
+def _regla(nombre, defecto) -> _Regla:
+    intentos, segundos = getattr(settings, nombre, defecto)
+    return _Regla(float(intentos), intentos / segundos)
+
+
+def _ip_cliente(request) -> str:
+    # Detrás del proxy de fly.io la IP real viene en una cabecera
+    cabecera = getattr(settings, "LOGIN_IP_CABECERA", "REMOTE_ADDR")
+    return request.META.get(cabecera) or request.META.get("REMOTE_ADDR", "")
+
+
+def _reglas(request, username):
+    return [
+        ("u:" + username.strip().lower(), _regla("LOGIN_LIMITE_USUARIO", (5, 60))),
+        ("ip:" + _ip_cliente(request), _regla("LOGIN_LIMITE_IP", (20, 60))),
+    ]
+
+
+# ===============================================================
+# verificar_intento()
+#
+# Se llama al inicio del POST de login, antes de cualquier consulta
+# o hash. Retorna 0 si el intento puede seguir, o los segundos que
+# debe esperar el cliente (para Retry-After).
+# ===============================================================
+def verificar_intento(request, username) -> float:
+    return obtener_limitador().intentar(_reglas(request, username))
+
+
+# ===============================================================
+# registrar_exito()
+#
+# Login correcto: olvida el historial del usuario y devuelve la
+# ficha consumida en la IP.
+# ===============================================================
+def registrar_exito(request, username):
+    limitador = obtener_limitador()
+    (clave_usuario, _), (clave_ip, regla_ip) = _reglas(request, username)
+
+    limitador.reiniciar(clave_usuario)
+    limitador.devolver(clave_ip, regla_ip)
@@ -1,9 +1,11 @@
 from django.shortcuts import render, redirect
 from . import forms
 from UsuariosApp.models import UsuariosModels
+from UsuariosApp.middleware import recordar_usuario
 from django.contrib import messages
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import check_password, make_password
 from AuditoriaApp.decorators import auditar
+from .throttling import registrar_exito, verificar_intento
 
 
 # ================================================================
@@ -18,9 +20,12 @@ from AuditoriaApp.decorators import auditar
 #
 # Flujo de la vista:
 #   1. Carga el formulario.
-#   2. Si el método es POST → validar credenciales.
-#   3. Si usuario no existe → error.
-#   4. Si contraseña incorrecta → error.
+#   2. Si el método es POST → límite de intentos por usuario / IP
+#      (ver throttling.py): si se excede, HTTP 429 sin consultar la
+#      base de datos ni calcular hashes. Luego validar credenciales.
+#   3. Si usuario no existe → error (usuario + rol en una consulta).
+#   4. Si contraseña incorrecta → error; si es correcta pero el hash
+#      está desactualizado, se re-calcula con el hasher vigente.
 #   5. Si credenciales correctas → guardar datos en sesión.
 #   6. Redirigir según el rol del usuario.
 # ================================================================
@@ -43,36 +48,71 @@ def RenderLoginForm(request):
         UsernameField = request.POST['UsernameField']
         PasswordField = request.POST['PasswordField']
 
+        # ========================================================
+        # LÍMITE DE INTENTOS (antes de cualquier hash)
+        # ========================================================
+        espera = verificar_intento(request, UsernameField)
+        if espera:
+            messages.error(
+                request,
+                f"Demasiados intentos. Intenta nuevamente en {int(espera) + 1} segundos."
+            )
+            respuesta = render(request, 'LoginTemplate/Form.html', data, status=429)
+            respuesta["Retry-After"] = str(int(espera) + 1)
+            return respuesta
+
         # ========================================================
         # VALIDACIÓN 1: EL USUARIO EXISTE?
+        #
+        # UNA consulta: usuario + Rol (select_related), que luego
+        # usan la sesión y la redirección sin consultas extra.
         # ========================================================
-        if not UsuariosModels.objects.filter(Username=UsernameField).exists():
+        UsuarioRecuperado = (
+            UsuariosModels.objects.select_related("Rol")
+            .filter(Username=UsernameField)
+            .first()
+        )
+
+        if UsuarioRecuperado is None:
             messages.error(request, "Credenciales incorrectas.")
             return render(request, 'LoginTemplate/Form.html', data)
 
-        # Recuperar usuario
-        UsuarioRecuperado = UsuariosModels.objects.get(Username=UsernameField)
-
         # ========================================================
         # VALIDACIÓN 2: CONTRASEÑA CORRECTA?
         # check_password:
         #   → compara contraseña en texto plano con el hash guardado
+        #   → si el hash usa otro algoritmo o menos iteraciones que
+        #     el configurado (PASSWORD_HASHERS), llama a
+        #     actualizar_hash() para guardarlo de nuevo con el actual
         # ========================================================
-        if not check_password(PasswordField, UsuarioRecuperado.Password):
+        def actualizar_hash(password):
+            UsuarioRecuperado.Password = make_password(password)
+            UsuarioRecuperado.save(update_fields=["Password"])
+
+        if not check_password(PasswordField, UsuarioRecuperado.Password, setter=actualizar_hash):
             messages.error(request, "Credenciales incorrectas.")
             return render(request, 'LoginTemplate/Form.html', data)
 
+        rol = UsuarioRecuperado.Rol
+
+        if rol is None:
+            messages.error(request, "Tu cuenta no tiene un rol asignado.")
+            return render(request, 'LoginTemplate/Form.html', data)
+
         # ========================================================
         # LOGIN EXITOSO:
         #   - Guardar usuario en la sesión
         #   - Guardar información del rol
         #   - Usado por decoradores como @requiere_permiso
         # ========================================================
+        registrar_exito(request, UsernameField)
+
         request.session['Usuario_Ingresado'] = UsuarioRecuperado.Username
-        request.session['Usuario_RolId'] = UsuarioRecuperado.Rol.RolId
-        request.session['Usuario_RolNombre'] = UsuarioRecuperado.Rol.NombreRol
+        request.session['Usuario_RolId'] = rol.RolId
+        request.session['Usuario_RolNombre'] = rol.NombreRol
 
-        rol = UsuarioRecuperado.Rol
+        # La auditoría del login reutiliza este usuario (sin consulta)
+        recordar_usuario(request, UsuarioRecuperado)
 
         # ========================================================
         # REDIRECCIÓN SEGÚN EL ROL DEL USUARIO
@@ -0,0 +1,340 @@
+# ================================================================
+# ProyeccionesApp/almacenes.py
+#
+# Almacenes de proyecciones: dónde se guardan las corridas, sus
+# proyecciones y los resúmenes anuales que lee el dashboard.
+#
+# services.py no habla directamente con ninguna base de datos: pide
+# el almacén configurado con obtener_almacen() y usa su interfaz
+# (ver AlmacenProyecciones). Implementaciones:
+#
+#   "mongo" → AlmacenMongo: colecciones de MongoDB con índices TTL
+#             (comportamiento original)
+#   "sql"   → AlmacenSQL: tablas de Django (ProyeccionesApp/models.py)
+#             en la misma base SQLite/MySQL del sistema, sin MongoDB
+#
+# Configuración:
+#   settings.PROYECCIONES_ALMACEN = "mongo" | "sql"
+#
+# Ambos almacenes siguen el mismo ciclo de corridas versionadas
+# (ver CORRIDAS VERSIONADAS en services.py): los lectores solo ven
+# la corrida vigente completa, nunca una corrida a medio escribir.
+# ================================================================
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from pymongo import ReturnDocument
+
+from ProyectoAlgas.mongo import get_mongo_connection
+from .models import CorridaProyeccion, Proyeccion, ResumenProyeccion
+
+
+# ================================================================
+# CLASE BASE: AlmacenProyecciones
+#
+# Interfaz común. Los documentos que recibe tienen la forma que
+# arma services.py:
+#
+#   corrida     → {_id, estado, iniciada_en, modelo,
+#                  meses_a_proyectar, expira_en}
+#   proyeccion  → {run_id, especie, anio, mes, proyeccion_ton,
+#                  [p10, p50, p90], expira_en}
+#   resumen     → {_id, run_id, anio, meses, bandas, especies,
+#                  expira_en}
+# ================================================================
+class AlmacenProyecciones:
+
+    # Corrida nueva en estado "en_curso"
+    def iniciar_corrida(self, corrida):
+        raise NotImplementedError
+
+    # Proyecciones de UNA especie de una corrida en curso
+    def guardar_proyecciones(self, docs):
+        raise NotImplementedError
+
+    # Resúmenes anuales de una corrida en curso
+    def guardar_resumenes(self, resumenes):
+        raise NotImplementedError
+
+    # La corrida no proyectó nada: se mantiene la vigente
+    def marcar_fallida(self, run_id):
+        raise NotImplementedError
+
+    # La corrida pasa a ser la vigente; "totales" = {especies, documentos}
+    def publicar(self, run_id, totales):
+        raise NotImplementedError
+
+    # run_id de la corrida vigente, o None
+    def corrida_vigente(self):
+        raise NotImplementedError
+
+    # {meses, bandas, especies} de la corrida vigente para un año
+    # (claves de mes como str), o None
+    def resumen_anual(self, anio):
+        raise NotImplementedError
+
+    def _expiracion_retencion(self, ahora):
+        return ahora + timedelta(
+            seconds=getattr(settings, "PROYECCIONES_RETENCION_CORRIDAS", 7 * 24 * 3600)
+        )
+
+
+# ================================================================
+# CLASE: AlmacenMongo
+#
+# Colección de proyecciones (MONGO_COLLECTION_PROYECCIONES):
+#     { run_id, especie, anio, mes, proyeccion_ton,
+#       [p10, p50, p90], [expira_en] }
+#
+# Colección de corridas (MONGO_COLLECTION_CORRIDAS):
+#     { _id: "latest", run_id, actualizado_en }    ← puntero vigente
+#     { _id: run_id, estado, iniciada_en, ... }    ← una por corrida
+#
+# Colección de resúmenes (MONGO_COLLECTION_RESUMENES):
+#     { _id: "<run_id>:<anio>", run_id, anio, meses, bandas,
+#       especies, [expira_en] }
+#
+# Lo que tiene expira_en lo elimina MongoDB con el índice TTL
+# (expireAfterSeconds=0).
+# ================================================================
+PUNTERO_VIGENTE = "latest"
+
+
+class AlmacenMongo(AlmacenProyecciones):
+
+    def __init__(self, db=None):
+        # Cliente compartido (ver ProyectoAlgas/mongo.py); no se
+        # conecta hasta la primera operación
+        db = get_mongo_connection() if db is None else db
+
+        self.proyecciones = db[getattr(settings, "MONGO_COLLECTION_PROYECCIONES", "proyecciones")]
+        self.corridas = db[getattr(settings, "MONGO_COLLECTION_CORRIDAS", "proyecciones_corridas")]
+        self.resumenes = db[getattr(settings, "MONGO_COLLECTION_RESUMENES", "proyecciones_resumen")]
+
+    # ------------------------------------------------------------
+    # _asegurar_indices():
+    # create_index es idempotente (no hace nada si el índice existe):
+    #   - (run_id, anio, mes) → lectura de una corrida por año
+    #   - expira_en (TTL)     → limpieza de corridas viejas/incompletas
+    #   - resumenes.run_id    → publicar/expirar los resúmenes de una corrida
+    # ------------------------------------------------------------
+    def _asegurar_indices(self):
+        self.proyecciones.create_index([("run_id", 1), ("anio", 1), ("mes", 1)])
+        for c in (self.proyecciones, self.corridas, self.resumenes):
+            c.create_index("expira_en", expireAfterSeconds=0)
+        self.resumenes.create_index("run_id")
+
+    def iniciar_corrida(self, corrida):
+        self._asegurar_indices()
+        self.corridas.insert_one(corrida)
+
+    def guardar_proyecciones(self, docs):
+        self.proyecciones.insert_many(docs, ordered=False)
+
+    def guardar_resumenes(self, resumenes):
+        self.resumenes.insert_many(resumenes)
+
+    def marcar_fallida(self, run_id):
+        self.corridas.update_one(
+            {"_id": run_id},
+            {"$set": {"estado": "fallida", "completada_en": timezone.now()}},
+        )
+
+    # ------------------------------------------------------------
+    # publicar():
+    #   1. Sus documentos y resúmenes dejan de expirar ($unset expira_en).
+    #   2. El puntero "latest" se cambia atómicamente y se obtiene el
+    #      run_id anterior en la misma operación.
+    #   3. La corrida anterior (o, la primera vez, los documentos sin
+    #      run_id del esquema antiguo) queda con expira_en = ahora +
+    #      PROYECCIONES_RETENCION_CORRIDAS, y el TTL la elimina.
+    # ------------------------------------------------------------
+    def publicar(self, run_id, totales):
+        ahora = timezone.now()
+        expira_en = self._expiracion_retencion(ahora)
+
+        self.proyecciones.update_many({"run_id": run_id}, {"$unset": {"expira_en": ""}})
+        self.resumenes.update_many({"run_id": run_id}, {"$unset": {"expira_en": ""}})
+        self.corridas.update_one(
+            {"_id": run_id},
+            {"$set": {"estado": "completa", "completada_en": ahora, **totales},
+             "$unset": {"expira_en": ""}},
+        )
+
+        anterior = self.corridas.find_one_and_update(
+            {"_id": PUNTERO_VIGENTE},
+            {"$set": {"run_id": run_id, "actualizado_en": ahora}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+        if anterior and anterior.get("run_id"):
+            self.proyecciones.update_many({"run_id": anterior["run_id"]}, {"$set": {"expira_en": expira_en}})
+            self.resumenes.update_many({"run_id": anterior["run_id"]}, {"$set": {"expira_en": expira_en}})
+            self.corridas.update_one(
+                {"_id": anterior["run_id"]},
+                {"$set": {"estado": "reemplazada", "expira_en": expira_en}},
+            )
+        else:
+            self.proyecciones.update_many({"run_id": {"$exists": False}}, {"$set": {"expira_en": expira_en}})
+
+    # Lectura por _id del puntero "latest"
+    def corrida_vigente(self):
+        puntero = self.corridas.find_one({"_id": PUNTERO_VIGENTE}, {"run_id": 1})
+        return puntero["run_id"] if puntero else None
+
+    # Dos lecturas por _id (puntero + resumen)
+    def resumen_anual(self, anio):
+        run_id = self.corrida_vigente()
+        if run_id is None:
+            return None
+        return self.resumenes.find_one({"_id": f"{run_id}:{anio}"})
+
+
+# ================================================================
+# CLASE: AlmacenSQL
+#
+# Tablas CorridaProyeccion / Proyeccion / ResumenProyeccion en la
+# base de datos de Django. Diferencias con Mongo:
+#
+#   - No hay puntero aparte: la corrida vigente es la que tiene
+#     estado = "vigente". El cambio de vigente se hace en UNA
+#     transacción, así que un lector nunca ve dos o ninguna.
+#   - No hay TTL: al publicar se eliminan las corridas cuyo
+#     expira_en ya pasó (reemplazadas fuera de retención y corridas
+#     que quedaron en curso por un proceso interrumpido).
+#   - Los registros de una corrida no llevan expira_en propio: el
+#     vencimiento es de la corrida completa.
+# ================================================================
+class AlmacenSQL(AlmacenProyecciones):
+
+    # Filas por INSERT en bulk_create
+    LOTE_INSERT = 500
+
+    def iniciar_corrida(self, corrida):
+        CorridaProyeccion.objects.create(
+            run_id=corrida["_id"],
+            estado="en_curso",
+            modelo=corrida["modelo"],
+            meses_a_proyectar=corrida["meses_a_proyectar"],
+            iniciada_en=corrida["iniciada_en"],
+            expira_en=corrida["expira_en"],
+        )
+
+    def guardar_proyecciones(self, docs):
+        Proyeccion.objects.bulk_create(
+            [
+                Proyeccion(
+                    corrida_id=d["run_id"],
+                    especie=d["especie"],
+                    anio=d["anio"],
+                    mes=d["mes"],
+                    proyeccion_ton=d["proyeccion_ton"],
+                    p10=d.get("p10"),
+                    p50=d.get("p50"),
+                    p90=d.get("p90"),
+                )
+                for d in docs
+            ],
+            batch_size=self.LOTE_INSERT,
+        )
+
+    def guardar_resumenes(self, resumenes):
+        ResumenProyeccion.objects.bulk_create([
+            ResumenProyeccion(
+                corrida_id=r["run_id"],
+                anio=r["anio"],
+                meses=r["meses"],
+                bandas=r["bandas"],
+                especies=r["especies"],
+            )
+            for r in resumenes
+        ])
+
+    def marcar_fallida(self, run_id):
+        CorridaProyeccion.objects.filter(run_id=run_id).update(
+            estado="fallida", completada_en=timezone.now()
+        )
+
+    # ------------------------------------------------------------
+    # publicar():
+    #   1. En una transacción, la vigente anterior pasa a
+    #      "reemplazada" (con expira_en = ahora + retención) y la
+    #      nueva a "vigente" (sin expira_en).
+    #   2. Se eliminan las corridas vencidas (_purgar_vencidas).
+    # ------------------------------------------------------------
+    def publicar(self, run_id, totales):
+        ahora = timezone.now()
+
+        with transaction.atomic():
+            anteriores = list(
+                CorridaProyeccion.objects.select_for_update()
+                .filter(estado="vigente")
+                .exclude(run_id=run_id)
+                .values_list("run_id", flat=True)
+            )
+            CorridaProyeccion.objects.filter(run_id__in=anteriores).update(
+                estado="reemplazada", expira_en=self._expiracion_retencion(ahora)
+            )
+            CorridaProyeccion.objects.filter(run_id=run_id).update(
+                estado="vigente", completada_en=ahora, expira_en=None, **totales
+            )
+
+        self._purgar_vencidas(ahora)
+
+    # ------------------------------------------------------------
+    # _purgar_vencidas():
+    # Borra primero las proyecciones y resúmenes con un DELETE
+    # directo por tabla (sin cargar las filas en memoria) y luego
+    # las corridas.
+    # ------------------------------------------------------------
+    def _purgar_vencidas(self, ahora):
+        vencidas = list(
+            CorridaProyeccion.objects.filter(expira_en__lt=ahora)
+            .values_list("run_id", flat=True)
+        )
+        if not vencidas:
+            return
+
+        Proyeccion.objects.filter(corrida_id__in=vencidas).delete()
+        ResumenProyeccion.objects.filter(corrida_id__in=vencidas).delete()
+        CorridaProyeccion.objects.filter(run_id__in=vencidas).delete()
+
+    def corrida_vigente(self):
+        return (
+            CorridaProyeccion.objects.filter(estado="vigente")
+            .values_list("run_id", flat=True)
+            .first()
+        )
+
+    # Una sola consulta (join con la corrida vigente por índice)
+    def resumen_anual(self, anio):
+        return (
+            ResumenProyeccion.objects.filter(corrida__estado="vigente", anio=anio)
+            .values("meses", "bandas", "especies")
+            .first()
+        )
+
+
+# ================================================================
+# obtener_almacen()
+#
+# Retorna el almacén configurado en settings.PROYECCIONES_ALMACEN
+# (por defecto "mongo"). Crearlo es barato: ninguno abre conexiones
+# nuevas (Mongo usa el cliente compartido, SQL la conexión de Django).
+# ================================================================
+ALMACENES = {
+    "mongo": AlmacenMongo,
+    "sql": AlmacenSQL,
+}
+
+
+def obtener_almacen() -> AlmacenProyecciones:
+    nombre = getattr(settings, "PROYECCIONES_ALMACEN", "mongo")
+    try:
+        return ALMACENES[nombre]()
+    except KeyError:
+        raise ValueError(f"PROYECCIONES_ALMACEN desconocido: {nombre}") from None
@@ -16,11 +16,297 @@
 #
 # Este archivo aísla la comunicación HTTP de la lógica interna,
 # facilitando mantenimiento, testing y cambios de infraestructura.
+#
+# Infraestructura HTTP compartida por todas las llamadas:
+#   - Sesión requests a nivel de módulo (pool + keep-alive)
+#   - Reintentos acotados con backoff exponencial y jitter
+#   - Circuit breaker: si el servicio está caído se falla rápido
+#     en vez de esperar el timeout por cada especie
+#   - Contadores de latencia y errores (obtener_metricas_cliente)
+#
+# Modo local (settings.PROYECCIONES_MODO = "local"): las mismas
+# funciones importan el motor del microservicio
+# (microservicio_proyecciones.motor) y proyectan en el propio
+# proceso de Django, sin HTTP ni serialización. Los resultados son
+# idénticos a los del microservicio (ver ProyeccionesApp/tests.py).
 # ===============================================================
 
+import json
+import random
+import threading
+import time
+
+import importlib
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # dependencia opcional
+    msgpack = None
+
+
+# ===============================================================
+# EXCEPCIÓN: MicroservicioNoDisponible
+#
+# Se lanza cuando el circuit breaker está abierto, es decir,
+# cuando el microservicio ya falló varias veces seguidas y aún
+# no se cumple el tiempo de espera para volver a intentarlo.
+# ===============================================================
+class MicroservicioNoDisponible(requests.RequestException):
+    pass
+
+
+# ===============================================================
+# CLASE PRIVADA: _CircuitBreaker
+#
+# Estados:
+#   cerrado     → las llamadas pasan normalmente
+#   abierto     → las llamadas fallan de inmediato
+#   semiabierto → pasado el tiempo de espera se deja pasar UNA
+#                 llamada de prueba; si resulta bien se cierra,
+#                 si falla se vuelve a abrir
+#
+# Parámetros:
+#   umbral_fallos    → fallos consecutivos que abren el circuito
+#   tiempo_apertura  → segundos que el circuito permanece abierto
+# ===============================================================
+class _CircuitBreaker:
+
+    def __init__(self, umbral_fallos, tiempo_apertura):
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self.estado = "cerrado"
+        self.fallos = 0
+        self.abierto_desde = 0.0
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------
+    # permitir(): indica si la llamada puede realizarse
+    # -----------------------------------------------------------
+    def permitir(self):
+        with self._lock:
+            if self.estado == "cerrado":
+                return True
+
+            if self.estado == "abierto":
+                if time.monotonic() - self.abierto_desde < self.tiempo_apertura:
+                    return False
+                # Pasó el tiempo de espera → una llamada de prueba
+                self.estado = "semiabierto"
+                return True
+
+            # semiabierto: ya hay una llamada de prueba en curso
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self.estado = "cerrado"
+            self.fallos = 0
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos += 1
+            if self.estado == "semiabierto" or self.fallos >= self.umbral_fallos:
+                self.estado = "abierto"
+                self.abierto_desde = time.monotonic()
+
+
+# ===============================================================
+# ESTADO COMPARTIDO DEL MÓDULO
+#
+# La sesión y el circuit breaker se crean una sola vez por proceso
+# (perezosamente, para leer settings ya cargados).
+# ===============================================================
+_sesion = None
+_breaker = None
+_estado_lock = threading.Lock()
+
+_metricas = {
+    "llamadas": 0,
+    "exitos": 0,
+    "errores": 0,
+    "reintentos": 0,
+    "rechazadas_circuito": 0,
+    "latencia_total_s": 0.0,
+    "latencia_max_s": 0.0,
+}
+_metricas_lock = threading.Lock()
+
+
+# Códigos HTTP que indican un fallo transitorio del servicio
+# (429 = microservicio saturado, responde con Retry-After)
+_ESTADOS_REINTENTABLES = {429, 502, 503, 504}
+
+
+def _get_sesion():
+    global _sesion, _breaker
+
+    if _sesion is None:
+        with _estado_lock:
+            if _sesion is None:
+                pool = getattr(settings, "PROYECCIONES_MICRO_POOL", 10)
+
+                sesion = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+                sesion.mount("http://", adaptador)
+                sesion.mount("https://", adaptador)
+
+                _breaker = _CircuitBreaker(
+                    umbral_fallos=getattr(settings, "PROYECCIONES_MICRO_UMBRAL_FALLOS", 3),
+                    tiempo_apertura=getattr(settings, "PROYECCIONES_MICRO_TIEMPO_APERTURA", 30),
+                )
+                _sesion = sesion
+
+    return _sesion
+
+
+def _sumar_metrica(nombre, valor=1):
+    with _metricas_lock:
+        _metricas[nombre] += valor
+
+
+def _registrar_latencia(segundos):
+    with _metricas_lock:
+        _metricas["latencia_total_s"] += segundos
+        if segundos > _metricas["latencia_max_s"]:
+            _metricas["latencia_max_s"] = segundos
+
+
+# ===============================================================
+# MODO LOCAL
+#
+# settings.PROYECCIONES_MODO:
+#   "http"  → llamadas al microservicio (comportamiento original)
+#   "local" → el motor se importa y se ejecuta en este proceso
+#
+# El motor se importa perezosamente (solo en modo local), así que
+# el modo HTTP no requiere NumPy en el proceso de Django.
+# ===============================================================
+_motor = None
+
+
+def _modo_local() -> bool:
+    return getattr(settings, "PROYECCIONES_MODO", "http") == "local"
+
+
+def _get_motor():
+    global _motor
+
+    if _motor is None:
+        _motor = importlib.import_module("microservicio_proyecciones.motor")
+    return _motor
+
+
+# ===============================================================
+# obtener_metricas_cliente()
+#
+# Retorna una copia de los contadores del cliente HTTP:
+#
+#   llamadas, exitos, errores, reintentos, rechazadas_circuito,
+#   latencia_total_s, latencia_max_s, latencia_promedio_s,
+#   estado_circuito
+# ===============================================================
+def obtener_metricas_cliente() -> dict:
+    with _metricas_lock:
+        datos = dict(_metricas)
+
+    intentos = datos["exitos"] + datos["errores"]
+    datos["latencia_promedio_s"] = (
+        datos["latencia_total_s"] / intentos if intentos else 0.0
+    )
+    datos["estado_circuito"] = _breaker.estado if _breaker else "cerrado"
+    return datos
+
+
+# ===============================================================
+# _post_con_reintentos()
+#
+# Ejecuta un POST sobre la sesión compartida aplicando:
+#
+#   1. Circuit breaker → si está abierto, lanza
+#      MicroservicioNoDisponible sin tocar la red.
+#
+#   2. Reintentos acotados (PROYECCIONES_MICRO_REINTENTOS) SOLO
+#      para fallos transitorios: errores de conexión, timeouts y
+#      respuestas 429/502/503/504. Proyectar es idempotente, por lo
+#      que repetir el POST es seguro.
+#
+#   3. Backoff exponencial con "full jitter":
+#         espera = random(0, base * 2^intento)
+#      para no sincronizar reintentos de varios workers.
+#
+# Errores 4xx/500 no se reintentan: raise_for_status() los propaga.
+# ===============================================================
+def _post_con_reintentos(url, **kwargs):
+    sesion = _get_sesion()
+
+    reintentos = getattr(settings, "PROYECCIONES_MICRO_REINTENTOS", 2)
+    backoff = getattr(settings, "PROYECCIONES_MICRO_BACKOFF", 0.2)
+    kwargs.setdefault("timeout", getattr(settings, "PROYECCIONES_MICRO_TIMEOUT", 5))
+
+    _sumar_metrica("llamadas")
+
+    for intento in range(reintentos + 1):
+
+        if not _breaker.permitir():
+            _sumar_metrica("rechazadas_circuito")
+            raise MicroservicioNoDisponible(
+                "Circuit breaker abierto: microservicio de proyecciones no disponible."
+            )
+
+        inicio = time.perf_counter()
+        try:
+            resp = sesion.post(url, **kwargs)
+            if resp.status_code in _ESTADOS_REINTENTABLES:
+                resp.raise_for_status()
+        except requests.RequestException as e:
+            _registrar_latencia(time.perf_counter() - inicio)
+            _sumar_metrica("errores")
+
+            # Un 429 indica saturación, no caída: el servicio responde
+            if e.response is not None and e.response.status_code == 429:
+                _breaker.registrar_exito()
+            else:
+                _breaker.registrar_fallo()
+
+            transitorio = isinstance(
+                e, (requests.ConnectionError, requests.Timeout, requests.HTTPError)
+            )
+            if not transitorio or intento >= reintentos:
+                raise
+
+            _sumar_metrica("reintentos")
+            time.sleep(random.uniform(0, backoff * (2 ** intento)))
+            continue
+        except BaseException:
+            # Cualquier otro error (ej: en el adaptador o una
+            # interrupción) también cuenta como fallo: si no, una
+            # llamada de prueba dejaría el circuito en "semiabierto"
+            # para siempre y rechazaría todas las llamadas siguientes
+            _registrar_latencia(time.perf_counter() - inicio)
+            _sumar_metrica("errores")
+            _breaker.registrar_fallo()
+            raise
+
+        _registrar_latencia(time.perf_counter() - inicio)
+
+        # Un 4xx/500 significa que el servicio responde: no abre el circuito
+        _breaker.registrar_exito()
+        if resp.ok:
+            _sumar_metrica("exitos")
+        else:
+            _sumar_metrica("errores")
+        resp.raise_for_status()
+        return resp
+
 
 # ===============================================================
 # llamar_microservicio_proyecciones()
@@ -46,6 +332,9 @@ from django.conf import settings
 #   - meses_a_proyectar (int):
 #         Cantidad de meses futuros que el microservicio debe proyectar.
 #
+#   - modelo (str):
+#         Modelo de proyección (GET /api/modelos lista los disponibles).
+#
 # Uso:
 #       respuesta = llamar_microservicio_proyecciones("Luga Roja", historico, 12)
 #
@@ -60,17 +349,22 @@ from django.conf import settings
 #
 # Errores:
 #   - raise_for_status() lanza excepción si el servidor responde con error.
+#   - MicroservicioNoDisponible si el circuit breaker está abierto.
 #
 # Configuración:
 #   En settings.py puedes definir:
 #       PROYECCIONES_MICRO_URL = "http://mi_microservicio/api/proyectar"
+#       PROYECCIONES_MICRO_TIMEOUT, PROYECCIONES_MICRO_REINTENTOS,
+#       PROYECCIONES_MICRO_BACKOFF, PROYECCIONES_MICRO_POOL,
+#       PROYECCIONES_MICRO_UMBRAL_FALLOS, PROYECCIONES_MICRO_TIEMPO_APERTURA
 #
-#   Si no existe, se usa el endpoint local por defecto.
+#   Si no existen, se usan los valores por defecto.
 # ===============================================================
 def llamar_microservicio_proyecciones(
     especie_nombre: str,
     historico: list,
-    meses_a_proyectar: int = 12
+    meses_a_proyectar: int = 12,
+    modelo: str = "promedio"
 ) -> dict:
 
     # ------------------------------------------------------------
@@ -97,24 +391,305 @@ def llamar_microservicio_proyecciones(
         "especie": especie_nombre,
         "historico": historico,
         "meses_a_proyectar": meses_a_proyectar,
+        "modelo": modelo,
     }
 
+    # ------------------------------------------------------------
+    # MODO LOCAL: misma respuesta que POST /api/proyectar
+    # ------------------------------------------------------------
+    if _modo_local():
+        proyecciones = _get_motor().proyectar_historico(
+            ((int(h["anio"]), int(h["mes"]), float(h["toneladas"])) for h in historico),
+            meses_a_proyectar,
+            modelo,
+        )
+        return {"especie": especie_nombre, "proyecciones": proyecciones}
+
     # ------------------------------------------------------------
     # LLAMADA HTTP AL MICROSERVICIO
     #
-    # requests.post():
-    #   - json=payload      → envía JSON automáticamente
-    #   - timeout=5         → evita que la vista se quede colgada
-    #
-    # raise_for_status():
+    # _post_con_reintentos():
+    #   - reutiliza la conexión keep-alive del pool
+    #   - reintenta fallos transitorios con backoff + jitter
+    #   - falla rápido si el circuit breaker está abierto
     #   - lanza excepción para cualquier código >= 400
-    #     permitiendo manejar errores arriba.
     # ------------------------------------------------------------
-    resp = requests.post(url, json=payload, timeout=5)
-    resp.raise_for_status()
+    resp = _post_con_reintentos(url, json=payload)
 
     # ------------------------------------------------------------
     # Retorna el JSON ya decodificado en un dict de Python
     # ------------------------------------------------------------
     return resp.json()
 
+
+# ===============================================================
+# FORMATO COLUMNAR
+#
+# Alternativa compacta al formato de lista de dicts: cada especie
+# se envía como un período inicial + un arreglo de toneladas
+# (un valor por mes consecutivo, None en meses sin registros).
+#
+# Codificación (settings.PROYECCIONES_MICRO_CODIFICACION):
+#   "msgpack" → application/msgpack (si msgpack está instalado)
+#   "json"    → application/json (orjson si está instalado)
+#
+# El detalle del esquema está documentado en:
+#   microservicio_proyecciones/formato.py
+# ===============================================================
+def _codificar(datos: dict) -> tuple[bytes, str]:
+    codificacion = getattr(settings, "PROYECCIONES_MICRO_CODIFICACION", "msgpack")
+
+    if codificacion == "msgpack" and msgpack is not None:
+        return msgpack.packb(datos, use_bin_type=True), "application/msgpack"
+
+    if orjson is not None:
+        return orjson.dumps(datos), "application/json"
+    return json.dumps(datos).encode("utf-8"), "application/json"
+
+
+def _decodificar(resp) -> dict:
+    tipo = resp.headers.get("Content-Type", "").split(";")[0].strip()
+
+    if tipo in ("application/msgpack", "application/x-msgpack"):
+        return msgpack.unpackb(resp.content, raw=False)
+
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+# ---------------------------------------------------------------
+# _serie_columnar():
+# Convierte una serie compacta (anios, meses, toneladas), que puede
+# tener meses faltantes, en (inicio, arreglo consecutivo con None).
+# ---------------------------------------------------------------
+def _serie_columnar(anios, meses, toneladas) -> tuple[list, list]:
+    primero = anios[0] * 12 + meses[0] - 1
+    ultimo = anios[-1] * 12 + meses[-1] - 1
+
+    valores = [None] * (ultimo - primero + 1)
+    for a, m, t in zip(anios, meses, toneladas):
+        valores[a * 12 + m - 1 - primero] = t
+
+    return [anios[0], meses[0]], valores
+
+
+# ---------------------------------------------------------------
+# _payload_columnar():
+# Arma el request columnar a partir de las series compactas:
+#     [(especie_nombre, (anios, meses, toneladas)), ...]
+#
+# Con PROYECCIONES_INTERVALOS_CAMINOS > 0 se piden además las
+# bandas P10/P50/P90 simuladas con esa cantidad de caminos.
+# ---------------------------------------------------------------
+def _payload_columnar(series, meses_a_proyectar, modelo) -> dict:
+    payload = {
+        "meses_a_proyectar": meses_a_proyectar,
+        "modelo": modelo,
+        "caminos": getattr(settings, "PROYECCIONES_INTERVALOS_CAMINOS", 0),
+        "series": [],
+    }
+    for especie_nombre, (anios, meses, toneladas) in series:
+        inicio, valores = _serie_columnar(anios, meses, toneladas)
+        payload["series"].append(
+            {"especie": especie_nombre, "inicio": inicio, "toneladas": valores}
+        )
+    return payload
+
+
+# ---------------------------------------------------------------
+# _expandir_serie():
+# Serie de respuesta columnar → (especie, [{anio, mes, proyeccion_ton}])
+# Si la respuesta trae bandas, cada mes incluye además p10/p50/p90.
+# ---------------------------------------------------------------
+BANDAS = ("p10", "p50", "p90")
+
+
+def _expandir_serie(s) -> tuple[str, list[dict]]:
+    proyecciones = []
+    if s["inicio"]:
+        anio, mes = s["inicio"]
+        bandas = [b for b in BANDAS if b in s]
+        for h, valor in enumerate(s["proyeccion_ton"]):
+            p = {"anio": anio, "mes": mes, "proyeccion_ton": valor}
+            for b in bandas:
+                p[b] = s[b][h]
+            proyecciones.append(p)
+            anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return s["especie"], proyecciones
+
+
+# ---------------------------------------------------------------
+# _proyectar_local():
+# Ejecuta en proceso lo mismo que /api/proyectar/lote para un
+# payload columnar y retorna su lista "series" de respuesta.
+#
+# Los caminos se acotan a PROYECCIONES_MAX_CAMINOS igual que en el
+# microservicio (el ajuste al horizonte lo hace el propio motor).
+# ---------------------------------------------------------------
+def _proyectar_local(payload) -> list[dict]:
+    series = [
+        (s["especie"], s["inicio"][0], s["inicio"][1], s["toneladas"])
+        for s in payload["series"]
+    ]
+    caminos = min(payload["caminos"], getattr(settings, "PROYECCIONES_MAX_CAMINOS", 5000))
+    return _get_motor().proyectar_columnar(
+        series, payload["meses_a_proyectar"], payload["modelo"], caminos
+    )
+
+
+# ===============================================================
+# llamar_microservicio_proyecciones_lote()
+#
+# Proyecta VARIAS especies en una sola llamada usando el formato
+# columnar (endpoint /api/proyectar/lote).
+#
+# Parámetros:
+#   - series (list):
+#         [(especie_nombre, (anios, meses, toneladas)), ...]
+#         con las series compactas que arma services.py
+#
+#   - meses_a_proyectar (int)
+#   - modelo (str)
+#
+# Retorna:
+#   dict { especie_nombre: [ {anio, mes, proyeccion_ton}, ... ] }
+#   con la misma forma por mes que el endpoint JSON original
+#   (más p10/p50/p90 si se pidieron intervalos).
+#
+# Configuración:
+#   PROYECCIONES_MICRO_URL_LOTE
+#   PROYECCIONES_MICRO_CODIFICACION
+#   PROYECCIONES_INTERVALOS_CAMINOS
+# ===============================================================
+def llamar_microservicio_proyecciones_lote(
+    series: list,
+    meses_a_proyectar: int = 12,
+    modelo: str = "promedio"
+) -> dict:
+
+    url = getattr(
+        settings,
+        "PROYECCIONES_MICRO_URL_LOTE",
+        "http://127.0.0.1:8001/api/proyectar/lote"
+    )
+
+    payload = _payload_columnar(series, meses_a_proyectar, modelo)
+
+    if _modo_local():
+        return dict(_expandir_serie(s) for s in _proyectar_local(payload))
+
+    cuerpo, tipo = _codificar(payload)
+    resp = _post_con_reintentos(
+        url,
+        data=cuerpo,
+        headers={"Content-Type": tipo, "Accept": tipo},
+    )
+
+    # ------------------------------------------------------------
+    # Expandir cada serie de respuesta a {anio, mes, proyeccion_ton}
+    # ------------------------------------------------------------
+    return dict(_expandir_serie(s) for s in _decodificar(resp)["series"])
+
+
+# ===============================================================
+# EXCEPCIÓN: StreamInterrumpido
+#
+# El stream NDJSON terminó antes de entregar todas las especies,
+# después de que el microservicio ya respondió 200:
+#   - el servicio informó un error (línea {"error": ...})
+#   - la conexión se cortó (error de red o línea incompleta)
+#   - llegaron menos especies que las enviadas
+# Las especies anteriores al corte ya fueron entregadas.
+# ===============================================================
+class StreamInterrumpido(requests.RequestException):
+    pass
+
+
+# ===============================================================
+# iterar_microservicio_proyecciones_stream()
+#
+# Igual que llamar_microservicio_proyecciones_lote(), pero usando
+# el endpoint /api/proyectar/stream: la respuesta llega como NDJSON
+# (una especie por línea) y se procesa a medida que llega, sin
+# cargar la respuesta completa en memoria.
+#
+# Generador de tuplas:
+#   (especie_nombre, [ {anio, mes, proyeccion_ton}, ... ])
+#
+# Los reintentos / circuit breaker cubren solo el inicio de la
+# llamada (hasta recibir los headers); un corte posterior se
+# propaga al consumidor, que ya procesó las especies anteriores.
+#
+# En modo local se proyecta en bloques del mismo tamaño que usa el
+# microservicio (PROYECCIONES_BLOQUE_STREAM), para que los números
+# coincidan y la memoria siga acotada.
+#
+# Configuración:
+#   PROYECCIONES_MICRO_URL_STREAM
+#   PROYECCIONES_MICRO_CODIFICACION  (codificación del request)
+#   PROYECCIONES_BLOQUE_STREAM       (solo modo local)
+# ===============================================================
+def iterar_microservicio_proyecciones_stream(
+    series: list,
+    meses_a_proyectar: int = 12,
+    modelo: str = "promedio"
+):
+
+    url = getattr(
+        settings,
+        "PROYECCIONES_MICRO_URL_STREAM",
+        "http://127.0.0.1:8001/api/proyectar/stream"
+    )
+
+    payload = _payload_columnar(series, meses_a_proyectar, modelo)
+
+    if _modo_local():
+        bloque = getattr(settings, "PROYECCIONES_BLOQUE_STREAM", 32)
+        todas = payload["series"]
+        for i in range(0, len(todas), bloque):
+            for s in _proyectar_local({**payload, "series": todas[i:i + bloque]}):
+                yield _expandir_serie(s)
+        return
+
+    cuerpo, tipo = _codificar(payload)
+    resp = _post_con_reintentos(
+        url,
+        data=cuerpo,
+        headers={"Content-Type": tipo, "Accept": "application/x-ndjson"},
+        stream=True,
+    )
+
+    esperadas = len(payload["series"])
+    recibidas = 0
+
+    # Cerrar la respuesta devuelve la conexión al pool aunque el
+    # consumidor deje de iterar antes de terminar
+    with resp:
+        lineas = resp.iter_lines()
+        while True:
+            try:
+                linea = next(lineas, None)
+            except requests.RequestException as e:
+                raise StreamInterrumpido(f"Stream de proyecciones cortado: {e}") from e
+            if linea is None:
+                break
+            if not linea:
+                continue
+
+            try:
+                s = orjson.loads(linea) if orjson is not None else json.loads(linea)
+            except ValueError as e:
+                raise StreamInterrumpido("Stream de proyecciones cortado a mitad de línea.") from e
+            if "error" in s:
+                raise StreamInterrumpido(s["error"])
+
+            recibidas += 1
+            yield _expandir_serie(s)
+
+    # Un corte justo entre dos líneas no deja ninguna marca: solo
+    # se nota porque faltan especies
+    if recibidas < esperadas:
+        raise StreamInterrumpido(
+            f"Stream de proyecciones incompleto: {recibidas} de {esperadas} especies."
+        )
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorridaProyeccion',
+            fields=[
+                ('run_id', models.CharField(help_text='Identificador de la corrida.', max_length=32, primary_key=True, serialize=False)),
+                ('estado', models.CharField(choices=[('en_curso', 'En curso'), ('vigente', 'Vigente'), ('reemplazada', 'Reemplazada'), ('fallida', 'Fallida')], db_index=True, default='en_curso', help_text='Estado de la corrida.', max_length=20)),
+                ('modelo', models.CharField(help_text='Modelo de proyección usado.', max_length=50)),
+                ('meses_a_proyectar', models.PositiveSmallIntegerField(help_text='Horizonte de la corrida (meses).')),
+                ('iniciada_en', models.DateTimeField(help_text='Inicio de la corrida.')),
+                ('completada_en', models.DateTimeField(blank=True, help_text='Fin de la corrida (publicada o fallida).', null=True)),
+                ('especies', models.PositiveIntegerField(default=0, help_text='Especies proyectadas.')),
+                ('documentos', models.PositiveIntegerField(default=0, help_text='Meses proyectados en total.')),
+                ('expira_en', models.DateTimeField(blank=True, db_index=True, help_text='Fecha desde la cual la corrida puede eliminarse.', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Proyeccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('especie', models.CharField(help_text='Nombre de la especie proyectada.', max_length=100)),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('proyeccion_ton', models.FloatField(help_text='Proyección puntual en toneladas.')),
+                ('p10', models.FloatField(blank=True, null=True)),
+                ('p50', models.FloatField(blank=True, null=True)),
+                ('p90', models.FloatField(blank=True, null=True)),
+                ('corrida', models.ForeignKey(help_text='Corrida a la que pertenece la proyección.', on_delete=django.db.models.deletion.CASCADE, related_name='proyecciones', to='ProyeccionesApp.corridaproyeccion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['corrida', 'anio', 'mes'], name='proyeccion_corrida_periodo')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenProyeccion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('meses', models.JSONField(default=dict)),
+                ('bandas', models.JSONField(default=dict)),
+                ('especies', models.JSONField(default=list)),
+                ('corrida', models.ForeignKey(help_text='Corrida resumida.', on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='ProyeccionesApp.corridaproyeccion')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('corrida', 'anio'), name='unique_resumen_corrida_anio')],
+            },
+        ),
+    ]
@@ -1,3 +1,167 @@
 from django.db import models
 
-# Create your models here.
+
+# ===============================================================
+# MODELOS DEL ALMACÉN SQL DE PROYECCIONES
+#
+# Equivalentes relacionales de las colecciones de Mongo descritas en
+# ProyeccionesApp/services.py (CORRIDAS VERSIONADAS). Se usan solo
+# con PROYECCIONES_ALMACEN = "sql" (ver ProyeccionesApp/almacenes.py):
+#
+#   CorridaProyeccion  → una por corrida; la vigente tiene
+#                        estado = "vigente" (reemplaza al puntero
+#                        "latest" de Mongo)
+#   Proyeccion         → un registro por especie y mes proyectado
+#   ResumenProyeccion  → totales precalculados por corrida y año
+#
+# Al eliminar una corrida se eliminan en cascada sus proyecciones
+# y resúmenes (equivale a la expiración TTL de Mongo).
+# ===============================================================
+class CorridaProyeccion(models.Model):
+
+    # -----------------------------------------------------------
+    # Identificador de la corrida (uuid4 hex, igual que en Mongo)
+    # -----------------------------------------------------------
+    run_id = models.CharField(
+        max_length=32,
+        primary_key=True,
+        help_text="Identificador de la corrida."
+    )
+
+    # -----------------------------------------------------------
+    # Estado de la corrida
+    #
+    #   en_curso    → escribiendo proyecciones
+    #   vigente     → la que lee el dashboard (a lo más una)
+    #   reemplazada → vigente anterior, se elimina al vencer expira_en
+    #   fallida     → ninguna especie se pudo proyectar
+    # -----------------------------------------------------------
+    estado = models.CharField(
+        max_length=20,
+        choices=[
+            ("en_curso", "En curso"),
+            ("vigente", "Vigente"),
+            ("reemplazada", "Reemplazada"),
+            ("fallida", "Fallida"),
+        ],
+        default="en_curso",
+        db_index=True,
+        help_text="Estado de la corrida."
+    )
+
+    modelo = models.CharField(
+        max_length=50,
+        help_text="Modelo de proyección usado."
+    )
+    meses_a_proyectar = models.PositiveSmallIntegerField(
+        help_text="Horizonte de la corrida (meses)."
+    )
+
+    iniciada_en = models.DateTimeField(
+        help_text="Inicio de la corrida."
+    )
+    completada_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fin de la corrida (publicada o fallida)."
+    )
+
+    especies = models.PositiveIntegerField(
+        default=0,
+        help_text="Especies proyectadas."
+    )
+    documentos = models.PositiveIntegerField(
+        default=0,
+        help_text="Meses proyectados en total."
+    )
+
+    # -----------------------------------------------------------
+    # Vencimiento: corridas en curso (por si el proceso se cae) y
+    # reemplazadas (retención). Null = no vence.
+    # -----------------------------------------------------------
+    expira_en = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Fecha desde la cual la corrida puede eliminarse."
+    )
+
+    def __str__(self):
+        return f"Corrida {self.run_id} ({self.estado})"
+
+
+# ===============================================================
+# MODELO: Proyeccion
+#
+# Un mes proyectado de una especie dentro de una corrida.
+# p10/p50/p90 quedan en null si la corrida no pidió intervalos.
+# ===============================================================
+class Proyeccion(models.Model):
+
+    corrida = models.ForeignKey(
+        CorridaProyeccion,
+        on_delete=models.CASCADE,
+        related_name="proyecciones",
+        help_text="Corrida a la que pertenece la proyección."
+    )
+
+    # Nombre de la especie (igual que en Mongo: la corrida conserva
+    # el nombre con que se proyectó)
+    especie = models.CharField(
+        max_length=100,
+        help_text="Nombre de la especie proyectada."
+    )
+
+    anio = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+
+    proyeccion_ton = models.FloatField(
+        help_text="Proyección puntual en toneladas."
+    )
+    p10 = models.FloatField(null=True, blank=True)
+    p50 = models.FloatField(null=True, blank=True)
+    p90 = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        # Lectura de una corrida por año/mes (igual que el índice
+        # (run_id, anio, mes) de Mongo)
+        indexes = [
+            models.Index(fields=["corrida", "anio", "mes"], name="proyeccion_corrida_periodo"),
+        ]
+
+    def __str__(self):
+        return f"{self.especie} {self.mes}/{self.anio}: {self.proyeccion_ton}"
+
+
+# ===============================================================
+# MODELO: ResumenProyeccion
+#
+# Totales de una corrida para un año, con la misma forma que el
+# documento de resumen de Mongo:
+#
+#   meses    → {"1": total, ..., "12": total}
+#   bandas   → {"p10": {"1": total, ...}, "p50": ..., "p90": ...}
+#   especies → [{especie, meses: {"1": ton, ...}}, ...]
+# ===============================================================
+class ResumenProyeccion(models.Model):
+
+    corrida = models.ForeignKey(
+        CorridaProyeccion,
+        on_delete=models.CASCADE,
+        related_name="resumenes",
+        help_text="Corrida resumida."
+    )
+
+    anio = models.PositiveSmallIntegerField()
+
+    meses = models.JSONField(default=dict)
+    bandas = models.JSONField(default=dict)
+    especies = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["corrida", "anio"], name="unique_resumen_corrida_anio"),
+        ]
+
+    def __str__(self):
+        return f"Resumen {self.anio} ({self.corrida_id})"
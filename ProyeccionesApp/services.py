@@ -4,96 +4,346 @@
 # Servicios relacionados a la generación y obtención de proyecciones.
 #
 # Aquí se manejan:
-#   - Consultas a MongoDB
-#   - Agregaciones por mes/año
+#   - Consultas al almacén de proyecciones (MongoDB o SQL)
+#   - Resúmenes precalculados por mes/año
 #   - Lectura de histórico desde Django ORM
 #   - Comunicación con microservicios externos
-#   - Escritura/actualización de proyecciones en la colección Mongo
+#   - Escritura de corridas versionadas de proyecciones
 #
 # Este archivo actúa como capa LÓGICA independiente de las vistas.
+#
+# Dónde se guardan las proyecciones (MongoDB o tablas SQL de Django)
+# lo decide settings.PROYECCIONES_ALMACEN (ver almacenes.py).
 # ================================================================
 
-from datetime import date
+import uuid
+from datetime import date, timedelta
+
 from django.conf import settings
-from pymongo import MongoClient
+from django.utils import timezone
+
+from .almacenes import obtener_almacen
 
 
 # ================================================================
-# FUNCIÓN PRIVADA: _get_mongo_client()
+# CORRIDAS VERSIONADAS
+#
+# Cada actualización ("corrida") escribe un conjunto NUEVO e
+# inmutable de proyecciones marcadas con su run_id; nunca se
+# modifican en su lugar las proyecciones que el dashboard está
+# leyendo.
+#
+# Por corrida se guardan (ver almacenes.py para el esquema de
+# cada almacén):
+#   - la corrida     { run_id, estado, iniciada_en, modelo, ... }
+#   - proyecciones   { run_id, especie, anio, mes, proyeccion_ton,
+#                      [p10, p50, p90] }
+#   - un resumen por año, calculado mientras se escribe la corrida:
+#       { run_id, anio,
+#         meses: {"1": total, ..., "12": total},
+#         bandas: {"p10": {"1": total, ...}, "p50": ..., "p90": ...},
+#         especies: [{especie, meses: {"1": ton, ...}}, ...] }
 #
-# Obtiene un cliente MongoDB utilizando la URI configurada en
-# settings.py. Si la variable no existe, usa localhost por defecto.
+# Ciclo de una corrida:
+#   1. Se escriben sus proyecciones (y resúmenes) con expira_en: si
+#      el proceso se cae a mitad de camino, se eliminan solas.
+#   2. Al terminar se publica: pasa a ser la vigente en UNA
+#      operación atómica.
+#   3. La corrida anterior recibe expira_en = ahora + retención y
+#      se elimina al vencer.
 #
-# Esta función NO selecciona base de datos; solo abre conexión.
+# Los lectores siempre leen la corrida vigente y SOLO esa: nunca
+# ven una mezcla de meses viejos y nuevos.
 # ================================================================
-def _get_mongo_client():
-    uri = getattr(settings, "MONGO_URI", "mongodb://localhost:27017/")
-    return MongoClient(uri)
+def _id_resumen(run_id, anio):
+    return f"{run_id}:{anio}"
 
 
 # ================================================================
-# obtener_proyecciones_por_mes()
+# obtener_corrida_vigente()
 #
-# Retorna un diccionario con la suma TOTAL de proyecciones por mes:
+# Retorna el run_id de la corrida vigente (o None si todavía no
+# se ha completado ninguna corrida).
+# ================================================================
+def obtener_corrida_vigente() -> str | None:
+    return obtener_almacen().corrida_vigente()
+
+
+# ================================================================
+# obtener_resumen_anual()
 #
-#    { mes_int: total_proyectado_en_toneladas }
+# Retorna el resumen precalculado de la corrida vigente para un año:
 #
-# Datos provienen EXCLUSIVAMENTE de MongoDB.
+#    {
+#        "meses":    { mes_int: total_ton },
+#        "bandas":   { "p10": { mes_int: total_ton }, "p50": ..., "p90": ... },
+#        "especies": { especie: { mes_int: ton } },
+#    }
 #
-# Parámetros:
-#   anio: año a consultar (si no se pasa → año actual)
+# "bandas" queda vacío si la corrida no pidió intervalos.
 #
-# Flujo:
-#   1. Selecciona BD y colección configuradas en settings.
-#   2. Ejecuta un pipeline de agregación:
-#        - match por año
-#        - group por mes
-#        - sumatoria de proyeccion_ton
-#        - sort ascendente por mes
-#   3. Retorna datos en un formato limpio (dict).
+# Son lecturas directas por clave (Mongo: puntero + resumen; SQL:
+# una consulta); no se agrega nada en tiempo de consulta. Retorna
+# None si no hay corrida vigente o si la corrida no tiene resumen
+# para ese año.
 # ================================================================
-def obtener_proyecciones_por_mes(anio: int | None = None) -> dict[int, float]:
+def obtener_resumen_anual(anio: int | None = None) -> dict | None:
 
     if anio is None:
         anio = date.today().year
 
-    # Obtención desde settings (con valores por defecto)
-    db_name = getattr(settings, "MONGO_DB_NAME", "proyecto_algas_db")
-    col_name = getattr(settings, "MONGO_COLLECTION_PROYECCIONES", "proyecciones")
-
-    # Conexión y selección de colección
-    client = _get_mongo_client()
-    db = client[db_name]
-    col = db[col_name]
+    resumen = obtener_almacen().resumen_anual(anio)
+    if resumen is None:
+        return None
 
-    # ------------------------------------------------------------
-    # Pipeline de agregación MongoDB:
-    #   $match: filtrar por año
-    #   $group: sumar toneladas por mes
-    #   $sort: ordenar cronológicamente
-    # ------------------------------------------------------------
-    pipeline = [
-        {"$match": {"anio": anio}},
-        {"$group": {"_id": "$mes", "proyeccion_total": {"$sum": "$proyeccion_ton"}}},
-        {"$sort": {"_id": 1}},
-    ]
+    return {
+        "meses": {int(m): float(t) for m, t in resumen["meses"].items()},
+        "bandas": {
+            banda: {int(m): float(t) for m, t in meses.items()}
+            for banda, meses in resumen.get("bandas", {}).items()
+        },
+        "especies": {
+            e["especie"]: {int(m): float(t) for m, t in e["meses"].items()}
+            for e in resumen["especies"]
+        },
+    }
 
-    results = list(col.aggregate(pipeline))
-    client.close()
 
-    # Convertir a { mes_int: total_float }
-    return {int(r["_id"]): float(r["proyeccion_total"]) for r in results}
+# ================================================================
+# obtener_proyecciones_por_mes()
+#
+# Retorna un diccionario con la suma TOTAL de proyecciones por mes:
+#
+#    { mes_int: total_proyectado_en_toneladas }
+#
+# Datos provienen EXCLUSIVAMENTE del almacén de proyecciones, y solo
+# de la corrida vigente, leídos del resumen precalculado.
+#
+# Parámetros:
+#   anio: año a consultar (si no se pasa → año actual)
+# ================================================================
+def obtener_proyecciones_por_mes(anio: int | None = None) -> dict[int, float]:
+    resumen = obtener_resumen_anual(anio)
+    return resumen["meses"] if resumen else {}
 
 
 # ================================================================
 # IMPORTS ADICIONALES PARA GENERACIÓN AUTOMÁTICA
 # (Estos deben ir al final para evitar dependencias circulares)
 # ================================================================
+from array import array
+from itertools import groupby
+
 from django.db.models import Sum
 from StockApp.models import Maxisaco
 from EspecieApp.models import Especie
-from ProyectoAlgas.mongo import get_mongo_connection
-from .client import llamar_microservicio_proyecciones
+from .client import (
+    BANDAS,
+    iterar_microservicio_proyecciones_stream,
+    llamar_microservicio_proyecciones,
+    llamar_microservicio_proyecciones_lote,
+)
+
+
+# ================================================================
+# FUNCIÓN PRIVADA: _obtener_historicos_por_especie()
+#
+# Extrae en UNA sola consulta el histórico mensual de entradas de
+# TODAS las especies, agrupado por (especie, año, mes).
+#
+# La consulta se recorre en streaming (.iterator()) ordenada por
+# especie, por lo que se puede partir en memoria con groupby()
+# sin materializar el QuerySet completo.
+#
+# Cada serie se guarda como arreglos compactos (array) en vez de
+# una lista de dicts:
+#
+#    { especie_id: (anios, meses, toneladas) }
+#
+#    anios      → array("H")
+#    meses      → array("B")
+#    toneladas  → array("d")
+#
+# Así el número de consultas ya no crece con la cantidad de especies.
+# Los meses sin producción se excluyen (igual que antes).
+# ================================================================
+def _obtener_historicos_por_especie() -> dict[int, tuple[array, array, array]]:
+
+    qs = (
+        Maxisaco.objects.filter(tipo_movimiento="entrada")
+        .values("especie_id", "fecha_registro__year", "fecha_registro__month")
+        .annotate(toneladas=Sum("peso_kg"))
+        .order_by("especie_id", "fecha_registro__year", "fecha_registro__month")
+    )
+
+    historicos = {}
+
+    for especie_id, filas in groupby(qs.iterator(), key=lambda r: r["especie_id"]):
+        anios, meses, toneladas = array("H"), array("B"), array("d")
+
+        for row in filas:
+            if not row["toneladas"]:  # excluir meses sin producción
+                continue
+            anios.append(row["fecha_registro__year"])
+            meses.append(row["fecha_registro__month"])
+            toneladas.append(float(row["toneladas"]))
+
+        if toneladas:
+            historicos[especie_id] = (anios, meses, toneladas)
+
+    return historicos
+
+
+# ================================================================
+# FUNCIÓN PRIVADA: _serie_a_historico()
+#
+# Convierte una serie compacta (anios, meses, toneladas) al formato
+# JSON que espera el microservicio:
+#
+#    [{"anio": int, "mes": int, "toneladas": float}, ...]
+# ================================================================
+def _serie_a_historico(serie: tuple[array, array, array]) -> list[dict]:
+    anios, meses, toneladas = serie
+    return [
+        {"anio": a, "mes": m, "toneladas": t}
+        for a, m, t in zip(anios, meses, toneladas)
+    ]
+
+
+# ================================================================
+# FUNCIÓN PRIVADA: _proyectar_json()
+#
+# Formato original: una llamada al microservicio POR especie con
+# el histórico como lista de dicts.
+#
+# Genera tuplas (especie_nombre, proyecciones).
+# Si una especie falla → (especie_nombre, None).
+# ================================================================
+def _proyectar_json(especies, historicos, meses_a_proyectar):
+    for esp in especies:
+        try:
+            respuesta = llamar_microservicio_proyecciones(
+                especie_nombre=esp.nombre,
+                historico=_serie_a_historico(historicos[esp.id]),
+                meses_a_proyectar=meses_a_proyectar,
+                modelo=getattr(settings, "PROYECCIONES_MODELO", "promedio"),
+            )
+        except Exception as e:
+            print(f"[WARN] No se pudo llamar al microservicio para {esp.nombre}: {e}")
+            yield esp.nombre, None
+            continue
+
+        yield esp.nombre, respuesta.get("proyecciones", [])
+
+
+# ================================================================
+# FUNCIÓN PRIVADA: _proyectar_columnar()
+#
+# Formato columnar: las especies se envían en lotes de
+# PROYECCIONES_MICRO_LOTE series por llamada (/api/proyectar/lote).
+#
+# Genera tuplas (especie_nombre, proyecciones).
+# Si un lote falla → (especie_nombre, None) por cada especie del lote.
+# ================================================================
+def _proyectar_columnar(especies, historicos, meses_a_proyectar):
+    tamano = getattr(settings, "PROYECCIONES_MICRO_LOTE", 100)
+
+    for i in range(0, len(especies), tamano):
+        lote = especies[i:i + tamano]
+        try:
+            respuesta = llamar_microservicio_proyecciones_lote(
+                [(esp.nombre, historicos[esp.id]) for esp in lote],
+                meses_a_proyectar=meses_a_proyectar,
+                modelo=getattr(settings, "PROYECCIONES_MODELO", "promedio"),
+            )
+        except Exception as e:
+            nombres = ", ".join(esp.nombre for esp in lote)
+            print(f"[WARN] No se pudo llamar al microservicio para {nombres}: {e}")
+            for esp in lote:
+                yield esp.nombre, None
+            continue
+
+        yield from respuesta.items()
+
+
+# ================================================================
+# FUNCIÓN PRIVADA: _proyectar_stream()
+#
+# Formato NDJSON: UNA llamada con todas las especies al endpoint
+# /api/proyectar/stream. Cada especie se entrega apenas llega su
+# línea, de modo que se guarda en el almacén mientras el microservicio
+# sigue calculando el resto (memoria constante en ambos lados).
+#
+# Genera tuplas (especie_nombre, proyecciones).
+# Si el stream se corta → termina; las especies que no alcanzaron a
+# llegar quedan sin proyección (la corrida no se publica).
+# ================================================================
+def _proyectar_stream(especies, historicos, meses_a_proyectar):
+    try:
+        yield from iterar_microservicio_proyecciones_stream(
+            [(esp.nombre, historicos[esp.id]) for esp in especies],
+            meses_a_proyectar=meses_a_proyectar,
+            modelo=getattr(settings, "PROYECCIONES_MODELO", "promedio"),
+        )
+    except Exception as e:
+        print(f"[WARN] Stream de proyecciones interrumpido: {e}")
+
+
+# ================================================================
+# CLASE PRIVADA: _AcumuladorResumen
+#
+# Suma, mientras se escriben las especies de una corrida, los
+# totales por año/mes y el desglose por especie. Al final genera
+# un documento de resumen por año (ver CORRIDAS VERSIONADAS).
+#
+# Las bandas totales se obtienen sumando los percentiles de cada
+# especie: es una cota conservadora (supone que todas las especies
+# quedan a la vez en su P10 o en su P90), no el percentil exacto
+# del total.
+# ================================================================
+class _AcumuladorResumen:
+
+    def __init__(self):
+        self.meses = {}      # anio → {mes: total}
+        self.bandas = {}     # anio → {banda: {mes: total}}
+        self.especies = {}   # anio → {especie: {mes: ton}}
+
+    def agregar(self, especie_nombre, doc):
+        anio, mes, toneladas = doc["anio"], doc["mes"], doc["proyeccion_ton"]
+
+        totales = self.meses.setdefault(anio, {})
+        totales[mes] = totales.get(mes, 0.0) + toneladas
+
+        for banda in BANDAS:
+            if banda in doc:
+                por_banda = self.bandas.setdefault(anio, {}).setdefault(banda, {})
+                por_banda[mes] = por_banda.get(mes, 0.0) + doc[banda]
+
+        por_especie = self.especies.setdefault(anio, {}).setdefault(especie_nombre, {})
+        por_especie[mes] = por_especie.get(mes, 0.0) + toneladas
+
+    def documentos(self, run_id, expira_en) -> list[dict]:
+        return [
+            {
+                "_id": _id_resumen(run_id, anio),
+                "run_id": run_id,
+                "anio": anio,
+                "meses": {str(m): round(t, 2) for m, t in sorted(totales.items())},
+                "bandas": {
+                    banda: {str(m): round(t, 2) for m, t in sorted(meses.items())}
+                    for banda, meses in self.bandas.get(anio, {}).items()
+                },
+                "especies": [
+                    {
+                        "especie": especie,
+                        "meses": {str(m): t for m, t in sorted(meses.items())},
+                    }
+                    for especie, meses in sorted(self.especies[anio].items())
+                ],
+                "expira_en": expira_en,
+            }
+            for anio, totales in sorted(self.meses.items())
+        ]
 
 
 # ================================================================
@@ -103,124 +353,152 @@ from .client import llamar_microservicio_proyecciones
 #
 # Flujo completo:
 #   1) Obtiene histórico de producción desde MySQL (Django ORM).
-#      - Se agrupa por año/mes
+#      - Una sola consulta agrupada por especie/año/mes
 #      - Solo se consideran entradas
 #
-#   2) Por cada especie → llama al microservicio de proyecciones:
-#        llamar_microservicio_proyecciones()
+#   2) Llama al microservicio de proyecciones según
+#      settings.PROYECCIONES_MICRO_FORMATO:
+#        "json"     → una llamada por especie (formato original)
+#        "columnar" → lotes de especies en formato columnar
+#        "ndjson"   → una llamada en streaming, especie por especie
 #
-#      Este microservicio retorna un array con:
+#      En ambos casos se obtiene, por especie, un array con:
 #         {
 #             "anio": 2025,
 #             "mes": 2,
-#             "proyeccion_ton": 1234.56
+#             "proyeccion_ton": 1234.56,
+#             "p10": ..., "p50": ..., "p90": ...   (si hay intervalos)
 #         }
 #
-#   3) Se guardan/actualizan las proyecciones en MongoDB usando
-#      update_one(..., upsert=True), lo que permite:
-#        ✓ actualizar si existe
-#        ✓ crear si no existe
+#   3) Se insertan las proyecciones de cada especie en el almacén como
+#      registros NUEVOS de la corrida (una escritura en bloque por
+#      especie), a medida que llegan.
 #
-#   4) Imprime un log confirmando que todo fue exitoso.
+#      Al mismo tiempo se acumula un resumen por año (totales por
+#      mes + desglose por especie) que se guarda al final, para que
+#      el dashboard no tenga que agregar en cada carga.
+#
+#   4) La corrida se publica como vigente (ver publicar() en
+#      almacenes.py) SOLO si todas las especies con histórico se
+#      proyectaron. Si alguna falló (microservicio caído, lote
+#      rechazado, stream cortado, respuesta vacía), la corrida se
+#      marca "fallida" y se mantiene la anterior: publicarla haría
+#      desaparecer esas especies del dashboard y del planificador.
 #
 # Parámetros:
 #   - anio: si se quiere proyectar solo un año específico (opcional)
 #   - meses_a_proyectar: horizonte del microservicio
 #
+# Retorna el run_id publicado, o None si la corrida falló.
 # ================================================================
 def generar_proyecciones_automaticas(anio: int | None = None, meses_a_proyectar: int = 12):
 
-    # Selección de base Mongo
-    db = get_mongo_connection()
-    col_name = getattr(settings, "MONGO_COLLECTION_PROYECCIONES", "proyecciones")
-    col = db[col_name]
+    # Almacén configurado (Mongo o SQL, ver almacenes.py)
+    almacen = obtener_almacen()
 
-    # Todas las especies registradas en MySQL
-    especies = Especie.objects.all()
+    # ------------------------------------------------------------
+    # Registro de la corrida. Mientras está en curso, todo lo que
+    # escribe expira solo si el proceso no llega a publicarla.
+    # ------------------------------------------------------------
+    run_id = uuid.uuid4().hex
+    iniciada_en = timezone.now()
+    expira_en = iniciada_en + timedelta(
+        seconds=getattr(settings, "PROYECCIONES_TTL_CORRIDA_EN_CURSO", 24 * 3600)
+    )
+    modelo = getattr(settings, "PROYECCIONES_MODELO", "promedio")
 
-    for esp in especies:
+    almacen.iniciar_corrida({
+        "_id": run_id,
+        "estado": "en_curso",
+        "iniciada_en": iniciada_en,
+        "modelo": modelo,
+        "meses_a_proyectar": meses_a_proyectar,
+        "expira_en": expira_en,
+    })
 
-        # ------------------------------------------------------------
-        # 1. HISTÓRICO DESDE MYSQL (Django ORM)
-        #
-        #   Se obtienen SOLO movimientos de tipo "entrada".
-        #   Se agrupan por año y mes sumando peso total.
-        # ------------------------------------------------------------
-        qs = (
-            Maxisaco.objects.filter(especie=esp, tipo_movimiento="entrada")
-            .values("fecha_registro__year", "fecha_registro__month")
-            .annotate(toneladas=Sum("peso_kg"))
-            .order_by("fecha_registro__year", "fecha_registro__month")
-        )
+    # ------------------------------------------------------------
+    # 1. HISTÓRICO DESDE MYSQL (Django ORM)
+    #
+    #   Una única consulta para todas las especies, ya separada
+    #   en memoria por especie (ver _obtener_historicos_por_especie).
+    #
+    #   Especies sin histórico → se omiten.
+    # ------------------------------------------------------------
+    historicos = _obtener_historicos_por_especie()
+    especies = [esp for esp in Especie.objects.all() if esp.id in historicos]
 
-        # Convertir QuerySet a lista limpia
-        historico = [
-            {
-                "anio": row["fecha_registro__year"],
-                "mes": row["fecha_registro__month"],
-                "toneladas": float(row["toneladas"] or 0),
-            }
-            for row in qs
-            if row["toneladas"]  # excluir meses sin producción
-        ]
+    # ------------------------------------------------------------
+    # 2. LLAMADA AL MICROSERVICIO DE PROYECCIONES
+    #
+    # Este microservicio recibe TODO el historial y
+    # devuelve proyecciones hacia adelante.
+    # ------------------------------------------------------------
+    formato = getattr(settings, "PROYECCIONES_MICRO_FORMATO", "json")
+    if formato == "ndjson":
+        resultados = _proyectar_stream(especies, historicos, meses_a_proyectar)
+    elif formato == "columnar":
+        resultados = _proyectar_columnar(especies, historicos, meses_a_proyectar)
+    else:
+        resultados = _proyectar_json(especies, historicos, meses_a_proyectar)
 
-        # Si no hay histórico → saltar especie
-        if not historico:
-            continue
+    # ------------------------------------------------------------
+    # 3. GUARDAR PROYECCIONES DE LA CORRIDA
+    # ------------------------------------------------------------
+    proyectadas = set()
+    documentos = 0
+    acumulador = _AcumuladorResumen()
 
-        # ------------------------------------------------------------
-        # 2. LLAMADA AL MICROSERVICIO DE PROYECCIONES
-        #
-        # Este microservicio recibe TODO el historial y
-        # devuelve proyecciones hacia adelante.
-        #
-        # Si falla → se continúa con la siguiente especie.
-        # ------------------------------------------------------------
-        try:
-            respuesta = llamar_microservicio_proyecciones(
-                especie_nombre=esp.nombre,
-                historico=historico,
-                meses_a_proyectar=meses_a_proyectar,
-            )
-        except Exception as e:
-            print(f"[WARN] No se pudo llamar al microservicio para {esp.nombre}: {e}")
-            continue
+    for especie_nombre, proyecciones in resultados:
+        # Una especie sin proyección invalida la corrida: no tiene
+        # sentido seguir pidiendo y escribiendo las demás
+        if not proyecciones:
+            break
 
-        proyecciones = respuesta.get("proyecciones", [])
-
-        # ------------------------------------------------------------
-        # 3. GUARDAR PROYECCIONES EN MONGO
-        #
-        # Se utiliza:
-        #   update_one(filtro, {"$set": datos}, upsert=True)
-        #
-        # Esto garantiza:
-        #   ✓ si ya existe → se actualiza
-        #   ✓ si no existe → se crea el registro
-        # ------------------------------------------------------------
+        docs = []
         for p in proyecciones:
-            anio_p = int(p["anio"])
-            mes_p = int(p["mes"])
-            proy_ton = float(p["proyeccion_ton"])
-
-            col.update_one(
-                {
-                    "especie": esp.nombre,
-                    "anio": anio_p,
-                    "mes": mes_p,
-                },
-                {
-                    "$set": {
-                        "especie": esp.nombre,
-                        "anio": anio_p,
-                        "mes": mes_p,
-                        "proyeccion_ton": proy_ton,
-                    }
-                },
-                upsert=True,  # crea si no existe
-            )
+            doc = {
+                "run_id": run_id,
+                "especie": especie_nombre,
+                "anio": int(p["anio"]),
+                "mes": int(p["mes"]),
+                "proyeccion_ton": float(p["proyeccion_ton"]),
+                "expira_en": expira_en,
+            }
+            for banda in BANDAS:
+                if banda in p:
+                    doc[banda] = float(p[banda])
+            docs.append(doc)
+
+        almacen.guardar_proyecciones(docs)
+        for doc in docs:
+            acumulador.agregar(especie_nombre, doc)
+
+        proyectadas.add(especie_nombre)
+        documentos += len(docs)
+
+    resultados.close()
 
     # ------------------------------------------------------------
-    # 4. CONFIRMACIÓN EN CONSOLA (log)
+    # 4. PUBLICAR (o descartar) LA CORRIDA
     # ------------------------------------------------------------
-    print("Proyecciones actualizadas en MongoDB desde el microservicio.")
+    faltantes = [esp.nombre for esp in especies if esp.nombre not in proyectadas]
+    if faltantes or not especies:
+        almacen.marcar_fallida(run_id)
+        if faltantes:
+            print(
+                f"[WARN] Corrida {run_id} incompleta ({len(faltantes)} especies sin "
+                f"proyección: {', '.join(faltantes[:10])}); se mantiene la corrida vigente."
+            )
+        else:
+            print("[WARN] Ninguna especie proyectada; se mantiene la corrida vigente.")
+        return None
+
+    almacen.guardar_resumenes(acumulador.documentos(run_id, expira_en))
+
+    almacen.publicar(run_id, {
+        "especies": len(proyectadas),
+        "documentos": documentos,
+    })
+
+    print(f"Proyecciones publicadas (corrida {run_id}).")
+    return run_id
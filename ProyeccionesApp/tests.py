@@ -1,3 +1,1129 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock, skipIf
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import requests
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from EspecieApp.models import Especie
+from ProyeccionesApp import client, services
+from ProyeccionesApp.almacenes import AlmacenSQL, obtener_almacen
+from ProyeccionesApp.client import msgpack
+from ProyeccionesApp.models import CorridaProyeccion, Proyeccion, ResumenProyeccion
+from StockApp.models import Maxisaco
+from UsuariosApp.models import UsuariosModels
+
+
+MICROSERVICIO = Path(settings.BASE_DIR) / "microservicio_proyecciones"
+
+try:
+    import numpy as np
+except ImportError:  # el motor no está instalado en este entorno
+    np = None
+
+try:
+    from fastapi import HTTPException
+    from fastapi.testclient import TestClient
+except ImportError:  # el microservicio no está instalado en este entorno
+    TestClient = None
+
+
+# ===============================================================
+# MicroservicioTestCase
+#
+# Base de las pruebas del microservicio: la app FastAPI corre en
+# proceso con TestClient (sin red ni uvicorn).
+# ===============================================================
+@skipIf(TestClient is None, "fastapi no está instalado")
+class MicroservicioTestCase(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        # main.py importa sus módulos de forma plana (formato, cache, ...)
+        sys.path.insert(0, str(MICROSERVICIO))
+        cls.addClassCleanup(sys.path.remove, str(MICROSERVICIO))
+        cls.http = TestClient(importlib.import_module("main").app)
+
+
+# ===============================================================
+# ParidadModoLocalTests
+#
+# El modo local (PROYECCIONES_MODO = "local") debe entregar
+# exactamente lo mismo que el microservicio por HTTP, para todos
+# los modelos, con y sin bandas P10/P50/P90.
+# ===============================================================
+class ParidadModoLocalTests(MicroservicioTestCase):
+
+    # (especie, (anios, meses, toneladas)) como las arma services.py:
+    # con meses faltantes, largos distintos y una serie de un mes
+    SERIES = [
+        (
+            "Luga Roja",
+            (
+                [2022] * 12 + [2023] * 12 + [2024] * 5,
+                list(range(1, 13)) * 2 + [1, 2, 3, 5, 6],
+                [12.5 + 3 * (m % 12 == 0) + 0.4 * m for m in range(29)],
+            ),
+        ),
+        ("Chasca", ([2023, 2023, 2023, 2024], [4, 5, 9, 2], [3.0, 0.0, 4.25, 6.5])),
+        ("Huiro", ([2024], [6], [20.0])),
+    ]
+
+    def _lote_http(self, meses, modelo):
+        payload = client._payload_columnar(self.SERIES, meses, modelo)
+        resp = self.http.post("/api/proyectar/lote", json=payload)
+        self.assertEqual(resp.status_code, 200)
+        return dict(client._expandir_serie(s) for s in resp.json()["series"])
+
+    def _stream_http(self, meses, modelo):
+        payload = client._payload_columnar(self.SERIES, meses, modelo)
+        resp = self.http.post("/api/proyectar/stream", json=payload)
+        self.assertEqual(resp.status_code, 200)
+        return [
+            client._expandir_serie(json.loads(linea))
+            for linea in resp.text.splitlines() if linea
+        ]
+
+    def test_lote_y_stream(self):
+        for caminos in (0, 200):
+            for modelo in self.http.get("/api/modelos").json()["modelos"]:
+                with self.subTest(modelo=modelo, caminos=caminos), override_settings(
+                    PROYECCIONES_INTERVALOS_CAMINOS=caminos
+                ):
+                    esperado = self._lote_http(12, modelo)
+                    esperado_stream = self._stream_http(12, modelo)
+
+                    with override_settings(PROYECCIONES_MODO="local"):
+                        local = client.llamar_microservicio_proyecciones_lote(
+                            self.SERIES, 12, modelo
+                        )
+                        local_stream = list(client.iterar_microservicio_proyecciones_stream(
+                            self.SERIES, 12, modelo
+                        ))
+
+                    self.assertEqual(local, esperado)
+                    self.assertEqual(local_stream, esperado_stream)
+
+    def test_json_por_especie(self):
+        for especie, (anios, meses, toneladas) in self.SERIES:
+            historico = [
+                {"anio": a, "mes": m, "toneladas": t}
+                for a, m, t in zip(anios, meses, toneladas)
+            ]
+            payload = {
+                "especie": especie,
+                "historico": historico,
+                "meses_a_proyectar": 6,
+                "modelo": "holt_winters_aditivo",
+            }
+            with self.subTest(especie=especie):
+                resp = self.http.post("/api/proyectar", json=payload)
+                self.assertEqual(resp.status_code, 200)
+
+                with override_settings(PROYECCIONES_MODO="local"):
+                    local = client.llamar_microservicio_proyecciones(
+                        especie, historico, 6, "holt_winters_aditivo"
+                    )
+
+                self.assertEqual(local, resp.json())
+
+
+# ===============================================================
+# FormatoColumnarTests
+#
+# /api/proyectar/lote en JSON y msgpack entrega lo mismo que la
+# ruta original por especie (/api/proyectar), y un cuerpo columnar
+# mal formado se rechaza con 422 (no con un 500 de NumPy).
+# ===============================================================
+class FormatoColumnarTests(MicroservicioTestCase):
+
+    SERIES = ParidadModoLocalTests.SERIES
+
+    def _por_especie(self, meses, modelo):
+        resultado = {}
+        for especie, (anios, meses_hist, toneladas) in self.SERIES:
+            resp = self.http.post("/api/proyectar", json={
+                "especie": especie,
+                "historico": [
+                    {"anio": a, "mes": m, "toneladas": t}
+                    for a, m, t in zip(anios, meses_hist, toneladas)
+                ],
+                "meses_a_proyectar": meses,
+                "modelo": modelo,
+            })
+            self.assertEqual(resp.status_code, 200)
+            resultado[especie] = resp.json()["proyecciones"]
+        return resultado
+
+    def _lote(self, payload, tipo):
+        if tipo == "application/msgpack":
+            cuerpo = msgpack.packb(payload, use_bin_type=True)
+        else:
+            cuerpo = json.dumps(payload).encode("utf-8")
+        return self.http.post(
+            "/api/proyectar/lote", content=cuerpo, headers={"Content-Type": tipo, "Accept": tipo}
+        )
+
+    def test_ida_y_vuelta_json_y_msgpack(self):
+        tipos = ["application/json"] + (["application/msgpack"] if msgpack else [])
+        payload = {**client._payload_columnar(self.SERIES, 6, "holt_winters_aditivo"), "caminos": 0}
+        esperado = self._por_especie(6, "holt_winters_aditivo")
+
+        for tipo in tipos:
+            with self.subTest(tipo=tipo):
+                resp = self._lote(payload, tipo)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(resp.headers["content-type"].split(";")[0], tipo)
+
+                datos = client._decodificar(resp)
+                self.assertEqual(dict(map(client._expandir_serie, datos["series"])), esperado)
+
+    def test_toneladas_invalidas_422(self):
+        casos = [("application/json", t) for t in (["12.5", 3.0], [True, 3.0], [{"t": 1}], "12.5")]
+        if msgpack:
+            # JSON no transporta NaN / infinito, msgpack sí
+            casos += [
+                ("application/msgpack", t)
+                for t in (["12.5", 3.0], [float("nan"), 1.0], [1.0, float("inf")])
+            ]
+
+        for tipo, toneladas in casos:
+            payload = {
+                "meses_a_proyectar": 3,
+                "series": [{"especie": "Luga Roja", "inicio": [2024, 1], "toneladas": toneladas}],
+            }
+            with self.subTest(tipo=tipo, toneladas=toneladas):
+                resp = self._lote(payload, tipo)
+                self.assertEqual(resp.status_code, 422)
+                self.assertIn("toneladas", client._decodificar(resp)["detail"])
+
+    def test_cuerpo_no_objeto_422(self):
+        resp = self._lote([1, 2, 3], "application/json")
+        self.assertEqual(resp.status_code, 422)
+
+
+# ===============================================================
+# ModelosMotorTests
+#
+# Cada modelo vectorizado del motor (microservicio_proyecciones/
+# motor/modelos.py) contra una implementación escalar de
+# referencia, mes a mes y serie por serie, escrita aquí. Se
+# proyectan juntas series de largos distintos (menos de una
+# temporada, entre una y dos, y varias) con huecos y ceros, y cada
+# una por separado: el resultado no debe depender del lote.
+# ===============================================================
+@skipIf(np is None, "numpy no está instalado")
+class ModelosMotorTests(SimpleTestCase):
+
+    HORIZONTE = 15
+
+    SERIES = [
+        [5.0],
+        [4.0, None, 6.5, 7.0, 0.0, 3.0, 8.0],
+        [10.0 + (i % 5) for i in range(18)],
+        [20.0 + 6 * ((i % 12) in (0, 1, 2)) + 0.3 * i if i not in (7, 20) else None for i in range(30)],
+        [0.0 if i % 12 in (5, 6) else 12.0 + 4 * (i % 12 == 0) + 0.1 * i for i in range(40)],
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.motor = importlib.import_module("microservicio_proyecciones.motor")
+        cls.modelos = importlib.import_module("microservicio_proyecciones.motor.modelos")
+
+    # -----------------------------------------------------------
+    # Referencias escalares (huecos = 0, como rellenar_huecos)
+    # -----------------------------------------------------------
+    @staticmethod
+    def _rellenar(serie):
+        return [0.0 if v is None else v for v in serie]
+
+    def _promedio(self, serie, H):
+        datos = [v for v in serie if v is not None]
+        return [sum(datos) / len(datos) * 1.05] * H
+
+    def _estacional_ingenuo(self, serie, H):
+        y = self._rellenar(serie)
+        m = self.modelos.TEMPORADA
+        respaldo = sum(y) / len(y)
+        return [y[len(y) - m + h % m] if len(y) - m + h % m >= 0 else respaldo for h in range(H)]
+
+    def _tendencia_lineal(self, serie, H):
+        y = self._rellenar(serie)
+        L = len(y)
+        if L == 1:
+            return [y[0]] * H
+        xm, ym = (L - 1) / 2, sum(y) / L
+        b = sum((x - xm) * (v - ym) for x, v in enumerate(y)) / sum((x - xm) ** 2 for x in range(L))
+        a = ym - b * xm
+        return [a + b * (L - 1 + h) for h in range(1, H + 1)]
+
+    def _holt_winters(self, serie, H, multiplicativo):
+        m = self.modelos.TEMPORADA
+        if len(serie) < 2 * m:
+            return self._tendencia_lineal(serie, H)
+
+        eps, piso = self.modelos._EPS, self.modelos._ESTACION_MIN
+        p = self.modelos.PARAMETROS_HW
+        alpha, beta, gamma = p["alpha"], p["beta"], p["gamma"]
+
+        y = self._rellenar(serie)
+        if multiplicativo:
+            y = [max(v, eps) for v in y]
+
+        nivel = sum(y[:m]) / m
+        tendencia = (sum(y[m:2 * m]) / m - nivel) / m
+        if multiplicativo:
+            estacion = [max(v / max(nivel, eps), piso) for v in y[:m]]
+        else:
+            estacion = [v - nivel for v in y[:m]]
+
+        for t in range(m, len(y)):
+            s = estacion[t % m]
+            if multiplicativo:
+                nuevo = max(alpha * (y[t] / s) + (1 - alpha) * (nivel + tendencia), eps)
+                estacion[t % m] = max(gamma * (y[t] / nuevo) + (1 - gamma) * s, piso)
+            else:
+                nuevo = alpha * (y[t] - s) + (1 - alpha) * (nivel + tendencia)
+                estacion[t % m] = gamma * (y[t] - nuevo) + (1 - gamma) * s
+            tendencia = beta * (nuevo - nivel) + (1 - beta) * tendencia
+            nivel = nuevo
+
+        resultado = []
+        for h in range(1, H + 1):
+            s = estacion[(len(y) + h - 1) % m]
+            base = nivel + tendencia * h
+            resultado.append(base * s if multiplicativo else base + s)
+        return resultado
+
+    def _referencia(self, modelo, serie, H):
+        referencias = {
+            "promedio": self._promedio,
+            "estacional_ingenuo": self._estacional_ingenuo,
+            "tendencia_lineal": self._tendencia_lineal,
+            "holt_winters_aditivo": lambda s, H: self._holt_winters(s, H, False),
+            "holt_winters_multiplicativo": lambda s, H: self._holt_winters(s, H, True),
+        }
+        # proyectar() recorta a valores no negativos
+        return [max(v, 0.0) for v in referencias[modelo](serie, H)]
+
+    def test_modelos_contra_referencia_escalar(self):
+        self.assertEqual(
+            set(self.motor.MODELOS),
+            {"promedio", "estacional_ingenuo", "tendencia_lineal",
+             "holt_winters_aditivo", "holt_winters_multiplicativo"},
+        )
+        H = self.HORIZONTE
+        Y, inicio = self.motor.construir_matriz(self.SERIES)
+
+        for modelo in self.motor.MODELOS:
+            lote = self.motor.proyectar(Y, inicio, H, modelo).pronostico
+            self.assertEqual(lote.shape, (len(self.SERIES), H))
+
+            for i, serie in enumerate(self.SERIES):
+                with self.subTest(modelo=modelo, largo=len(serie)):
+                    esperado = self._referencia(modelo, serie, H)
+                    np.testing.assert_allclose(lote[i], esperado, rtol=1e-9, atol=1e-9)
+
+                    Y1, inicio1 = self.motor.construir_matriz([serie])
+                    sola = self.motor.proyectar(Y1, inicio1, H, modelo).pronostico[0]
+                    np.testing.assert_allclose(sola, lote[i], rtol=1e-12, atol=1e-12)
+
+    def test_multiplicativo_con_ceros_es_finito(self):
+        # Temporadas completas de ceros y un mes inicial en cero
+        serie = [0.0] * 12 + [5.0 + i % 3 for i in range(12)] + [0.0, 0.0, 7.0] * 4
+        Y, inicio = self.motor.construir_matriz([serie])
+
+        ajuste = self.motor.proyectar(Y, inicio, self.HORIZONTE, "holt_winters_multiplicativo")
+
+        self.assertTrue(np.isfinite(ajuste.pronostico).all())
+        self.assertTrue((ajuste.pronostico >= 0).all())
+        np.testing.assert_allclose(
+            ajuste.pronostico[0],
+            self._referencia("holt_winters_multiplicativo", serie, self.HORIZONTE),
+            rtol=1e-9, atol=1e-9,
+        )
+
+
+# ===============================================================
+# BacktestTests
+#
+# Backtesting con origen móvil (motor/validacion.py y
+# POST /api/backtest): cada corte se entrena solo con los meses
+# anteriores a su origen, y los errores coinciden con un caso
+# calculado a mano.
+# ===============================================================
+class BacktestTests(MicroservicioTestCase):
+
+    def test_cortes_sin_mirar_el_futuro(self):
+        motor = importlib.import_module("microservicio_proyecciones.motor")
+        series = [
+            [4.0, None, 6.5, 7.0, 0.0, 3.0, 8.0, 9.5, None, 4.0, 6.0, 7.5, 8.0, 2.0],
+            [10.0 + i % 4 for i in range(20)],
+            [1.0, 2.0, 3.0],
+        ]
+        Y, inicio = motor.construir_matriz(series)
+        horizonte, minimo = 2, 3
+
+        X, inicio_filas, real, especie = motor.apilar_cortes(Y, inicio, horizonte, minimo)
+        T = Y.shape[1]
+        cortes = np.bincount(especie, minlength=len(series))
+        self.assertEqual(list(cortes), [max(len(s) - horizonte - minimo + 1, 0) for s in series])
+
+        for modelo in motor.MODELOS:
+            pronostico = motor.proyectar(X, inicio_filas, horizonte, modelo).pronostico
+
+            for r, i in enumerate(especie):
+                # Meses de entrenamiento del corte = posición de su origen
+                serie = series[i]
+                entrenamiento = serie[:T - int(inicio_filas[r])]
+
+                with self.subTest(modelo=modelo, especie=int(i), origen=len(entrenamiento)):
+                    # Solo el pasado, tal como existía en el origen
+                    self.assertGreaterEqual(len(entrenamiento), minimo)
+                    futuro = [0.0 if v is None else v for v in serie[len(entrenamiento):]]
+                    self.assertEqual(list(real[r]), futuro[:horizonte])
+
+                    # Mismo pronóstico que con el futuro físicamente ausente
+                    Y1, inicio1 = motor.construir_matriz([entrenamiento])
+                    esperado = motor.proyectar(Y1, inicio1, horizonte, modelo).pronostico[0]
+                    np.testing.assert_allclose(pronostico[r], esperado, rtol=1e-12, atol=1e-12)
+
+    def test_errores_caso_a_mano(self):
+        # promedio = media del entrenamiento × 1.05, horizonte 1:
+        #
+        #   A = [2, 4, 6, 8, 10], mín. 2 meses → cortes en 2, 3 y 4
+        #     3.15 vs 6 (2.85)   4.20 vs 8 (3.80)   5.25 vs 10 (4.75)
+        #     MAE = 11.4 / 3 = 3.8      MAPE = 47.5 (0.475 en los tres)
+        #
+        #   B = [5, 5, 0, 5] → cortes en 2 y 3
+        #     5.25 vs 0 (5.25, fuera del MAPE)   3.5 vs 5 (1.5, 30%)
+        #     MAE = 3.375               MAPE = 30.0
+        #
+        #   Global: MAE = 18.15 / 5 = 3.63   MAPE = 1.725 / 4 = 43.125%
+        payload = {
+            "series": [
+                {"especie": "A", "inicio": [2024, 1], "toneladas": [2, 4, 6, 8, 10]},
+                {"especie": "B", "inicio": [2024, 2], "toneladas": [5, 5, 0, 5]},
+            ],
+            "horizonte": 1,
+            "min_entrenamiento": 2,
+            "modelos": ["promedio"],
+        }
+        resp = self.http.post("/api/backtest", json=payload)
+        self.assertEqual(resp.status_code, 200)
+        datos = resp.json()
+
+        self.assertEqual(datos["modelos"]["promedio"], {"mae": 3.63, "mape": 43.125})
+        a, b = datos["especies"]
+        self.assertEqual((a["cortes"], a["modelos"]["promedio"]), (3, {"mae": 3.8, "mape": 47.5}))
+        self.assertEqual((b["cortes"], b["modelos"]["promedio"]), (2, {"mae": 3.375, "mape": 30.0}))
+
+
+# ===============================================================
+# IntervalosTests
+#
+# Bandas P10/P50/P90 por bootstrap (motor/intervalos.py): cubren
+# lo que deben, son deterministas, partir el lote en bloques no
+# cambia los números, y MIN_CAMINOS nunca pasa por encima de
+# MAX_ELEMENTOS. Local y HTTP aplican el mismo tope de caminos.
+# ===============================================================
+class IntervalosTests(MicroservicioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.motor = importlib.import_module("microservicio_proyecciones.motor")
+        cls.intervalos = importlib.import_module("microservicio_proyecciones.motor.intervalos")
+
+    def test_cobertura_p10_p90(self):
+        # Nivel fijo + ruido normal: el futuro sale de la misma
+        # distribución, así que ~80 % debe caer entre P10 y P90
+        rng = np.random.default_rng(7)
+        n, largo, horizonte = 60, 120, 12
+        niveles = rng.uniform(50, 150, size=(n, 1))
+        historico = niveles + rng.normal(0, 10, size=(n, largo))
+        futuro = niveles + rng.normal(0, 10, size=(n, horizonte))
+
+        Y, inicio = self.motor.construir_matriz(historico.tolist())
+        _, (p10, p50, p90) = self.motor.simular_intervalos(Y, inicio, horizonte, caminos=1000)
+
+        self.assertTrue(np.all(p10 <= p50) and np.all(p50 <= p90))
+        cobertura = np.mean((futuro >= p10) & (futuro <= p90))
+        self.assertGreater(cobertura, 0.72)
+        self.assertLess(cobertura, 0.88)
+
+    def test_deterministas_y_bloques_equivalentes(self):
+        Y, inicio = self.motor.construir_matriz(ModelosMotorTests.SERIES)
+        H, caminos = 12, 300
+
+        for modelo in ("promedio", "holt_winters_aditivo"):
+            with self.subTest(modelo=modelo):
+                _, bandas = self.motor.simular_intervalos(Y, inicio, H, modelo, caminos)
+                _, repetidas = self.motor.simular_intervalos(Y, inicio, H, modelo, caminos)
+                np.testing.assert_array_equal(bandas, repetidas)
+
+                # Tope de dos series por bloque: mismos sorteos, mismas bandas
+                _, en_bloques = self.motor.simular_intervalos(
+                    Y, inicio, H, modelo, caminos, max_elementos=2 * caminos * H
+                )
+                np.testing.assert_array_equal(bandas, en_bloques)
+
+                _, otra_semilla = self.motor.simular_intervalos(Y, inicio, H, modelo, caminos, semilla=1)
+                self.assertFalse(np.array_equal(bandas, otra_semilla))
+
+    def test_min_caminos_respeta_max_elementos(self):
+        caminos_efectivos = self.motor.caminos_efectivos
+        MIN, MAX = self.intervalos.MIN_CAMINOS, self.intervalos.MAX_ELEMENTOS
+
+        self.assertEqual(caminos_efectivos(1000, 12), 1000)
+        self.assertEqual(caminos_efectivos(10, 12), MIN)
+        self.assertEqual(caminos_efectivos(10_000, 1000), MAX // 1000)
+        self.assertEqual(caminos_efectivos(1, MAX // MIN), MIN)
+        with self.assertRaises(self.motor.SimulacionExcesiva):
+            caminos_efectivos(1000, MAX // MIN + 1)
+
+        # Ningún bloque supera el tope, aunque el lote sea grande
+        generador = np.random.default_rng
+        tamanos = []
+
+        class Registro:
+            def __init__(self, semilla):
+                self.rng = generador(semilla)
+
+            def random(self, forma):
+                tamanos.append(forma[0] * forma[1])
+                return self.rng.random(forma)
+
+        Y, inicio = self.motor.construir_matriz([[1.0, 2.0, 3.0]] * 50)
+        with mock.patch.object(self.intervalos.np.random, "default_rng", Registro):
+            self.motor.simular_intervalos(Y, inicio, 20, caminos=100, max_elementos=10_000)
+        self.assertEqual(len(tamanos), 10)
+        self.assertTrue(all(t <= 10_000 for t in tamanos))
+
+    def test_horizonte_excesivo_422(self):
+        payload = {
+            "meses_a_proyectar": self.intervalos.MAX_ELEMENTOS // self.intervalos.MIN_CAMINOS + 1,
+            "modelo": "promedio",
+            "caminos": 100,
+            "series": [{"especie": "Huiro", "inicio": [2024, 6], "toneladas": [20.0]}],
+        }
+        for ruta in ("/api/proyectar/lote", "/api/proyectar/stream"):
+            with self.subTest(ruta=ruta):
+                self.assertEqual(self.http.post(ruta, json=payload).status_code, 422)
+
+    def test_tope_de_caminos_igual_en_local_y_http(self):
+        main = importlib.import_module("main")
+        series = ParidadModoLocalTests.SERIES
+
+        with override_settings(
+            PROYECCIONES_INTERVALOS_CAMINOS=main.MAX_CAMINOS + 500,
+            PROYECCIONES_MAX_CAMINOS=main.MAX_CAMINOS,
+        ):
+            resp = self.http.post("/api/proyectar/lote", json=client._payload_columnar(series, 6, "promedio"))
+            esperado = dict(client._expandir_serie(s) for s in resp.json()["series"])
+
+            with override_settings(PROYECCIONES_MODO="local"):
+                local = client.llamar_microservicio_proyecciones_lote(series, 6, "promedio")
+
+        self.assertEqual(local, esperado)
+
+
+# ===============================================================
+# StreamTests
+#
+# iterar_microservicio_proyecciones_stream() contra la app del
+# microservicio en proceso: la sesión HTTP del cliente se
+# reemplaza por una que envía el request a TestClient y entrega el
+# cuerpo NDJSON como un archivo que se lee por partes (igual que
+# requests con stream=True), opcionalmente cortado.
+# ===============================================================
+class _SesionTestClient:
+
+    def __init__(self, http, corte=None):
+        self.http = http
+        self.corte = corte
+        self.cuerpo = None
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        r = self.http.post(urlsplit(url).path, content=data, headers=headers)
+
+        contenido = r.content if self.corte is None else self.corte(r.content)
+        self.cuerpo = io.BytesIO(contenido)
+
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp.headers.update(r.headers)
+        resp.url = url
+        resp.raw = self.cuerpo
+        return resp
+
+
+@override_settings(
+    PROYECCIONES_MODO="http",
+    PROYECCIONES_MICRO_CODIFICACION="json",
+    PROYECCIONES_MICRO_REINTENTOS=0,
+    PROYECCIONES_INTERVALOS_CAMINOS=0,
+)
+class StreamTests(MicroservicioTestCase):
+
+    SERIES = [
+        (f"Especie {i}", ([2023] * 12 + [2024] * 6, list(range(1, 13)) + list(range(1, 7)),
+                          [10.0 + i + (m % 4) for m in range(18)]))
+        for i in range(40)
+    ]
+
+    def _usar(self, sesion):
+        breaker = client._CircuitBreaker(umbral_fallos=3, tiempo_apertura=30)
+        for nombre, valor in (("_sesion", sesion), ("_breaker", breaker)):
+            parche = mock.patch.object(client, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+        return sesion
+
+    def _iterar(self):
+        return client.iterar_microservicio_proyecciones_stream(self.SERIES, 6, "promedio")
+
+    def test_consumo_incremental(self):
+        sesion = self._usar(_SesionTestClient(self.http))
+        esperado = client.llamar_microservicio_proyecciones_lote(self.SERIES, 6, "promedio")
+
+        especies = self._iterar()
+        primera = next(especies)
+
+        # La primera especie se entrega sin haber leído todo el cuerpo
+        self.assertEqual(primera, ("Especie 0", esperado["Especie 0"]))
+        self.assertLess(sesion.cuerpo.tell(), len(sesion.cuerpo.getvalue()))
+
+        resto = list(especies)
+        self.assertEqual(dict([primera] + resto), esperado)
+
+    def test_corte_a_mitad_de_linea(self):
+        # El cuerpo termina en medio de la línea de la especie 5
+        def corte(cuerpo):
+            lineas = cuerpo.split(b"\n")
+            return b"\n".join(lineas[:5]) + b"\n" + lineas[5][:20]
+
+        self._usar(_SesionTestClient(self.http, corte))
+        recibidas = []
+        with self.assertRaises(client.StreamInterrumpido):
+            for especie, _ in self._iterar():
+                recibidas.append(especie)
+
+        self.assertEqual(recibidas, [f"Especie {i}" for i in range(5)])
+
+    def test_corte_entre_lineas(self):
+        # Sin marca de error: solo faltan especies
+        def corte(cuerpo):
+            return b"".join(cuerpo.splitlines(keepends=True)[:7])
+
+        self._usar(_SesionTestClient(self.http, corte))
+        recibidas = []
+        with self.assertRaisesRegex(client.StreamInterrumpido, "7 de 40"):
+            for especie, _ in self._iterar():
+                recibidas.append(especie)
+
+        self.assertEqual(len(recibidas), 7)
+
+    def test_error_informado_por_el_servicio(self):
+        main = importlib.import_module("main")
+        original = main.ejecucion.ajustar_lote
+        llamadas = []
+
+        async def saturado_en_el_segundo_bloque(*args, **kwargs):
+            llamadas.append(1)
+            if len(llamadas) == 2:
+                raise HTTPException(status_code=429, detail="Microservicio saturado")
+            return await original(*args, **kwargs)
+
+        self._usar(_SesionTestClient(self.http))
+        with mock.patch.object(main, "BLOQUE_STREAM", 10), \
+                mock.patch.object(main.cache_proyecciones, "obtener", lambda clave: None), \
+                mock.patch.object(main.ejecucion, "ajustar_lote", saturado_en_el_segundo_bloque):
+            recibidas = []
+            with self.assertRaisesRegex(client.StreamInterrumpido, "saturado"):
+                for especie, _ in self._iterar():
+                    recibidas.append(especie)
+
+        self.assertEqual(len(recibidas), 10)
+
+
+# ===============================================================
+# MetricasTests
+#
+# GET /metrics expone, en formato de texto Prometheus válido, el
+# histograma de latencia por ruta, el hit ratio de la caché y los
+# medidores de requests en curso / ajustes en cola.
+# ===============================================================
+class MetricasTests(MicroservicioTestCase):
+
+    # nombre{etiquetas} valor   (valor: float, +Inf, -Inf o NaN)
+    MUESTRA = re.compile(
+        r'^(?P<nombre>[a-zA-Z_:][a-zA-Z0-9_:]*)'
+        r'(?:\{(?P<etiquetas>[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*"'
+        r'(?:,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*")*)?\})?'
+        r' (?P<valor>[-+]?(?:\d+\.?\d*(?:[eE][-+]?\d+)?|Inf|NaN))$'
+    )
+    COMENTARIO = re.compile(
+        r"^# (?:HELP [a-zA-Z_:][a-zA-Z0-9_:]* .+"
+        r"|TYPE [a-zA-Z_:][a-zA-Z0-9_:]* (?:counter|gauge|histogram))$"
+    )
+
+    def _muestras(self, texto):
+        tipos, muestras = {}, []
+        for linea in texto.splitlines():
+            if linea.startswith("#"):
+                self.assertRegex(linea, self.COMENTARIO)
+                partes = linea.split(" ")
+                if partes[1] == "TYPE":
+                    tipos[partes[2]] = partes[3]
+                continue
+
+            m = self.MUESTRA.match(linea)
+            self.assertIsNotNone(m, f"línea inválida: {linea!r}")
+            etiquetas = dict(
+                re.findall(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"', m["etiquetas"] or "")
+            )
+            muestras.append((m["nombre"], etiquetas, float(m["valor"].replace("Inf", "inf"))))
+        return tipos, muestras
+
+    def test_exporta_formato_prometheus(self):
+        payload = client._payload_columnar(ParidadModoLocalTests.SERIES, 6, "promedio")
+        for _ in range(2):  # la segunda vez, desde la caché
+            self.assertEqual(self.http.post("/api/proyectar/lote", json=payload).status_code, 200)
+
+        resp = self.http.get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertTrue(resp.text.endswith("\n"))
+
+        tipos, muestras = self._muestras(resp.text)
+        self.assertEqual(tipos["proyecciones_http_request_duration_seconds"], "histogram")
+        self.assertEqual(tipos["proyecciones_cache_hit_ratio"], "gauge")
+        self.assertEqual(tipos["proyecciones_http_requests_in_flight"], "gauge")
+        self.assertEqual(tipos["proyecciones_ajustes_en_cola"], "gauge")
+
+        # Toda muestra pertenece a una métrica declarada con # TYPE
+        for nombre, _, _ in muestras:
+            base = re.sub(r"_(bucket|sum|count)$", "", nombre)
+            self.assertTrue(nombre in tipos or tipos.get(base) == "histogram", nombre)
+
+        # Histograma de la ruta: buckets acumulados, +Inf = _count
+        ruta = {"ruta": "/api/proyectar/lote", "metodo": "POST"}
+        buckets = [
+            (e["le"], v) for n, e, v in muestras
+            if n == "proyecciones_http_request_duration_seconds_bucket"
+            and {k: e[k] for k in ruta if k in e} == ruta
+        ]
+        self.assertEqual(buckets[-1][0], "+Inf")
+        limites = [float(le.replace("Inf", "inf")) for le, _ in buckets]
+        self.assertEqual(limites, sorted(limites))
+        acumulados = [v for _, v in buckets]
+        self.assertEqual(acumulados, sorted(acumulados))
+
+        [total] = [
+            v for n, e, v in muestras
+            if n == "proyecciones_http_request_duration_seconds_count" and e == ruta
+        ]
+        self.assertEqual(acumulados[-1], total)
+        self.assertGreaterEqual(total, 2)
+
+        valores = {n: v for n, e, v in muestras if not e}
+        self.assertGreater(valores["proyecciones_cache_hit_ratio"], 0)
+        self.assertLessEqual(valores["proyecciones_cache_hit_ratio"], 1)
+        # El propio GET /metrics está en curso al exportar
+        self.assertEqual(valores["proyecciones_http_requests_in_flight"], 1)
+        self.assertEqual(valores["proyecciones_ajustes_en_cola"], 0)
+
+
+# ===============================================================
+# CacheProyeccionesTests
+#
+# Caché LRU + TTL del microservicio (microservicio_proyecciones/
+# cache.py): orden de desalojo, expiración y la huella usada como
+# clave. Una huella que no cambie con el histórico o con los
+# parámetros devolvería proyecciones viejas.
+# ===============================================================
+@skipIf(np is None, "numpy no está instalado")
+class CacheProyeccionesTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cache = importlib.import_module("microservicio_proyecciones.cache")
+
+    def setUp(self):
+        self.ahora = 1000.0
+        parche = mock.patch.object(self.cache.time, "monotonic", lambda: self.ahora)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_desaloja_el_menos_usado(self):
+        c = self.cache.CacheProyecciones(capacidad=3, ttl=60)
+        for clave in "abc":
+            c.guardar(clave, clave.upper())
+
+        c.obtener("a")            # "a" pasa a ser la más reciente
+        c.guardar("d", "D")       # desaloja "b"
+        c.guardar("c", "C2")      # actualizar también cuenta como uso
+        c.guardar("e", "E")       # desaloja "a"
+
+        self.assertIsNone(c.obtener("b"))
+        self.assertIsNone(c.obtener("a"))
+        self.assertEqual([c.obtener(k) for k in "cde"], ["C2", "D", "E"])
+        self.assertEqual(c.estadisticas()["desalojadas"], 2)
+        self.assertEqual(c.estadisticas()["entradas"], 3)
+
+    def test_expira_tras_el_ttl(self):
+        c = self.cache.CacheProyecciones(capacidad=10, ttl=60)
+        c.guardar("a", 1)
+
+        self.ahora += 60
+        self.assertEqual(c.obtener("a"), 1)
+
+        # Leer no renueva el TTL: cuenta desde que se guardó
+        self.ahora += 0.5
+        self.assertIsNone(c.obtener("a"))
+
+        stats = c.estadisticas()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expiradas"]), (1, 1, 1))
+        self.assertEqual(stats["entradas"], 0)
+
+        c.guardar("a", 2)
+        self.assertEqual(c.obtener("a"), 2)
+
+    def test_huella_cambia_con_historico_y_parametros(self):
+        base = ("Luga Roja", 2024, 3, [12.5, None, 8.0], 12, "promedio", 0)
+        huella = self.cache.huella
+
+        # Estable: mismos datos (y listas distintas) → misma clave
+        self.assertEqual(huella(*base), huella(*base[:3], list(base[3]), *base[4:]))
+        self.assertEqual(huella(*base), huella(*base[:3], [12.5, None, 8], *base[4:]))
+
+        variantes = {
+            "especie": ("Chasca",) + base[1:],
+            "anio": base[:1] + (2023,) + base[2:],
+            "mes": base[:2] + (4,) + base[3:],
+            "valor": base[:3] + ([12.5, None, 8.01],) + base[4:],
+            "hueco_vs_cero": base[:3] + ([12.5, 0.0, 8.0],) + base[4:],
+            "mes_extra": base[:3] + ([12.5, None, 8.0, 1.0],) + base[4:],
+            "horizonte": base[:4] + (6,) + base[5:],
+            "modelo": base[:5] + ("holt_winters_aditivo",) + base[6:],
+            "caminos": base[:6] + (1000,),
+        }
+        claves = {nombre: huella(*args) for nombre, args in variantes.items()}
+        claves["base"] = huella(*base)
+
+        self.assertEqual(len(set(claves.values())), len(claves))
+
+
+# ===============================================================
+# CircuitBreakerTests
+#
+# Transiciones del circuit breaker de _post_con_reintentos() con
+# una sesión falsa (sin red): abre tras el umbral, deja pasar UNA
+# llamada de prueba, se cierra si la prueba resulta bien y un 429
+# (servicio saturado) no lo abre.
+# ===============================================================
+@override_settings(PROYECCIONES_MICRO_REINTENTOS=0, PROYECCIONES_MICRO_BACKOFF=0)
+class CircuitBreakerTests(SimpleTestCase):
+
+    URL = "http://micro/api/proyectar/lote"
+
+    def setUp(self):
+        self.sesion = mock.Mock()
+        self.breaker = client._CircuitBreaker(umbral_fallos=3, tiempo_apertura=30)
+
+        for nombre, valor in (("_sesion", self.sesion), ("_breaker", self.breaker)):
+            parche = mock.patch.object(client, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def _respuesta(self, estado):
+        resp = requests.Response()
+        resp.status_code = estado
+        resp.url = self.URL
+        return resp
+
+    def _vencer_apertura(self):
+        self.breaker.abierto_desde -= self.breaker.tiempo_apertura + 1
+
+    def _abrir(self):
+        self.sesion.post.side_effect = requests.ConnectionError("caído")
+        for _ in range(self.breaker.umbral_fallos):
+            with self.assertRaises(requests.ConnectionError):
+                client._post_con_reintentos(self.URL)
+
+    def test_abre_tras_el_umbral(self):
+        self._abrir()
+        self.assertEqual(self.breaker.estado, "abierto")
+
+        self.sesion.post.reset_mock()
+        with self.assertRaises(client.MicroservicioNoDisponible):
+            client._post_con_reintentos(self.URL)
+        self.sesion.post.assert_not_called()
+
+    def test_una_sola_llamada_de_prueba(self):
+        self._abrir()
+        self._vencer_apertura()
+
+        self.assertTrue(self.breaker.permitir())
+        self.assertEqual(self.breaker.estado, "semiabierto")
+        self.assertFalse(self.breaker.permitir())
+
+    def test_prueba_exitosa_cierra(self):
+        self._abrir()
+        self._vencer_apertura()
+
+        self.sesion.post.side_effect = None
+        self.sesion.post.return_value = self._respuesta(200)
+        client._post_con_reintentos(self.URL)
+
+        self.assertEqual(self.breaker.estado, "cerrado")
+        self.assertEqual(self.breaker.fallos, 0)
+
+    def test_prueba_fallida_reabre(self):
+        self._abrir()
+        self._vencer_apertura()
+
+        with self.assertRaises(requests.ConnectionError):
+            client._post_con_reintentos(self.URL)
+        self.assertEqual(self.breaker.estado, "abierto")
+
+    def test_error_no_http_no_deja_semiabierto(self):
+        self._abrir()
+        self._vencer_apertura()
+
+        self.sesion.post.side_effect = RuntimeError("fallo del adaptador")
+        with self.assertRaises(RuntimeError):
+            client._post_con_reintentos(self.URL)
+
+        # Vuelve a "abierto" (con su tiempo de espera), no queda
+        # bloqueado en "semiabierto"
+        self.assertEqual(self.breaker.estado, "abierto")
+        self._vencer_apertura()
+        self.assertTrue(self.breaker.permitir())
+
+    def test_429_no_abre(self):
+        self.sesion.post.return_value = self._respuesta(429)
+        for _ in range(self.breaker.umbral_fallos + 2):
+            with self.assertRaises(requests.HTTPError):
+                client._post_con_reintentos(self.URL)
+
+        self.assertEqual(self.breaker.estado, "cerrado")
+
+
+# ===============================================================
+# CorridaCompletaTests
+#
+# generar_proyecciones_automaticas() publica una corrida SOLO si
+# todas las especies con histórico quedaron proyectadas; si una
+# falla (en cualquiera de los tres formatos) la corrida queda
+# "fallida" y la vigente sigue siendo la anterior, completa.
+# ===============================================================
+@skipIf(np is None, "numpy no está instalado")
+@override_settings(
+    PROYECCIONES_ALMACEN="sql",
+    PROYECCIONES_MODO="local",
+    PROYECCIONES_MICRO_FORMATO="columnar",
+    PROYECCIONES_MICRO_LOTE=1,
+    PROYECCIONES_INTERVALOS_CAMINOS=0,
+)
+class CorridaCompletaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = UsuariosModels.objects.get(Username="Admin")
+        for nombre in ("Luga Roja", "Chasca"):
+            especie = Especie.objects.create(nombre=nombre, proporcion_conversion=0.2)
+            for mes in range(1, 7):
+                maxisaco = Maxisaco.objects.create(
+                    especie=especie, peso_kg=100 + mes, tipo_movimiento="entrada",
+                    registrado_por=admin,
+                )
+                Maxisaco.objects.filter(pk=maxisaco.pk).update(
+                    fecha_registro=timezone.make_aware(datetime(2025, mes, 10))
+                )
+
+    def setUp(self):
+        self.almacen = obtener_almacen()
+        self.vigente = services.generar_proyecciones_automaticas(meses_a_proyectar=6)
+        self.assertIsNotNone(self.vigente)
+
+    def _assert_se_mantiene_la_vigente(self, run_id):
+        self.assertIsNone(run_id)
+        self.assertEqual(self.almacen.corrida_vigente(), self.vigente)
+
+        fallida = CorridaProyeccion.objects.exclude(run_id=self.vigente).get()
+        self.assertEqual(fallida.estado, "fallida")
+
+        especies = set(
+            Proyeccion.objects.filter(corrida__estado="vigente").values_list("especie", flat=True)
+        )
+        self.assertEqual(especies, {"Luga Roja", "Chasca"})
+
+    def test_corrida_completa_se_publica(self):
+        self.assertEqual(
+            CorridaProyeccion.objects.get(run_id=self.vigente).especies, 2
+        )
+
+        nueva = services.generar_proyecciones_automaticas(meses_a_proyectar=6)
+        self.assertEqual(self.almacen.corrida_vigente(), nueva)
+        self.assertEqual(
+            CorridaProyeccion.objects.get(run_id=self.vigente).estado, "reemplazada"
+        )
+
+    def test_lote_columnar_fallido(self):
+        original = services.llamar_microservicio_proyecciones_lote
+
+        def falla_chasca(series, **kwargs):
+            if series[0][0] == "Chasca":
+                raise requests.ConnectionError("caído")
+            return original(series, **kwargs)
+
+        with mock.patch.object(services, "llamar_microservicio_proyecciones_lote", falla_chasca):
+            self._assert_se_mantiene_la_vigente(
+                services.generar_proyecciones_automaticas(meses_a_proyectar=6)
+            )
+
+    def test_especie_json_fallida(self):
+        original = services.llamar_microservicio_proyecciones
+
+        def falla_luga(especie_nombre, **kwargs):
+            if especie_nombre == "Luga Roja":
+                raise requests.Timeout("lento")
+            return original(especie_nombre, **kwargs)
+
+        with override_settings(PROYECCIONES_MICRO_FORMATO="json"), \
+                mock.patch.object(services, "llamar_microservicio_proyecciones", falla_luga):
+            self._assert_se_mantiene_la_vigente(
+                services.generar_proyecciones_automaticas(meses_a_proyectar=6)
+            )
+
+    def test_stream_cortado(self):
+        original = services.iterar_microservicio_proyecciones_stream
+
+        def corta_tras_la_primera(series, **kwargs):
+            yield next(original(series, **kwargs))
+            raise client.StreamInterrumpido("conexión cortada")
+
+        with override_settings(PROYECCIONES_MICRO_FORMATO="ndjson"), \
+                mock.patch.object(services, "iterar_microservicio_proyecciones_stream", corta_tras_la_primera):
+            self._assert_se_mantiene_la_vigente(
+                services.generar_proyecciones_automaticas(meses_a_proyectar=6)
+            )
+
+
+# ===============================================================
+# AlmacenSQLTests
+#
+# Ciclo de corridas de AlmacenSQL: una corrida sin publicar nunca
+# es visible, publicar cambia la vigente en una sola transacción y
+# la purga borra lo vencido sin tocar la vigente.
+# ===============================================================
+@override_settings(PROYECCIONES_RETENCION_CORRIDAS=3600)
+class AlmacenSQLTests(TestCase):
+
+    def setUp(self):
+        self.almacen = AlmacenSQL()
+
+    def _corrida(self, run_id, toneladas, expira_en=None):
+        ahora = timezone.now()
+        self.almacen.iniciar_corrida({
+            "_id": run_id,
+            "modelo": "promedio",
+            "meses_a_proyectar": 1,
+            "iniciada_en": ahora,
+            "expira_en": expira_en or ahora + timedelta(days=1),
+        })
+        self.almacen.guardar_proyecciones([
+            {"run_id": run_id, "especie": "Luga Roja", "anio": 2026, "mes": 1, "proyeccion_ton": toneladas}
+        ])
+        self.almacen.guardar_resumenes([
+            {"run_id": run_id, "anio": 2026, "meses": {"1": toneladas}, "bandas": {}, "especies": ["Luga Roja"]}
+        ])
+
+    def _estado(self, run_id):
+        return CorridaProyeccion.objects.get(run_id=run_id).estado
+
+    def test_corrida_sin_publicar_no_es_visible(self):
+        self._corrida("a", 10.0)
+        self.assertIsNone(self.almacen.corrida_vigente())
+        self.assertIsNone(self.almacen.resumen_anual(2026))
+
+        self.almacen.publicar("a", {"especies": 1, "documentos": 1})
+        self._corrida("b", 20.0)
+        self.assertEqual(self.almacen.corrida_vigente(), "a")
+        self.assertEqual(self.almacen.resumen_anual(2026)["meses"], {"1": 10.0})
+
+        self.almacen.marcar_fallida("b")
+        self.assertEqual(self._estado("b"), "fallida")
+        self.assertEqual(self.almacen.corrida_vigente(), "a")
+        self.assertEqual(self.almacen.resumen_anual(2026)["meses"], {"1": 10.0})
+
+    def test_publicar_cambia_la_vigente_atomicamente(self):
+        self._corrida("a", 10.0)
+        self.almacen.publicar("a", {"especies": 1, "documentos": 1})
+        self._corrida("b", 20.0)
+
+        # Falla después de reemplazar "a": la transacción se revierte
+        with self.assertRaises(FieldDoesNotExist):
+            self.almacen.publicar("b", {"no_existe": 1})
+        self.assertEqual(self._estado("a"), "vigente")
+        self.assertEqual(self._estado("b"), "en_curso")
+
+        antes = timezone.now()
+        self.almacen.publicar("b", {"especies": 1, "documentos": 1})
+
+        self.assertEqual(list(CorridaProyeccion.objects.filter(estado="vigente").values_list("run_id", flat=True)), ["b"])
+        self.assertEqual(self.almacen.resumen_anual(2026)["meses"], {"1": 20.0})
+
+        a = CorridaProyeccion.objects.get(run_id="a")
+        self.assertEqual(a.estado, "reemplazada")
+        self.assertGreaterEqual(a.expira_en, antes + timedelta(seconds=3600))
+        b = CorridaProyeccion.objects.get(run_id="b")
+        self.assertIsNone(b.expira_en)
+        self.assertEqual((b.especies, b.documentos), (1, 1))
+
+    def test_purga_vencidas_y_conserva_la_vigente(self):
+        pasado = timezone.now() - timedelta(hours=1)
+
+        self._corrida("vieja", 1.0)
+        self.almacen.publicar("vieja", {"especies": 1, "documentos": 1})
+        self._corrida("vigente", 2.0)
+        self.almacen.publicar("vigente", {"especies": 1, "documentos": 1})
+        self._corrida("interrumpida", 3.0, expira_en=pasado)
+        self._corrida("en_curso", 4.0)
+
+        # "vieja" quedó reemplazada dentro de la retención; se vence a mano
+        CorridaProyeccion.objects.filter(run_id="vieja").update(expira_en=pasado)
+        self._corrida("nueva", 5.0)
+        self.almacen.publicar("nueva", {"especies": 1, "documentos": 1})
+
+        restantes = set(CorridaProyeccion.objects.values_list("run_id", flat=True))
+        self.assertEqual(restantes, {"vigente", "en_curso", "nueva"})
+        self.assertEqual(self._estado("vigente"), "reemplazada")
+        self.assertEqual(self.almacen.corrida_vigente(), "nueva")
+        self.assertEqual(
+            set(Proyeccion.objects.values_list("corrida_id", flat=True)), restantes
+        )
+        self.assertEqual(
+            set(ResumenProyeccion.objects.values_list("corrida_id", flat=True)), restantes
+        )
+
+        # Una vigente no vence aunque pase su expira_en original
+        self.almacen._purgar_vencidas(timezone.now() + timedelta(days=30))
+        self.assertEqual(self.almacen.corrida_vigente(), "nueva")
+        self.assertTrue(Proyeccion.objects.filter(corrida_id="nueva").exists())
@@ -27,7 +27,7 @@ from .services import generar_proyecciones_automaticas
 #
 # Lógica:
 #   1. Llama al microservicio generar_proyecciones_automaticas()
-#   2. Muestra un mensaje de confirmación
+#   2. Muestra un mensaje de confirmación (o advertencia)
 #   3. Redirige al dashboard
 #
 # Esta vista no devuelve HTML; solo ejecuta lógica interna.
@@ -43,13 +43,18 @@ def actualizar_proyecciones(request):
     #   - actualizar cifras estimadas
     #   - consumir datos de modelos / APIs / Mongo / etc.
     # -----------------------------------------------------------
-    generar_proyecciones_automaticas()
+    run_id = generar_proyecciones_automaticas()
 
     # -----------------------------------------------------------
-    # MENSAJE DE ÉXITO
+    # MENSAJE DE RESULTADO
     # Se muestra en el dashboard gracias al sistema de messages.
+    # Si alguna especie no se pudo proyectar, el dashboard sigue
+    # mostrando la corrida anterior.
     # -----------------------------------------------------------
-    messages.success(request, "Proyecciones actualizadas desde el microservicio.")
+    if run_id is None:
+        messages.warning(request, "No se pudieron proyectar todas las especies; se mantienen las proyecciones anteriores.")
+    else:
+        messages.success(request, "Proyecciones actualizadas desde el microservicio.")
 
     # -----------------------------------------------------------
     # REDIRECCIÓN
@@ -68,6 +68,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.usuario: usuario de la sesión, una consulta por request
+    'UsuariosApp.middleware.UsuarioSesionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -184,15 +186,123 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==========================
+#  AUDITORÍA (AuditoriaApp/escritor.py)
+# ==========================
+# Los registros se encolan en memoria y un hilo los guarda en lotes
+AUDITORIA_ASINCRONA = True
+AUDITORIA_LOTE = 100          # registros por bulk_create
+AUDITORIA_INTERVALO = 2.0     # segundos máximos antes de escribir un lote
+AUDITORIA_COLA_MAX = 10000    # sobre esto se escribe en forma síncrona
+AUDITORIA_REINTENTOS = 3      # reintentos de un lote que falla
+AUDITORIA_BACKOFF = 0.5       # base del backoff exponencial (s)
+AUDITORIA_PAGINA = 50         # registros por página del listado
+
+# Retención (AuditoriaApp/archivo.py, manage.py archivar_auditoria):
+# los registros más antiguos que AUDITORIA_RETENCION_DIAS pasan a
+# archivos mensuales .jsonl.gz en AUDITORIA_ARCHIVO_DIR
+AUDITORIA_RETENCION_DIAS = int(os.environ.get("AUDITORIA_RETENCION_DIAS", 365))
+AUDITORIA_ARCHIVO_DIR = os.environ.get("AUDITORIA_ARCHIVO_DIR", os.path.join(BASE_DIR, "archivo_auditoria"))
+AUDITORIA_BUSQUEDA_MAX = 200  # resultados máximos de la búsqueda en archivos
+AUDITORIA_FT_MIN_TOKEN = 3    # innodb_ft_min_token_size del servidor MySQL
+AUDITORIA_ACTIVIDAD_DIAS = 30  # días por defecto del reporte de actividad
+
+# ==========================
+#  LÍMITE DE INTENTOS DE LOGIN (LoginApp/throttling.py)
+# ==========================
+# (intentos, segundos) por cubeta; al agotarse → HTTP 429 y bloqueo
+# de LOGIN_BLOQUEO_BASE segundos, duplicado en cada bloqueo seguido
+LOGIN_LIMITE_USUARIO = (5, 60)
+LOGIN_LIMITE_IP = (20, 60)
+LOGIN_BLOQUEO_BASE = 30
+LOGIN_BLOQUEO_MAX = 900
+# "memoria" (por proceso) o "cache" (CACHES, compartido entre workers)
+LOGIN_LIMITADOR = os.environ.get("LOGIN_LIMITADOR", "memoria")
+# En fly.io la IP del cliente llega en la cabecera Fly-Client-IP
+LOGIN_IP_CABECERA = "HTTP_FLY_CLIENT_IP" if os.environ.get("FLY_IO", "") == "yes" else "REMOTE_ADDR"
+
+# ==========================
+#  ALMACÉN DE PROYECCIONES
+# ==========================
+# Dónde se guardan las corridas de proyecciones (ProyeccionesApp/almacenes.py):
+#   "mongo" → colecciones de MongoDB (config de abajo)
+#   "sql"   → tablas de ProyeccionesApp en la base de Django
+# En Fly.io no hay MongoDB → "sql" por defecto.
+PROYECCIONES_ALMACEN = os.environ.get(
+    "PROYECCIONES_ALMACEN",
+    "sql" if os.environ.get("FLY_IO", "") == "yes" else "mongo",
+)
+
 # ==========================
 #  CONFIG MONGODB (Proyecciones)
 # ==========================
 MONGO_URI = "mongodb://localhost:27017/"
+MONGO_TIMEOUT_MS = 2000     # espera máxima para elegir servidor (ms)
 MONGO_DB_NAME = "proyecto_algas_db"
 MONGO_COLLECTION_PROYECCIONES = "proyecciones"
+MONGO_COLLECTION_CORRIDAS = "proyecciones_corridas"   # puntero "latest" + corridas
+MONGO_COLLECTION_RESUMENES = "proyecciones_resumen"    # totales por corrida y año
+
+# Segundos que una corrida reemplazada sigue disponible antes de que
+# el índice TTL la elimine, y vida máxima de una corrida que nunca
+# llegó a publicarse (proceso interrumpido)
+PROYECCIONES_RETENCION_CORRIDAS = 7 * 24 * 3600
+PROYECCIONES_TTL_CORRIDA_EN_CURSO = 24 * 3600
 
 
 # ==========================
 #  URL MICROSERVICIO PROYECCIONES
 # ==========================
+# Dónde se ejecuta el motor de proyecciones:
+#   "http"  → microservicio FastAPI (URLs de abajo)
+#   "local" → dentro del proceso de Django, importando
+#             microservicio_proyecciones.motor (sin salto HTTP)
+# En Fly.io no se despliega el microservicio → "local" por defecto.
+PROYECCIONES_MODO = os.environ.get(
+    "PROYECCIONES_MODO",
+    "local" if os.environ.get("FLY_IO", "") == "yes" else "http",
+)
+PROYECCIONES_BLOQUE_STREAM = 32              # especies por bloque (stream, modo local)
+
 PROYECCIONES_MICRO_URL = "http://127.0.0.1:8001/api/proyectar"
+PROYECCIONES_MICRO_URL_LOTE = "http://127.0.0.1:8001/api/proyectar/lote"
+PROYECCIONES_MICRO_URL_STREAM = "http://127.0.0.1:8001/api/proyectar/stream"
+
+# Formato de intercambio con el microservicio:
+#   "json"     → una llamada por especie (lista de {anio, mes, toneladas})
+#   "columnar" → lotes de especies como arreglos paralelos
+#   "ndjson"   → todas las especies en una llamada, respuesta en
+#                streaming (se guarda en Mongo a medida que llega)
+PROYECCIONES_MICRO_FORMATO = "columnar"
+PROYECCIONES_MICRO_CODIFICACION = "msgpack"  # "msgpack" | "json"
+PROYECCIONES_MICRO_LOTE = 100                # especies por llamada columnar
+
+# Modelo de proyección del microservicio:
+#   "promedio" | "estacional_ingenuo" | "tendencia_lineal" |
+#   "holt_winters_aditivo" | "holt_winters_multiplicativo"
+PROYECCIONES_MODELO = "promedio"
+
+# Caminos de simulación por especie para las bandas P10/P50/P90 del
+# dashboard (formatos "columnar"/"ndjson"). 0 = sin intervalos.
+PROYECCIONES_INTERVALOS_CAMINOS = 1000
+
+# Tope de caminos por especie en modo local; debe coincidir con
+# PROYECCIONES_MAX_CAMINOS del microservicio para que ambos modos
+# den las mismas bandas
+PROYECCIONES_MAX_CAMINOS = 5000
+
+# Horizonte mínimo (meses) del planificador de factibilidad de
+# contratos (ContratoApp/planificador.py); se extiende hasta la
+# última entrega pendiente
+PLANIFICADOR_MESES = 12
+
+# Contratos por página del listado (ContratoApp/consultas.py)
+CONTRATOS_PAGINA = 25
+
+# Cliente HTTP (ProyeccionesApp/client.py)
+PROYECCIONES_MICRO_TIMEOUT = 5             # segundos por intento
+PROYECCIONES_MICRO_REINTENTOS = 2          # reintentos ante fallos transitorios
+PROYECCIONES_MICRO_BACKOFF = 0.2           # base del backoff exponencial (s)
+PROYECCIONES_MICRO_POOL = 10               # conexiones keep-alive por host
+PROYECCIONES_MICRO_UMBRAL_FALLOS = 3       # fallos seguidos que abren el circuito
+PROYECCIONES_MICRO_TIEMPO_APERTURA = 30    # segundos con el circuito abierto
@@ -1,7 +1,41 @@
 from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+# ============================================================
+# _invalidar_permisos():
+# Receptor de señales: un rol o un usuario cambió, la caché de
+# permisos (RolApp/permisos.py) sube de versión cuando la
+# transacción se confirma (antes, otro request podría volver a
+# cargar los datos viejos).
+# ============================================================
+def _invalidar_permisos(sender, **kwargs):
+    from .permisos import invalidar
+
+    # Guardar un usuario sin tocar Username ni Rol (ej: cambio de
+    # contraseña con update_fields) no afecta los permisos
+    campos = kwargs.get("update_fields")
+    if campos is not None and sender._meta.model_name == "usuariosmodels" \
+            and not {"Username", "Rol"} & set(campos):
+        return
+
+    transaction.on_commit(invalidar)
 
 
 class RolappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'RolApp'
 
+    # ------------------------------------------------------------
+    # Método ready():
+    # - Conecta la invalidación de la caché de permisos a los
+    #   cambios de RolModels y UsuariosModels
+    # ------------------------------------------------------------
+    def ready(self):
+        from UsuariosApp.models import UsuariosModels
+        from .models import RolModels
+
+        for modelo in (RolModels, UsuariosModels):
+            post_save.connect(_invalidar_permisos, sender=modelo, dispatch_uid=f"permisos_{modelo.__name__}")
+            post_delete.connect(_invalidar_permisos, sender=modelo, dispatch_uid=f"permisos_del_{modelo.__name__}")
@@ -8,7 +8,8 @@
 #
 # Flujo general:
 #   1. Verifica si el usuario está en sesión.
-#   2. Obtiene al usuario y su rol.
+#   2. Obtiene los permisos de su rol (caché en proceso, ver
+#      RolApp/permisos.py: sin consultas en régimen).
 #   3. Revisa si el rol tiene el permiso requerido.
 #   4. Si NO lo tiene → bloquea acceso, muestra mensaje,
 #      y redirige según el rol.
@@ -22,7 +23,7 @@
 
 from django.shortcuts import redirect
 from django.contrib import messages
-from UsuariosApp.models import UsuariosModels
+from .permisos import permisos_de_sesion
 
 
 # ===============================================================
@@ -60,18 +61,18 @@ def requiere_permiso(nombre_permiso):
                 return redirect('Login')
 
             # ===================================================
-            # 2. INTENTAR OBTENER EL USUARIO Y SU ROL
+            # 2. OBTENER LOS PERMISOS DEL ROL DEL USUARIO
+            #
+            # permisos_de_sesion() lee la caché de permisos por
+            # rol; solo consulta la base de datos la primera vez
+            # que ve al usuario o tras un cambio de roles.
             # ===================================================
-            try:
-                # select_related("Rol"):
-                #   → optimiza consulta usando join
-                usuario = UsuariosModels.objects.select_related("Rol").get(Username=username)
-            except UsuariosModels.DoesNotExist:
+            existe, rol = permisos_de_sesion(request)
+
+            if not existe:
                 messages.error(request, "Usuario inválido.")
                 return redirect('Login')
 
-            rol = usuario.Rol
-
             # Si el usuario no tiene un rol asociado
             if not rol:
                 messages.error(request, "Tu cuenta no tiene un rol asignado.")
@@ -80,24 +81,24 @@ def requiere_permiso(nombre_permiso):
             # ===================================================
             # 3. VALIDACIÓN DEL PERMISO
             #
-            # getattr(rol, nombre_permiso, False):
+            # rol.get(nombre_permiso, False):
             #   → Obtiene el valor del permiso (True/False).
-            #   → Si no existe el atributo, devuelve False.
+            #   → Si no existe el campo, devuelve False.
             # ===================================================
-            if not getattr(rol, nombre_permiso, False):
+            if not rol.get(nombre_permiso, False):
                 messages.error(request, "No tienes permisos para acceder aquí.")
 
                 # --------------------------------------------------
                 # Redirección personalizada según el tipo de rol
                 # para enviarlo a su área correspondiente.
                 # --------------------------------------------------
-                if rol.NombreRol in ["RolAdmin", "Gerente"]:
+                if rol["NombreRol"] in ["RolAdmin", "Gerente"]:
                     return redirect("dashboard")
 
-                elif rol.NombreRol == "EncargadoStock":
+                elif rol["NombreRol"] == "EncargadoStock":
                     return redirect("stock")
 
-                elif rol.NombreRol == "Operario":
+                elif rol["NombreRol"] == "Operario":
                     return redirect("especies")
 
                 # Si no calza con ningún rol → fallback general
@@ -0,0 +1,144 @@
+# ===============================================================
+# RolApp/permisos.py
+#
+# Caché en proceso de los permisos por rol.
+#
+# @requiere_permiso solo necesita leer un booleano del rol del
+# usuario (ej: PermisoEditarStock). En vez de consultar usuario +
+# Rol en cada request, este módulo mantiene una instantánea:
+#
+#   roles    → {RolId: {"NombreRol": ..., "PermisoVerDashboard": ...}}
+#              (todos los roles, UNA consulta al construirla)
+#   usuarios → {Username: RolId | None}
+#              (se completa a medida que los usuarios navegan)
+#
+# Versión:
+#   La instantánea lleva el número de versión con que se construyó.
+#   La versión vigente vive en el caché de Django (settings.CACHES)
+#   y se incrementa al guardar / eliminar un RolModels o un usuario
+#   (señales conectadas en RolApp/apps.py, tras el commit). Si no
+#   coincide, la instantánea se descarta y se reconstruye: los
+#   cambios de permisos valen desde el request siguiente.
+#
+#   Con el caché local por defecto (LocMemCache) la versión es por
+#   proceso; si se despliegan varios procesos, CACHES debe apuntar a
+#   un caché compartido (Redis, Memcached) para que todos vean el
+#   cambio.
+#
+# En régimen (instantánea vigente y usuario ya visto) el chequeo de
+# permisos no hace ninguna consulta a la base de datos.
+# ===============================================================
+
+import threading
+import time
+
+from django.core.cache import cache
+
+from UsuariosApp.middleware import get_user_from_session
+from .models import RolModels
+
+
+CLAVE_VERSION = "rol_permisos_version"
+
+# Marca de "usuario inexistente" en la instantánea
+_INEXISTENTE = object()
+
+
+class _Instantanea:
+
+    def __init__(self, version, roles):
+        self.version = version
+        self.roles = roles
+        self.usuarios = {}
+
+
+_instantanea = None
+_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------
+# _version(): versión vigente (la crea si el caché no la tiene)
+#
+# Un valor nuevo se toma de time.time_ns() y no de 1: si la clave
+# expira o el caché se reinicia, la versión nueva no coincide con
+# la de ninguna instantánea anterior.
+# ---------------------------------------------------------------
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+# ---------------------------------------------------------------
+# invalidar():
+# Incrementa la versión; lo llaman las señales de RolApp/apps.py.
+# ---------------------------------------------------------------
+def invalidar():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), timeout=None)
+
+
+# ---------------------------------------------------------------
+# _instantanea_vigente():
+# La instantánea de la versión actual; si cambió, la reconstruye
+# (una consulta por todos los roles).
+# ---------------------------------------------------------------
+def _instantanea_vigente():
+    global _instantanea
+
+    version = _version()
+    actual = _instantanea
+    if actual is not None and actual.version == version:
+        return actual
+
+    with _lock:
+        if _instantanea is None or _instantanea.version != version:
+            roles = {r["RolId"]: r for r in RolModels.objects.values()}
+            _instantanea = _Instantanea(version, roles)
+        return _instantanea
+
+
+# ===============================================================
+# permisos_de_sesion()
+#
+# Permisos del usuario logueado en el request.
+#
+# Retorna (existe, permisos):
+#   (False, None)  → no hay sesión o el usuario ya no existe
+#   (True, None)   → el usuario no tiene rol asignado
+#   (True, dict)   → campos del rol: NombreRol, PermisoVerDashboard,
+#                    PermisoEditarStock, PermisoCrearContratos, ...
+#
+# La primera vez que se ve un usuario (por versión) se resuelve con
+# get_user_from_session(): esa consulta queda en el request y la
+# reutilizan la vista y la auditoría.
+# ===============================================================
+def permisos_de_sesion(request):
+    username = request.session.get("Usuario_Ingresado")
+    if not username:
+        return False, None
+
+    instantanea = _instantanea_vigente()
+
+    rol_id = instantanea.usuarios.get(username)
+    if rol_id is None and username not in instantanea.usuarios:
+        usuario = get_user_from_session(request)
+        rol_id = usuario.Rol_id if usuario else _INEXISTENTE
+        instantanea.usuarios[username] = rol_id
+
+    if rol_id is _INEXISTENTE:
+        return False, None
+    if rol_id is None:
+        return True, None
+
+    permisos = instantanea.roles.get(rol_id)
+    if permisos is None:
+        # Rol creado después de la instantánea (la señal ya la
+        # invalidó en otro proceso): se lee directo esta vez
+        permisos = RolModels.objects.filter(RolId=rol_id).values().first()
+
+    return True, permisos
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from RolApp.models import RolModels
+from RolApp.permisos import invalidar
+from UsuariosApp.models import UsuariosModels
+
+
+# ===============================================================
+# CachePermisosTests
+#
+# @requiere_permiso lee los permisos desde la caché por rol
+# (RolApp/permisos.py): sin consultas en régimen, y los cambios de
+# roles o del rol de un usuario valen en el request siguiente.
+# ===============================================================
+@override_settings(AUDITORIA_ASINCRONA=False)
+class CachePermisosTests(TestCase):
+
+    def setUp(self):
+        invalidar()
+        self.client.post("/", {"UsernameField": "Admin", "PasswordField": "Admin123"})
+
+    def _consultas_permisos(self, consultas):
+        tablas = [f"FROM {connection.ops.quote_name(t)}" for t in ("Usuarios", "Rol")]
+        return [q["sql"] for q in consultas if any(t in q["sql"] for t in tablas)]
+
+    def test_sin_consultas_en_regimen(self):
+        self.client.get("/dashboard/stock/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get("/dashboard/stock/")
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._consultas_permisos(ctx.captured_queries), [])
+
+    def test_cambio_de_permiso_del_rol_es_inmediato(self):
+        self.assertEqual(self.client.get("/dashboard/stock/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rol = RolModels.objects.get(NombreRol="RolAdmin")
+            rol.PermisoEditarStock = False
+            rol.save()
+
+        respuesta = self.client.get("/dashboard/stock/")
+        self.assertRedirects(respuesta, "/dashboard/", fetch_redirect_response=False)
+
+    def test_cambio_de_rol_del_usuario_es_inmediato(self):
+        self.assertEqual(self.client.get("/dashboard/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = UsuariosModels.objects.get(Username="Admin")
+            usuario.Rol = RolModels.objects.get(NombreRol="Operario")
+            usuario.save()
+
+        respuesta = self.client.get("/dashboard/")
+        self.assertRedirects(respuesta, "/dashboard/especies/", fetch_redirect_response=False)
@@ -18,30 +18,13 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from UsuariosApp.models import UsuariosModels
+from UsuariosApp.middleware import get_user_from_session
 from .models import Maxisaco
 from .forms import MaxisacoForm
 from AuditoriaApp.decorators import auditar
 from RolApp.decorators import requiere_permiso
 
 
-# ===============================================================
-# FUNCIÓN AUXILIAR: obtener usuario desde la sesión
-#
-# - Lee la variable "Usuario_Ingresado" guardada en la sesión.
-# - Devuelve el usuario asociado o None si no existe.
-# - Se usa para llenar campos auditables (registrado_por, actualizado_por).
-# ===============================================================
-def get_user_from_session(request):
-    username = request.session.get("Usuario_Ingresado")
-    if not username:
-        return None
-    try:
-        return UsuariosModels.objects.get(Username=username)
-    except UsuariosModels.DoesNotExist:
-        return None
-
-
 # ===============================================================
 # LISTAR STOCK
 #
@@ -0,0 +1,91 @@
+# ===============================================================
+# UsuariosApp/middleware.py
+#
+# Usuario de la sesión resuelto UNA vez por request.
+#
+# Antes cada consumidor buscaba al usuario por su cuenta:
+#   - @requiere_permiso         → usuario + Rol
+#   - get_user_from_session()   → copiado en Stock, Contrato e
+#                                 Insumo (y en AuditoriaApp)
+#   - registrar_auditoria()     → usuario (en el escritor)
+# y un POST auditado consultaba UsuariosModels hasta tres veces.
+#
+# Ahora:
+#   - UsuarioSesionMiddleware deja en request.usuario un objeto
+#     perezoso: la consulta (usuario + Rol, con select_related)
+#     solo se hace si alguien lo usa.
+#   - get_user_from_session(request) es la función compartida que
+#     usan decoradores y vistas: retorna la instancia (o None) y la
+#     guarda en el request; las llamadas siguientes no consultan.
+#
+# El caché se asocia al Username de la sesión: si la sesión cambia
+# durante el request (login / logout) se vuelve a buscar.
+# ===============================================================
+
+from django.utils.functional import SimpleLazyObject
+
+from .models import UsuariosModels
+
+
+# ---------------------------------------------------------------
+# get_user_from_session():
+# Usuario logueado (con su Rol) o None si no hay sesión o el
+# usuario ya no existe. Una consulta como máximo por request.
+# ---------------------------------------------------------------
+def get_user_from_session(request):
+    username = request.session.get("Usuario_Ingresado")
+
+    cache = getattr(request, "_usuario_sesion", None)
+    if cache is not None and cache[0] == username:
+        return cache[1]
+
+    usuario = None
+    if username:
+        try:
+            usuario = UsuariosModels.objects.select_related("Rol").get(Username=username)
+        except UsuariosModels.DoesNotExist:
+            usuario = None
+
+    request._usuario_sesion = (username, usuario)
+    return usuario
+
+
+# ---------------------------------------------------------------
+# recordar_usuario():
+# Deja en el request un usuario ya cargado (ej: el login, que lo
+# acaba de leer con su Rol) para que nadie lo vuelva a consultar.
+# ---------------------------------------------------------------
+def recordar_usuario(request, usuario):
+    request._usuario_sesion = (usuario.Username, usuario)
+
+
+# ---------------------------------------------------------------
+# usuario_en_cache():
+# El usuario ya resuelto en este request, sin consultar; None si
+# nadie lo pidió todavía (o si no hay usuario).
+# ---------------------------------------------------------------
+def usuario_en_cache(request):
+    cache = getattr(request, "_usuario_sesion", None)
+    if cache is not None and cache[0] == request.session.get("Usuario_Ingresado"):
+        return cache[1]
+    return None
+
+
+# ===============================================================
+# MIDDLEWARE: UsuarioSesionMiddleware
+#
+# Agrega request.usuario (perezoso). Va después de
+# SessionMiddleware en settings.MIDDLEWARE.
+#
+# Nota: como objeto perezoso, "request.usuario is None" no sirve
+# para saber si hay usuario; usar "if request.usuario:" o, en
+# código Python, get_user_from_session(request).
+# ===============================================================
+class UsuarioSesionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.usuario = SimpleLazyObject(lambda: get_user_from_session(request))
+        return self.get_response(request)
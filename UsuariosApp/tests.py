@@ -1,3 +1,55 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from AuditoriaApp.models import Auditoria
+from EspecieApp.models import Especie
+from StockApp.models import Maxisaco
+
+
+# ===============================================================
+# UsuarioSesionTests
+#
+# El usuario de la sesión se resuelve UNA vez por request
+# (UsuariosApp/middleware.py) y lo reutilizan @requiere_permiso,
+# la vista y la auditoría. Los usuarios por defecto los crea la
+# señal post_migrate de UsuariosApp.
+# ===============================================================
+@override_settings(AUDITORIA_ASINCRONA=False)
+class UsuarioSesionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.especie = Especie.objects.create(nombre="Luga Roja", proporcion_conversion=0.2)
+
+    def setUp(self):
+        self.client.post("/", {"UsernameField": "Admin", "PasswordField": "Admin123"})
+
+    def _consultas_usuarios(self, consultas):
+        tabla = connection.ops.quote_name("Usuarios")
+        return [q["sql"] for q in consultas if f"FROM {tabla}" in q["sql"]]
+
+    def test_post_auditado_consulta_usuario_una_vez(self):
+        # Antes: requiere_permiso + get_user_from_session de la vista
+        # + registrar_auditoria → 3 consultas a Usuarios
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.post("/dashboard/stock/crear/", {
+                "especie": self.especie.pk,
+                "peso_kg": "150.00",
+                "tipo_movimiento": "entrada",
+                "observaciones": "",
+            })
+
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(len(self._consultas_usuarios(ctx.captured_queries)), 1)
+
+        maxisaco = Maxisaco.objects.get()
+        auditoria = Auditoria.objects.get(modulo="Stock")
+        self.assertEqual(maxisaco.registrado_por.Username, "Admin")
+        self.assertEqual(auditoria.usuario_id, maxisaco.registrado_por_id)
+
+    def test_request_sin_uso_del_usuario_no_consulta(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/")
+
+        self.assertEqual(self._consultas_usuarios(ctx.captured_queries), [])
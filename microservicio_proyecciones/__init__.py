@@ -0,0 +1,11 @@
+# ===============================================================
+# microservicio_proyecciones — Paquete del motor de proyecciones
+#
+# En el contenedor, main.py se ejecuta desde esta carpeta (uvicorn
+# main:app) y sus módulos se importan de forma plana.
+#
+# Desde Django (modo local, ver ProyeccionesApp/client.py) solo se
+# importa el motor, que no depende de FastAPI:
+#
+#     from microservicio_proyecciones.motor import proyectar_columnar
+# ===============================================================
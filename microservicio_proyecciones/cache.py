@@ -0,0 +1,124 @@
+# ===============================================================
+# cache.py — Caché de resultados de proyección (LRU + TTL)
+#
+# La mayoría de las actualizaciones desde Django envían exactamente
+# el mismo histórico para casi todas las especies. En vez de volver
+# a ajustar el modelo, el resultado se guarda en memoria usando como
+# clave un hash de:
+#
+#     (especie, período inicial, histórico, horizonte, modelo, caminos)
+#
+# Política:
+#   - LRU: al superar "capacidad" se desaloja la entrada menos usada
+#   - TTL: una entrada más antigua que "ttl" segundos se descarta
+#
+# La caché es local a cada proceso (cada worker de uvicorn tiene
+# la suya).
+#
+# Configuración (variables de entorno):
+#   PROYECCIONES_CACHE_MAX  → capacidad en entradas (default 10000)
+#   PROYECCIONES_CACHE_TTL  → segundos de vida (default 3600)
+# ===============================================================
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ---------------------------------------------------------------
+# huella():
+# Hash estable de una serie + parámetros de proyección
+# (caminos = 0 si no se piden intervalos).
+# Los meses sin registros (None) se codifican como NaN.
+# ---------------------------------------------------------------
+def huella(especie, anio, mes, valores, horizonte, modelo, caminos=0) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(
+        f"{especie}\x00{anio}\x00{mes}\x00{horizonte}\x00{modelo}\x00{caminos}\x00".encode("utf-8")
+    )
+    h.update(np.array(valores, dtype=np.float64).tobytes())
+    return h.digest()
+
+
+# ===============================================================
+# CLASE: CacheProyecciones
+#
+# OrderedDict protegido por un lock: el orden de inserción/uso
+# implementa el LRU y cada entrada guarda su instante de guardado
+# para el TTL. Lleva contadores de hits/misses/expiradas/desalojadas.
+# ===============================================================
+class CacheProyecciones:
+
+    def __init__(self, capacidad, ttl):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._datos = OrderedDict()   # clave → (guardado_en, valor)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    # -----------------------------------------------------------
+    # obtener(): retorna el valor cacheado o None
+    # -----------------------------------------------------------
+    def obtener(self, clave):
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._datos.get(clave)
+
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            guardado_en, valor = entrada
+            if ahora - guardado_en > self.ttl:
+                del self._datos[clave]
+                self.expiradas += 1
+                self.misses += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    # -----------------------------------------------------------
+    # guardar(): inserta/actualiza y desaloja por LRU si es necesario
+    # -----------------------------------------------------------
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.desalojadas += 1
+
+    # -----------------------------------------------------------
+    # estadisticas(): contadores para el endpoint /api/stats
+    # -----------------------------------------------------------
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._datos),
+                "capacidad": self.capacidad,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+                "expiradas": self.expiradas,
+                "desalojadas": self.desalojadas,
+            }
+
+
+# Instancia única por proceso
+cache_proyecciones = CacheProyecciones(
+    capacidad=int(os.environ.get("PROYECCIONES_CACHE_MAX", 10000)),
+    ttl=float(os.environ.get("PROYECCIONES_CACHE_TTL", 3600)),
+)
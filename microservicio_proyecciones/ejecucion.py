@@ -0,0 +1,166 @@
+# ===============================================================
+# ejecucion.py — Ejecución de ajustes fuera del event loop
+#
+# Ajustar modelos es trabajo de CPU. Si se hiciera directamente en
+# un endpoint async, un ajuste lento bloquearía a todos los demás
+# requests del worker. Este módulo:
+#
+#   1. Envía los ajustes pesados a un ProcessPoolExecutor
+#      (lotes pequeños se resuelven en línea: el costo de enviar
+#      los datos a otro proceso sería mayor que el ajuste).
+#
+#   2. Limita cuántos ajustes corren a la vez por worker y cuántos
+#      pueden esperar en cola. Si la cola está llena se responde
+#      HTTP 429 con Retry-After (backpressure) en vez de acumular
+#      requests sin límite.
+#
+# Configuración (variables de entorno):
+#   PROYECCIONES_PROCESOS         → procesos del pool por worker:
+#                                   "auto" (default) reparte las CPUs
+#                                   (os.cpu_count()) entre los WORKERS
+#                                   de uvicorn; 0 = sin pool
+#   PROYECCIONES_UMBRAL_POOL      → celdas (especies × meses) desde
+#                                   las cuales se usa el pool
+#   PROYECCIONES_MAX_CONCURRENTES → ajustes simultáneos por worker
+#   PROYECCIONES_MAX_COLA         → ajustes esperando turno por worker
+# ===============================================================
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+
+import metricas
+from motor import ajustar
+
+
+# ---------------------------------------------------------------
+# _procesos_pool():
+# Tamaño del pool de este worker. En modo "auto" cada uno de los
+# WORKERS procesos de uvicorn tiene su propio pool, así que las
+# CPUs se reparten entre ellos (al menos un proceso por worker)
+# para no sobresuscribir la máquina.
+# ---------------------------------------------------------------
+def _procesos_pool() -> int:
+    valor = os.environ.get("PROYECCIONES_PROCESOS", "auto").strip().lower()
+    if valor != "auto":
+        return max(int(valor), 0)
+
+    workers = max(int(os.environ.get("WORKERS", 1)), 1)
+    return max((os.cpu_count() or 1) // workers, 1)
+
+
+PROCESOS = _procesos_pool()
+UMBRAL_POOL = int(os.environ.get("PROYECCIONES_UMBRAL_POOL", 5000))
+MAX_CONCURRENTES = int(os.environ.get("PROYECCIONES_MAX_CONCURRENTES", 4))
+MAX_COLA = int(os.environ.get("PROYECCIONES_MAX_COLA", 32))
+
+_pool = None
+_semaforo = asyncio.Semaphore(MAX_CONCURRENTES)
+_en_cola = 0
+
+
+# ---------------------------------------------------------------
+# iniciar() / detener():
+# Ciclo de vida del pool, llamados desde el lifespan de FastAPI.
+# ---------------------------------------------------------------
+def iniciar():
+    global _pool
+    if PROCESOS > 0 and _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PROCESOS)
+
+
+def detener():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+# ---------------------------------------------------------------
+# _ajustar():
+# Función ejecutada en el proceso hijo (debe ser de nivel módulo
+# para poder serializarse). Ver motor.ajustar().
+#
+# Retorna (pronostico, bandas | None, duración del ajuste medida
+# dentro del proceso que lo ejecutó).
+# ---------------------------------------------------------------
+def _ajustar(Y, inicio, horizonte, modelo, caminos=0):
+    inicio_ajuste = time.perf_counter()
+    pronostico, bandas = ajustar(Y, inicio, horizonte, modelo, caminos)
+    return pronostico, bandas, time.perf_counter() - inicio_ajuste
+
+
+# ===============================================================
+# ejecutar()
+#
+# Ejecuta varias tareas de CPU como UN solo turno del worker.
+#
+#   - Si no hay turno libre y ya hay MAX_COLA requests esperando
+#     → HTTP 429 (Retry-After: 1)
+#   - Espera turno en el semáforo (MAX_CONCURRENTES)
+#   - pesado=True y hay pool → las tareas corren en paralelo en el
+#     pool de procesos; si no, en línea una tras otra
+#
+# "funcion" debe ser de nivel módulo (se serializa con pickle).
+# Retorna la lista de resultados en el orden de "tareas".
+# ===============================================================
+async def ejecutar(funcion, tareas, pesado) -> list:
+    global _en_cola
+
+    if _semaforo.locked() and _en_cola >= MAX_COLA:
+        raise HTTPException(
+            status_code=429,
+            detail="Microservicio saturado, reintente más tarde.",
+            headers={"Retry-After": "1"},
+        )
+
+    _en_cola += 1
+    try:
+        await _semaforo.acquire()
+    finally:
+        _en_cola -= 1
+
+    try:
+        if _pool is not None and pesado:
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(
+                loop.run_in_executor(_pool, funcion, *argumentos)
+                for argumentos in tareas
+            ))
+        return [funcion(*argumentos) for argumentos in tareas]
+    finally:
+        _semaforo.release()
+
+
+# ---------------------------------------------------------------
+# ajustar_lote():
+# Ajusta y proyecta un lote ya convertido a matriz (Y, inicio).
+# Lotes desde UMBRAL_POOL celdas (contando los caminos simulados)
+# van al pool de procesos. Registra la duración del ajuste en las
+# métricas por modelo.
+#
+# Retorna (pronostico (n, H), bandas (len(CUANTILES), n, H) | None).
+# ---------------------------------------------------------------
+async def ajustar_lote(Y, inicio, horizonte, modelo, caminos=0):
+    celdas = Y.size + Y.shape[0] * caminos * horizonte
+    [(pronostico, bandas, duracion)] = await ejecutar(
+        _ajustar, [(Y, inicio, horizonte, modelo, caminos)], pesado=celdas >= UMBRAL_POOL
+    )
+    metricas.ajuste_duracion.observar(modelo, valor=duracion)
+    return pronostico, bandas
+
+
+# ---------------------------------------------------------------
+# estado(): valores actuales para /api/stats y /metrics
+# ---------------------------------------------------------------
+def estado() -> dict:
+    return {
+        "procesos": PROCESOS if _pool is not None else 0,
+        "umbral_pool": UMBRAL_POOL,
+        "max_concurrentes": MAX_CONCURRENTES,
+        "max_cola": MAX_COLA,
+        "en_cola": _en_cola,
+    }
@@ -0,0 +1,231 @@
+# ===============================================================
+# formato.py — Formato columnar de intercambio con Django
+#
+# El formato JSON original envía cada mes como un objeto:
+#     {"anio": 2024, "mes": 3, "toneladas": 12.5}
+# que FastAPI valida uno por uno como HistoricoMes. Con históricos
+# largos y muchas especies ese parseo/validación domina el costo.
+#
+# El formato columnar envía cada serie como arreglos paralelos:
+#
+#   Request  (POST /api/proyectar/lote):
+#   {
+#       "meses_a_proyectar": 12,
+#       "modelo": "promedio",                   # opcional
+#       "caminos": 1000,                        # opcional (ver abajo)
+#       "series": [
+#           {
+#               "especie": "Luga Roja",
+#               "inicio": [2024, 3],            # primer período
+#               "toneladas": [12.5, null, 8.0]  # un valor por mes
+#           },
+#           ...
+#       ]
+#   }
+#
+#   Response:
+#   {
+#       "series": [
+#           {
+#               "especie": "Luga Roja",
+#               "inicio": [2024, 6],            # primer mes proyectado
+#               "proyeccion_ton": [10.5, 10.5, ...]
+#           },
+#           ...
+#       ]
+#   }
+#
+# "null" (None en msgpack) marca un mes sin registros dentro de la
+# serie; los meses son siempre consecutivos a partir de "inicio".
+#
+# Intervalos de predicción: si "caminos" > 0, cada serie de la
+# respuesta incluye además "p10", "p50" y "p90" (un valor por mes
+# proyectado), simulados con ese número de caminos (acotado por el
+# microservicio, ver motor/intervalos.py).
+#
+# Codificaciones soportadas (negociadas por Content-Type/Accept):
+#   - application/json     → orjson si está instalado, si no json
+#   - application/msgpack  → msgpack (también application/x-msgpack)
+#
+# Respuesta en streaming (POST /api/proyectar/stream):
+#   - application/x-ndjson → un objeto JSON por línea, con la misma
+#     forma que cada elemento de "series" en la respuesta de /lote.
+#     Si el proceso falla a mitad de camino, la última línea es
+#     {"error": "..."}.
+# ===============================================================
+
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+
+TIPO_JSON = "application/json"
+TIPO_MSGPACK = "application/msgpack"
+TIPO_NDJSON = "application/x-ndjson"
+_ALIAS_MSGPACK = {TIPO_MSGPACK, "application/x-msgpack"}
+
+
+# ---------------------------------------------------------------
+# FormatoNoSoportado:
+# Se lanza cuando el Content-Type no corresponde a una codificación
+# conocida (o la librería necesaria no está instalada).
+# ---------------------------------------------------------------
+class FormatoNoSoportado(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------
+# _tipo_base():
+# "application/json; charset=utf-8" → "application/json"
+# ---------------------------------------------------------------
+def _tipo_base(content_type):
+    return (content_type or TIPO_JSON).split(";")[0].strip().lower()
+
+
+# ---------------------------------------------------------------
+# decodificar():
+# Convierte el cuerpo crudo del request en un dict de Python
+# según su Content-Type.
+# ---------------------------------------------------------------
+def decodificar(cuerpo: bytes, content_type: str | None) -> dict:
+    tipo = _tipo_base(content_type)
+
+    if tipo in _ALIAS_MSGPACK:
+        if msgpack is None:
+            raise FormatoNoSoportado("msgpack no está instalado en el microservicio.")
+        return msgpack.unpackb(cuerpo, raw=False)
+
+    if tipo == TIPO_JSON:
+        if orjson is not None:
+            return orjson.loads(cuerpo)
+        return json.loads(cuerpo)
+
+    raise FormatoNoSoportado(f"Content-Type no soportado: {tipo}")
+
+
+# ---------------------------------------------------------------
+# negociar():
+# Decide la codificación de la respuesta:
+#   1. Lo que pida el header Accept (si es soportado)
+#   2. Si no, la misma codificación del request
+# ---------------------------------------------------------------
+def negociar(accept: str | None, content_type: str | None) -> str:
+    for parte in (accept or "").split(","):
+        tipo = _tipo_base(parte)
+        if tipo in _ALIAS_MSGPACK and msgpack is not None:
+            return TIPO_MSGPACK
+        if tipo == TIPO_JSON:
+            return TIPO_JSON
+
+    if _tipo_base(content_type) in _ALIAS_MSGPACK and msgpack is not None:
+        return TIPO_MSGPACK
+    return TIPO_JSON
+
+
+# ---------------------------------------------------------------
+# codificar():
+# Serializa un dict según la codificación elegida por negociar().
+# ---------------------------------------------------------------
+def codificar(datos: dict, tipo: str) -> bytes:
+    if tipo == TIPO_MSGPACK:
+        return msgpack.packb(datos, use_bin_type=True)
+
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos).encode("utf-8")
+
+
+# ---------------------------------------------------------------
+# linea_ndjson():
+# Serializa un dict como una línea NDJSON (terminada en "\n").
+# ---------------------------------------------------------------
+def linea_ndjson(datos: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(datos, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(datos).encode("utf-8") + b"\n"
+
+
+# ---------------------------------------------------------------
+# leer_series():
+# Valida (de forma liviana, sin un modelo Pydantic por mes) el
+# request columnar y retorna:
+#
+#   meses_a_proyectar (int),
+#   modelo (str),
+#   caminos (int, 0 = sin intervalos),
+#   lista de (especie, anio_inicio, mes_inicio, toneladas)
+#
+# toneladas conserva None en los meses sin registros; cualquier otro
+# valor debe ser un número finito (ni texto, ni booleano, ni NaN /
+# infinito, que msgpack sí puede transportar). Así un cuerpo mal
+# formado termina en 422 y no en un error de NumPy (500).
+# ---------------------------------------------------------------
+def _toneladas_validas(toneladas) -> bool:
+    if not isinstance(toneladas, list):
+        return False
+    return all(
+        t is None
+        or (isinstance(t, (int, float)) and not isinstance(t, bool) and math.isfinite(t))
+        for t in toneladas
+    )
+
+
+def leer_series(datos: dict) -> tuple[int, str, int, list[tuple[str, int, int, list]]]:
+    try:
+        meses_a_proyectar = int(datos.get("meses_a_proyectar", 12))
+        modelo = str(datos.get("modelo", "promedio"))
+        caminos = max(int(datos.get("caminos") or 0), 0)
+        series = []
+        for s in datos["series"]:
+            anio, mes = s["inicio"]
+            if not 1 <= int(mes) <= 12:
+                raise ValueError
+            series.append((str(s["especie"]), int(anio), int(mes), s["toneladas"]))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise ValueError("Request columnar inválido.")
+
+    for especie, _, _, toneladas in series:
+        if not _toneladas_validas(toneladas):
+            raise ValueError(
+                f"Request columnar inválido: 'toneladas' de {especie!r} "
+                "debe ser una lista de números finitos o null."
+            )
+
+    return meses_a_proyectar, modelo, caminos, series
+
+
+# ---------------------------------------------------------------
+# leer_backtest():
+# Parámetros adicionales del request de /api/backtest (las series
+# se leen con leer_series()):
+#
+#   horizonte          → meses a pronosticar en cada corte (default 1)
+#   modelos            → lista de modelos a comparar (default: todos)
+#   min_entrenamiento  → meses mínimos antes de un corte (default 12)
+#   paso               → meses entre cortes consecutivos (default 1)
+#
+# Retorna (horizonte, modelos | None, min_entrenamiento, paso).
+# ---------------------------------------------------------------
+def leer_backtest(datos: dict) -> tuple[int, list[str] | None, int, int]:
+    try:
+        horizonte = int(datos.get("horizonte", 1))
+        modelos = datos.get("modelos")
+        if modelos is not None:
+            modelos = [str(m) for m in modelos]
+        min_entrenamiento = int(datos.get("min_entrenamiento", 12))
+        paso = int(datos.get("paso", 1))
+        if horizonte < 1 or min_entrenamiento < 1 or paso < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError("Parámetros de backtest inválidos.")
+
+    return horizonte, modelos, min_entrenamiento, paso
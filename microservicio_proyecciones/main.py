@@ -9,20 +9,80 @@
 # Y devuelve:
 #   - una lista de meses futuros con una proyección estimada
 #
-# Algoritmo utilizado (versión simple):
-#   1) Calcula promedio histórico.
-#   2) Aplica +5% de tendencia de crecimiento.
-#   3) Genera N meses hacia adelante.
+# Algoritmos disponibles (paquete motor/, vectorizado con NumPy):
+#   - promedio (por defecto): promedio histórico +5%
+#   - estacional_ingenuo
+#   - tendencia_lineal
+#   - holt_winters_aditivo / holt_winters_multiplicativo
+#
+# Opcionalmente (endpoints columnares, campo "caminos") entrega
+# bandas P10/P50/P90 por simulación de residuos (motor/intervalos.py).
 #
 # Este microservicio es consumido por Django a través de:
 #   ProyeccionesApp/client.py
+#
+# Endpoints:
+#   POST /api/proyectar       → una especie, formato JSON original
+#   POST /api/proyectar/lote  → varias especies, formato columnar
+#                               (JSON/msgpack, ver formato.py)
+#   POST /api/proyectar/stream→ igual que /lote, pero responde en
+#                               streaming NDJSON (una especie por línea)
+#   POST /api/backtest        → compara modelos con validación de
+#                               origen móvil (MAE / MAPE)
+#   GET  /api/modelos         → modelos de proyección disponibles
+#   GET  /api/stats           → estadísticas de la caché de resultados
+#   GET  /metrics             → métricas en formato Prometheus
 # ===============================================================
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+import os
+from contextlib import asynccontextmanager
 from typing import List
 
-app = FastAPI()
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+import ejecucion
+import formato
+import metricas
+from cache import cache_proyecciones, huella
+from motor import (
+    MODELOS,
+    SimulacionExcesiva,
+    armar_columnar,
+    caminos_efectivos,
+    construir_matriz,
+    evaluar_modelo,
+    meses_proyectados,
+    serie_desde_historico,
+    series_con_datos,
+    valores_por_serie,
+)
+
+
+# ===============================================================
+# CICLO DE VIDA
+#
+# Crea el pool de procesos para ajustes pesados al iniciar cada
+# worker y lo cierra al apagarlo (ver ejecucion.py).
+# ===============================================================
+@asynccontextmanager
+async def lifespan(app):
+    ejecucion.iniciar()
+    yield
+    ejecucion.detener()
+
+
+# Especies proyectadas por bloque en el endpoint de streaming
+BLOQUE_STREAM = int(os.environ.get("PROYECCIONES_BLOQUE_STREAM", 32))
+
+# Máximo de caminos de simulación por especie que se aceptan
+MAX_CAMINOS = int(os.environ.get("PROYECCIONES_MAX_CAMINOS", 5000))
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metricas.MiddlewareMetricas)
 
 
 # ===============================================================
@@ -52,11 +112,13 @@ class HistoricoMes(BaseModel):
 #   - especie              (str)
 #   - historico            (list de HistoricoMes)
 #   - meses_a_proyectar    (int): meses futuros a generar (default=12)
+#   - modelo               (str): modelo del motor (default="promedio")
 # ---------------------------------------------------------------
 class RequestProyecciones(BaseModel):
     especie: str
     historico: List[HistoricoMes]
     meses_a_proyectar: int = 12
+    modelo: str = "promedio"
 
 
 # ---------------------------------------------------------------
@@ -87,6 +149,126 @@ class ResponseProyecciones(BaseModel):
     proyecciones: List[MesProyectado]
 
 
+# ---------------------------------------------------------------
+# _caminos_validos():
+# Caminos que efectivamente se simulan: los pedidos acotados a
+# MAX_CAMINOS y ajustados al horizonte (ver caminos_efectivos() en
+# motor/intervalos.py). 0 sigue siendo "sin intervalos".
+#
+# HTTP 422 si ni una serie cabe en el tope de memoria del motor.
+# ---------------------------------------------------------------
+def _caminos_validos(caminos, horizonte) -> int:
+    if not caminos:
+        return 0
+    try:
+        return caminos_efectivos(min(caminos, MAX_CAMINOS), horizonte)
+    except SimulacionExcesiva as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# ===============================================================
+# _proyectar_series()
+#
+# Proyecta un lote de series con el modelo pedido.
+#
+# Parámetros:
+#   series  → lista de (especie, anio_inicio, mes_inicio, valores)
+#             con valores = floats / None por mes consecutivo
+#   caminos → caminos de simulación para las bandas P10/P50/P90
+#             (0 = solo pronóstico puntual; ver _caminos_validos())
+#
+# Flujo:
+#   1. Busca cada serie en la caché (hash de especie, histórico,
+#      horizonte, modelo y caminos).
+#   2. Las que no están se proyectan juntas en UNA llamada al
+#      motor NumPy (fuera del event loop si el lote es grande,
+#      ver ejecucion.py) y se guardan en la caché.
+#
+# Retorna un dict por serie:
+#     {"proyeccion_ton": [...], "p10": [...], "p50": [...], "p90": [...]}
+# (las bandas solo si caminos > 0), floats redondeados a 2 decimales.
+#
+# Errores:
+#   HTTP 422 si el modelo no existe o el horizonte es demasiado
+#            largo para simular intervalos.
+#   HTTP 429 si el worker tiene demasiados ajustes en cola.
+# ===============================================================
+async def _proyectar_series(series, horizonte, modelo, caminos=0) -> list[dict]:
+    if modelo not in MODELOS:
+        raise HTTPException(status_code=422, detail=f"Modelo desconocido: {modelo}")
+
+    caminos = _caminos_validos(caminos, horizonte)
+    metricas.serie_largo.observar_varios(datos=[len(s[3]) for s in series])
+
+    claves = [
+        huella(especie, anio, mes, valores, horizonte, modelo, caminos)
+        for especie, anio, mes, valores in series
+    ]
+    resultado = [cache_proyecciones.obtener(clave) for clave in claves]
+
+    pendientes = [i for i, valor in enumerate(resultado) if valor is None]
+    if pendientes:
+        Y, inicio = construir_matriz([series[i][3] for i in pendientes])
+        pronostico, bandas = await ejecucion.ajustar_lote(Y, inicio, horizonte, modelo, caminos)
+
+        for i, valor in zip(pendientes, valores_por_serie(pronostico, bandas)):
+            cache_proyecciones.guardar(claves[i], valor)
+            resultado[i] = valor
+
+    return resultado
+
+
+# ===============================================================
+# ENDPOINT: modelos disponibles
+#
+# GET /api/modelos
+# ===============================================================
+@app.get("/api/modelos")
+def listar_modelos():
+    return {"modelos": sorted(MODELOS)}
+
+
+# ===============================================================
+# ENDPOINT: estadísticas de la caché
+#
+# GET /api/stats
+#
+# Retorna hits, misses, hit_ratio, entradas, capacidad, TTL,
+# entradas expiradas y desalojadas (por proceso), además del
+# estado del pool de ajustes y su cola.
+# ===============================================================
+@app.get("/api/stats")
+def estadisticas():
+    return {
+        "cache": cache_proyecciones.estadisticas(),
+        "ejecucion": ejecucion.estado(),
+    }
+
+
+# ===============================================================
+# ENDPOINT: métricas Prometheus
+#
+# GET /metrics
+#
+# Latencia/tamaño/estado de requests por ruta, requests en curso,
+# duración de ajuste por modelo, largo de las series, hit ratio de
+# la caché y ajustes en cola (ver metricas.py). Valores por worker.
+# ===============================================================
+@metricas.colector
+def _colectar_estado():
+    cache = cache_proyecciones.estadisticas()
+    metricas.cache_consultas.fijar("hit", valor=cache["hits"])
+    metricas.cache_consultas.fijar("miss", valor=cache["misses"])
+    metricas.cache_hit_ratio.fijar(valor=cache["hit_ratio"])
+    metricas.cache_entradas.fijar(valor=cache["entradas"])
+    metricas.ajustes_en_cola.fijar(valor=ejecucion.estado()["en_cola"])
+
+
+@app.get("/metrics")
+def exportar_metricas():
+    return Response(content=metricas.exportar(), media_type=metricas.TIPO_CONTENIDO)
+
+
 # ===============================================================
 # ENDPOINT PRINCIPAL DEL MICROSERVICIO
 #
@@ -94,74 +276,264 @@ class ResponseProyecciones(BaseModel):
 #
 # Este endpoint recibe datos históricos y genera proyecciones.
 #
-# Lógica del algoritmo:
+# Lógica:
 #   1. Si no hay histórico → retornar lista vacía.
-#   2. Promedio simple = suma(historico) / cantidad
-#   3. Aplicar tendencia +5%:
-#          base = promedio * 1.05
-#   4. Buscar el último mes disponible del histórico.
-#   5. Avanzar mes a mes generando proyecciones.
+#   2. Convertir el histórico en una serie mensual consecutiva
+#      (meses sin registros quedan como huecos).
+#   3. Proyectar con el modelo pedido (req.modelo).
+#   4. Numerar los meses futuros a partir del último mes
+#      disponible del histórico.
 # ===============================================================
 @app.post("/api/proyectar", response_model=ResponseProyecciones)
-def proyectar(req: RequestProyecciones):
-    """
-    Algoritmo simple de ejemplo:
+async def proyectar(req: RequestProyecciones):
 
-    - Calcula promedio de toneladas históricas.
-    - Aplica un +5% de tendencia.
-    - Genera 'meses_a_proyectar' meses futuros.
-    """
+    serie = serie_desde_historico(
+        (h.anio, h.mes, h.toneladas) for h in req.historico
+    )
 
     # Si no hay datos → no se puede proyectar
-    if not req.historico:
+    if serie is None:
         return ResponseProyecciones(especie=req.especie, proyecciones=[])
 
-    # -----------------------------------------------------------
-    # 1. CALCULAR PROMEDIO DEL HISTÓRICO
-    # -----------------------------------------------------------
-    promedio = sum(h.toneladas for h in req.historico) / len(req.historico)
-
-    # Aplicar tendencia de crecimiento
-    base = promedio * 1.05   # +5%
-
-    # -----------------------------------------------------------
-    # 2. DETERMINAR EL ÚLTIMO MES DEL HISTÓRICO
-    #
-    # Se toma el registro con año/mes más reciente
-    # -----------------------------------------------------------
-    ultimo = max(req.historico, key=lambda x: (x.anio, x.mes))
-    anio = ultimo.anio
-    mes = ultimo.mes
-
-    proyecciones: List[MesProyectado] = []
-
-    # -----------------------------------------------------------
-    # 3. GENERAR MESES FUTUROS
-    #
-    # Se recorren N meses, avanzando año/mes correctamente:
-    #   - si mes > 12 → saltar a enero y aumentar año
-    # -----------------------------------------------------------
-    for _ in range(req.meses_a_proyectar):
-        # Avanzar mes
-        mes += 1
-        if mes > 12:
-            mes = 1
-            anio += 1
-
-        # Crear proyección del mes
-        proyecciones.append(
-            MesProyectado(
-                anio=anio,
-                mes=mes,
-                proyeccion_ton=round(base, 2),
-            )
-        )
+    anio, mes, valores = serie
+    [resultado] = await _proyectar_series(
+        [(req.especie, anio, mes, valores)], req.meses_a_proyectar, req.modelo
+    )
+
+    # Último mes del histórico → los meses proyectados parten desde el siguiente
+    proyecciones: List[MesProyectado] = [
+        MesProyectado(**p)
+        for p in meses_proyectados(anio, mes, len(valores), resultado["proyeccion_ton"])
+    ]
 
-    # -----------------------------------------------------------
-    # 4. RETORNAR RESPUESTA
-    # -----------------------------------------------------------
     return ResponseProyecciones(
         especie=req.especie,
         proyecciones=proyecciones
     )
 
+
+# ---------------------------------------------------------------
+# _leer_lote():
+# Decodifica y valida el cuerpo columnar de un request.
+# Retorna (meses_a_proyectar, modelo, caminos, series).
+#
+# Errores:
+#   415 → Content-Type no soportado
+#   422 → cuerpo mal formado
+# ---------------------------------------------------------------
+async def _leer_lote(request: Request):
+    try:
+        datos = formato.decodificar(await request.body(), request.headers.get("content-type"))
+        return formato.leer_series(datos)
+    except formato.FormatoNoSoportado as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# ---------------------------------------------------------------
+# _proyectar_columnar():
+# Proyecta un lote de series columnares y retorna un dict por serie:
+#     {"especie", "inicio" (primer mes proyectado), "proyeccion_ton",
+#      ["p10", "p50", "p90"]}
+# Las series sin ningún mes con datos no se pueden proyectar:
+# quedan con inicio None y lista vacía.
+# ---------------------------------------------------------------
+async def _proyectar_columnar(series, meses_a_proyectar, modelo, caminos=0) -> list[dict]:
+    con_datos = series_con_datos(series)
+
+    valores_proyectados = await _proyectar_series(
+        [series[i] for i in con_datos], meses_a_proyectar, modelo, caminos
+    )
+
+    return armar_columnar(series, con_datos, valores_proyectados)
+
+
+# ===============================================================
+# ENDPOINT COLUMNAR (LOTE DE ESPECIES)
+#
+# POST /api/proyectar/lote
+#
+# Recibe todas las series en formato columnar (ver formato.py),
+# codificadas como JSON u msgpack según el Content-Type, y responde
+# en la codificación negociada por Accept.
+#
+# No usa modelos Pydantic por mes: el cuerpo se decodifica una vez
+# y cada serie se procesa directamente como lista de floats.
+#
+# Errores:
+#   415 → Content-Type no soportado
+#   422 → cuerpo mal formado
+# ===============================================================
+@app.post("/api/proyectar/lote")
+async def proyectar_lote(request: Request):
+
+    meses_a_proyectar, modelo, caminos, series = await _leer_lote(request)
+    resultado = await _proyectar_columnar(series, meses_a_proyectar, modelo, caminos)
+
+    tipo = formato.negociar(request.headers.get("accept"), request.headers.get("content-type"))
+    return Response(
+        content=formato.codificar({"series": resultado}, tipo),
+        media_type=tipo,
+    )
+
+
+# ===============================================================
+# ENDPOINT COLUMNAR EN STREAMING (NDJSON)
+#
+# POST /api/proyectar/stream
+#
+# Mismo request que /lote, pero la respuesta se envía por partes:
+# las series se proyectan en bloques de BLOQUE_STREAM y cada
+# especie se emite como una línea NDJSON apenas su bloque termina.
+# Así nunca se arma la respuesta completa en memoria y Django
+# puede empezar a guardar mientras el resto se sigue calculando.
+#
+# Una vez enviados los headers ya no se puede cambiar el código
+# HTTP: si un bloque falla (p. ej. 429 por saturación), se emite
+# una línea {"error": "..."} y el stream termina.
+#
+# Errores antes de empezar el stream:
+#   415 → Content-Type no soportado
+#   422 → cuerpo mal formado, modelo desconocido u horizonte
+#         demasiado largo para los intervalos
+# ===============================================================
+@app.post("/api/proyectar/stream")
+async def proyectar_stream(request: Request):
+
+    meses_a_proyectar, modelo, caminos, series = await _leer_lote(request)
+    if modelo not in MODELOS:
+        raise HTTPException(status_code=422, detail=f"Modelo desconocido: {modelo}")
+    caminos = _caminos_validos(caminos, meses_a_proyectar)
+
+    async def generar():
+        for i in range(0, len(series), BLOQUE_STREAM):
+            try:
+                bloque = await _proyectar_columnar(
+                    series[i:i + BLOQUE_STREAM], meses_a_proyectar, modelo, caminos
+                )
+            except HTTPException as e:
+                yield formato.linea_ndjson({"error": e.detail})
+                return
+
+            for serie in bloque:
+                yield formato.linea_ndjson(serie)
+
+    return StreamingResponse(generar(), media_type=formato.TIPO_NDJSON)
+
+# ---------------------------------------------------------------
+# _numero():
+# float de NumPy → float redondeado, o None si es NaN/inf
+# (sin cortes evaluables o sin meses con producción para el MAPE).
+# ---------------------------------------------------------------
+def _numero(valor):
+    return round(float(valor), 4) if np.isfinite(valor) else None
+
+
+# ===============================================================
+# ENDPOINT: BACKTEST DE MODELOS
+#
+# POST /api/backtest
+#
+# Recibe las series en formato columnar (igual que /lote) más los
+# parámetros de formato.leer_backtest() y evalúa cada modelo con
+# validación de origen móvil (ver motor/validacion.py).
+#
+# Cada modelo se evalúa como una tarea independiente; con pool de
+# procesos los modelos corren en paralelo.
+#
+# Response:
+#   {
+#       "horizonte": 1, "min_entrenamiento": 12, "paso": 1,
+#       "mejor_modelo": "tendencia_lineal",            # menor MAE
+#       "modelos": {"promedio": {"mae": .., "mape": ..}, ...},
+#       "especies": [
+#           {
+#               "especie": "Luga Roja",
+#               "cortes": 48,
+#               "mejor_modelo": "promedio",
+#               "modelos": {"promedio": {"mae": .., "mape": ..}, ...}
+#           },
+#           ...
+#       ]
+#   }
+#
+# Errores:
+#   415 → Content-Type no soportado
+#   422 → cuerpo mal formado o modelo desconocido
+#   429 → worker saturado
+# ===============================================================
+@app.post("/api/backtest")
+async def backtest(request: Request):
+
+    content_type = request.headers.get("content-type")
+
+    try:
+        datos = formato.decodificar(await request.body(), content_type)
+        _, _, _, series = formato.leer_series(datos)
+        horizonte, modelos, min_entrenamiento, paso = formato.leer_backtest(datos)
+    except formato.FormatoNoSoportado as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    modelos = modelos or sorted(MODELOS)
+    desconocidos = [m for m in modelos if m not in MODELOS]
+    if desconocidos:
+        raise HTTPException(
+            status_code=422, detail=f"Modelo desconocido: {', '.join(desconocidos)}"
+        )
+
+    # Las series sin ningún mes con datos no tienen cortes evaluables
+    con_datos = series_con_datos(series)
+
+    n = len(series)
+    mae = np.full((len(modelos), n), np.nan)
+    mape = np.full((len(modelos), n), np.nan)
+    cortes = np.zeros(n, dtype=np.int64)
+    resumen = {m: {"mae": None, "mape": None} for m in modelos}
+
+    if con_datos:
+        Y, inicio = construir_matriz([series[i][3] for i in con_datos])
+
+        # Trabajo aproximado: una fila apilada por (especie, corte)
+        resultados = await ejecucion.ejecutar(
+            evaluar_modelo,
+            [(Y, inicio, horizonte, m, min_entrenamiento, paso) for m in modelos],
+            pesado=Y.size * Y.shape[1] // paso >= ejecucion.UMBRAL_POOL,
+        )
+
+        for j, (modelo, r) in enumerate(zip(modelos, resultados)):
+            resumen[modelo] = {"mae": _numero(r["mae"]), "mape": _numero(r["mape"])}
+            mae[j, con_datos] = r["mae_especie"]
+            mape[j, con_datos] = r["mape_especie"]
+        cortes[con_datos] = resultados[0]["cortes_especie"]
+
+    # Mejor modelo por especie = menor MAE (None si no hay cortes)
+    evaluadas = np.isfinite(mae).any(axis=0)
+    mejor = np.where(np.isfinite(mae), mae, np.inf).argmin(axis=0)
+
+    con_mae = [m for m in modelos if resumen[m]["mae"] is not None]
+
+    resultado = {
+        "horizonte": horizonte,
+        "min_entrenamiento": min_entrenamiento,
+        "paso": paso,
+        "mejor_modelo": min(con_mae, key=lambda m: resumen[m]["mae"]) if con_mae else None,
+        "modelos": resumen,
+        "especies": [
+            {
+                "especie": especie,
+                "cortes": int(cortes[i]),
+                "mejor_modelo": modelos[mejor[i]] if evaluadas[i] else None,
+                "modelos": {
+                    m: {"mae": _numero(mae[j, i]), "mape": _numero(mape[j, i])}
+                    for j, m in enumerate(modelos)
+                },
+            }
+            for i, (especie, _, _, _) in enumerate(series)
+        ],
+    }
+
+    tipo = formato.negociar(request.headers.get("accept"), content_type)
+    return Response(content=formato.codificar(resultado, tipo), media_type=tipo)
@@ -0,0 +1,320 @@
+# ===============================================================
+# metricas.py — Métricas en formato de texto Prometheus
+#
+# Implementación mínima (sin prometheus_client) de los tres tipos
+# que usa el microservicio:
+#
+#   Contador   → valor que solo aumenta (requests, hits, ...)
+#   Medidor    → valor instantáneo (requests en curso, cola, ...)
+#   Histograma → distribución en buckets fijos (latencias, largos)
+#
+# Cada métrica admite etiquetas; cada combinación de valores de
+# etiqueta es una serie independiente. Registrar una observación
+# cuesta un bisect + una suma bajo un lock, para que el overhead
+# por request sea despreciable.
+#
+# Los valores son por proceso: con varios workers de uvicorn cada
+# uno expone los suyos (Prometheus los distingue por instancia
+# o se agregan con sum()).
+#
+# GET /metrics (main.py) retorna exportar().
+# ===============================================================
+
+import threading
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Métricas registradas, en orden de exportación
+_REGISTRO = []
+
+# Funciones que actualizan medidores justo antes de exportar
+_COLECTORES = []
+
+
+# ---------------------------------------------------------------
+# _etiquetas():
+# ("ruta", "metodo") + ("/api/x", "POST") → {ruta="/api/x",metodo="POST"}
+# (_escapar() aplica el escape de valores del formato de texto)
+# ---------------------------------------------------------------
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores, extra=""):
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor))
+
+
+# ===============================================================
+# CLASE BASE: _Metrica
+#
+# Guarda nombre, ayuda, etiquetas y un dict
+#     valores de etiqueta (tuple) → estado de la serie
+# ===============================================================
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+        _REGISTRO.append(self)
+
+    def _cabecera(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+# ===============================================================
+# CLASE: Contador
+# ===============================================================
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def incrementar(self, *valores, cantidad=1):
+        with self._lock:
+            self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    # Para contadores que ya lleva otro módulo (p. ej. la caché)
+    def fijar(self, *valores, valor):
+        with self._lock:
+            self._series[valores] = valor
+
+    def exportar(self):
+        lineas = self._cabecera()
+        with self._lock:
+            for valores, total in sorted(self._series.items()):
+                lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(total)}")
+        return lineas
+
+
+# ===============================================================
+# CLASE: Medidor
+# ===============================================================
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def fijar(self, *valores, valor):
+        with self._lock:
+            self._series[valores] = valor
+
+    def sumar(self, *valores, cantidad=1):
+        with self._lock:
+            self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    def exportar(self):
+        lineas = self._cabecera()
+        with self._lock:
+            for valores, valor in sorted(self._series.items()):
+                lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}")
+        return lineas
+
+
+# ===============================================================
+# CLASE: Histograma
+#
+# Cada serie guarda los conteos NO acumulados por bucket (más el
+# bucket +Inf), la suma y la cantidad de observaciones. Los conteos
+# acumulados (formato Prometheus) se calculan solo al exportar.
+# ===============================================================
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, buckets, etiquetas=()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def _serie(self, valores):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return serie
+
+    # -----------------------------------------------------------
+    # observar(): registra un valor
+    # -----------------------------------------------------------
+    def observar(self, *valores, valor):
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._serie(valores)
+            serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    # -----------------------------------------------------------
+    # observar_varios(): registra muchos valores de una vez
+    # (un searchsorted + bincount en vez de un bisect por valor)
+    # -----------------------------------------------------------
+    def observar_varios(self, *valores, datos):
+        datos = np.asarray(datos, dtype=np.float64)
+        if not datos.size:
+            return
+        conteos = np.bincount(
+            np.searchsorted(self.buckets, datos, side="left"),
+            minlength=len(self.buckets) + 1,
+        )
+        with self._lock:
+            serie = self._serie(valores)
+            for i, c in enumerate(conteos.tolist()):
+                serie[0][i] += c
+            serie[1] += float(datos.sum())
+            serie[2] += int(datos.size)
+
+    def exportar(self):
+        lineas = self._cabecera()
+        limites = [*self.buckets, float("inf")]
+
+        with self._lock:
+            for valores, (conteos, suma, cantidad) in sorted(self._series.items()):
+                acumulado = 0
+                for limite, c in zip(limites, conteos):
+                    acumulado += c
+                    etiquetas = _etiquetas(self.etiquetas, valores, f'le="{_numero(limite)}"')
+                    lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+                etiquetas = _etiquetas(self.etiquetas, valores)
+                lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(suma)}")
+                lineas.append(f"{self.nombre}_count{etiquetas} {cantidad}")
+        return lineas
+
+
+# ---------------------------------------------------------------
+# colector():
+# Decorador para registrar una función que actualiza medidores
+# leídos desde otros módulos (caché, cola de ajustes) al exportar.
+# ---------------------------------------------------------------
+def colector(funcion):
+    _COLECTORES.append(funcion)
+    return funcion
+
+
+# ---------------------------------------------------------------
+# exportar(): todas las métricas en formato de texto Prometheus
+# ---------------------------------------------------------------
+def exportar() -> str:
+    for funcion in _COLECTORES:
+        funcion()
+
+    lineas = []
+    for metrica in _REGISTRO:
+        lineas.extend(metrica.exportar())
+    return "\n".join(lineas) + "\n"
+
+
+# ===============================================================
+# MÉTRICAS DEL MICROSERVICIO
+# ===============================================================
+_BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+_BUCKETS_MESES = (6, 12, 24, 36, 60, 120, 240, 480)
+
+requests_total = Contador(
+    "proyecciones_http_requests_total",
+    "Requests HTTP atendidos.",
+    ("ruta", "metodo", "estado"),
+)
+requests_duracion = Histograma(
+    "proyecciones_http_request_duration_seconds",
+    "Latencia de los requests HTTP por ruta.",
+    _BUCKETS_LATENCIA,
+    ("ruta", "metodo"),
+)
+requests_bytes = Histograma(
+    "proyecciones_http_request_size_bytes",
+    "Tamaño del cuerpo de los requests (Content-Length).",
+    _BUCKETS_BYTES,
+    ("ruta",),
+)
+requests_en_curso = Medidor(
+    "proyecciones_http_requests_in_flight",
+    "Requests HTTP en proceso.",
+)
+ajuste_duracion = Histograma(
+    "proyecciones_ajuste_duration_seconds",
+    "Duración del ajuste del motor por lote y modelo.",
+    _BUCKETS_LATENCIA,
+    ("modelo",),
+)
+serie_largo = Histograma(
+    "proyecciones_serie_largo_meses",
+    "Largo (meses) de las series recibidas para proyectar.",
+    _BUCKETS_MESES,
+)
+cache_consultas = Contador(
+    "proyecciones_cache_consultas_total",
+    "Consultas a la caché de resultados por resultado (hit/miss).",
+    ("resultado",),
+)
+cache_hit_ratio = Medidor(
+    "proyecciones_cache_hit_ratio",
+    "Proporción de consultas a la caché resueltas sin ajustar.",
+)
+cache_entradas = Medidor(
+    "proyecciones_cache_entradas",
+    "Entradas guardadas en la caché de resultados.",
+)
+ajustes_en_cola = Medidor(
+    "proyecciones_ajustes_en_cola",
+    "Requests esperando turno para ajustar.",
+)
+
+
+# ===============================================================
+# CLASE: MiddlewareMetricas
+#
+# Middleware ASGI puro (más liviano que @app.middleware("http")):
+# mide latencia, estado y tamaño de cada request.
+#
+# La etiqueta "ruta" es la plantilla de la ruta de FastAPI
+# (p. ej. "/api/proyectar/lote"), no la URL cruda, para no crear
+# una serie por cada URL distinta; lo que no coincide con ninguna
+# ruta se agrupa como "otra".
+# ===============================================================
+class MiddlewareMetricas:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        requests_en_curso.sumar(cantidad=1)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            requests_en_curso.sumar(cantidad=-1)
+
+            ruta = getattr(scope.get("route"), "path", "otra")
+            metodo = scope["method"]
+
+            requests_duracion.observar(ruta, metodo, valor=duracion)
+            requests_total.incrementar(ruta, metodo, str(estado))
+
+            for nombre, valor in scope["headers"]:
+                if nombre == b"content-length":
+                    requests_bytes.observar(ruta, valor=int(valor))
+                    break
@@ -0,0 +1,50 @@
+# ===============================================================
+# motor — Motor de proyecciones vectorizado (NumPy)
+#
+# Paquete independiente de FastAPI: contiene solo la lógica de
+# cálculo, para que main.py (y cualquier otro consumidor) pueda
+# proyectar lotes de especies con:
+#
+#     from motor import construir_matriz, proyectar
+#
+#     Y, inicio = construir_matriz([[10.0, None, 12.5], [3.0]])
+#     ajuste = proyectar(Y, inicio, horizonte=12, modelo="holt_winters_aditivo")
+#     ajuste.pronostico   # ndarray (n_especies, 12)
+#
+# Backtesting de modelos (ver validacion.py):
+#
+#     evaluar_modelo(Y, inicio, horizonte=3, modelo="promedio")
+#
+# Intervalos de predicción P10/P50/P90 (ver intervalos.py):
+#
+#     pronostico, bandas = simular_intervalos(Y, inicio, 12, caminos=2000)
+#
+# Respuestas completas del microservicio sin HTTP (ver servicio.py),
+# usadas también por Django en modo local:
+#
+#     proyectar_columnar([("Luga Roja", 2024, 3, [12.5, None, 8.0])], 12)
+#
+# Todos los imports internos son relativos, por lo que el paquete se
+# puede importar tanto como "motor" (dentro del contenedor) como
+# "microservicio_proyecciones.motor" (desde Django).
+# ===============================================================
+
+from .series import avanzar_mes, construir_matriz, rellenar_huecos, serie_desde_historico
+from .modelos import (
+    MODELOS,
+    Ajuste,
+    ModeloDesconocido,
+    proyectar,
+    registrar_modelo,
+)
+from .validacion import apilar_cortes, evaluar_modelo
+from .intervalos import CUANTILES, SimulacionExcesiva, caminos_efectivos, simular_intervalos
+from .servicio import (
+    ajustar,
+    armar_columnar,
+    meses_proyectados,
+    proyectar_columnar,
+    proyectar_historico,
+    series_con_datos,
+    valores_por_serie,
+)
@@ -0,0 +1,147 @@
+# ===============================================================
+# motor/intervalos.py — Intervalos de predicción por simulación
+#
+# Bootstrap de residuos: para cada especie se generan "caminos"
+# futuros posibles sumando al pronóstico errores sorteados (con
+# reemplazo) de sus propios residuos dentro de la muestra:
+#
+#     residuo[t]  = real[t] − ajustado[t]
+#     camino[h]   = pronostico[h] + e[h] + peso · Σ_{j < h} e[j]
+#
+# "peso" depende de cómo el modelo propaga un error hacia adelante
+# (ACUMULACION): los modelos de nivel/tendencia fijos no lo
+# propagan (peso 0, errores independientes por mes); Holt-Winters
+# incorpora cada error al nivel con peso alpha, por lo que su banda
+# se abre a medida que el horizonte se aleja.
+#
+# Los percentiles de todos los caminos de una especie dan las
+# bandas P10 / P50 / P90.
+#
+# El lote se simula como arreglos (filas, caminos, horizonte), en
+# bloques de filas que respetan MAX_ELEMENTOS; no hay ciclos por
+# camino. Los bloques sortean en orden del mismo generador, así que
+# el resultado es idéntico al de simular todo el lote de una vez.
+# ===============================================================
+
+import numpy as np
+
+from .modelos import PARAMETROS_HW, proyectar
+from .series import rellenar_huecos
+
+
+# Percentiles reportados
+CUANTILES = (10, 50, 90)
+
+# Peso con que los errores pasados se arrastran a los meses
+# siguientes, por modelo (0 si no está en el dict)
+ACUMULACION = {
+    "holt_winters_aditivo": PARAMETROS_HW["alpha"],
+    "holt_winters_multiplicativo": PARAMETROS_HW["alpha"],
+}
+
+# Tope de elementos filas × caminos × horizonte por bloque
+# simulado: acota la memoria de cada bloque (el lote se parte en
+# tantos bloques como haga falta)
+MAX_ELEMENTOS = 4_000_000
+
+# Mínimo de caminos por especie: con menos los percentiles no son
+# confiables
+MIN_CAMINOS = 100
+
+# Semilla por defecto: el mismo histórico produce las mismas bandas
+# (necesario para poder cachear el resultado)
+SEMILLA = 12345
+
+
+# ---------------------------------------------------------------
+# SimulacionExcesiva:
+# El horizonte es tan largo que ni una sola serie con MIN_CAMINOS
+# cabe en MAX_ELEMENTOS. El microservicio la responde como 422.
+# ---------------------------------------------------------------
+class SimulacionExcesiva(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------
+# caminos_efectivos():
+# Caminos a simular por serie para un horizonte H: al menos
+# MIN_CAMINOS y a lo más los que caben en MAX_ELEMENTOS para una
+# serie. No depende del tamaño del lote (eso lo resuelven los
+# bloques), así que una especie recibe los mismos caminos sola o
+# acompañada.
+#
+# Lanza SimulacionExcesiva si H × MIN_CAMINOS > MAX_ELEMENTOS.
+# ---------------------------------------------------------------
+def caminos_efectivos(caminos, horizonte, max_elementos=MAX_ELEMENTOS) -> int:
+    if horizonte * MIN_CAMINOS > max_elementos:
+        raise SimulacionExcesiva(
+            f"Horizonte de {horizonte} meses demasiado largo para simular intervalos "
+            f"(máximo {max_elementos // MIN_CAMINOS})."
+        )
+    tope = max_elementos // max(horizonte, 1)
+    return int(max(min(caminos, tope), MIN_CAMINOS))
+
+
+# ===============================================================
+# simular_intervalos()
+#
+# Ajusta el modelo y simula los caminos del lote completo.
+#
+# Retorna:
+#   pronostico → ndarray (n, H) pronóstico puntual (igual a proyectar())
+#   bandas     → ndarray (len(CUANTILES), n, H) percentiles por mes
+#
+# Series sin residuos (ajuste sin meses comparables) quedan con
+# bandas iguales al pronóstico.
+#
+# Lanza SimulacionExcesiva si el horizonte no cabe en MAX_ELEMENTOS
+# (ver caminos_efectivos()).
+# ===============================================================
+def simular_intervalos(
+    Y, inicio, horizonte, modelo="promedio", caminos=1000, semilla=SEMILLA,
+    max_elementos=MAX_ELEMENTOS,
+):
+    ajuste = proyectar(Y, inicio, horizonte, modelo)
+    n = Y.shape[0]
+
+    if n == 0 or horizonte <= 0:
+        return ajuste.pronostico, np.empty((len(CUANTILES), n, max(horizonte, 0)))
+
+    caminos = caminos_efectivos(caminos, horizonte, max_elementos)
+    filas = max(max_elementos // (caminos * horizonte), 1)
+
+    # -----------------------------------------------------------
+    # Residuos por fila, con los válidos primero (np.sort deja los
+    # NaN al final) para poder sortear índices en [0, cantidad)
+    # -----------------------------------------------------------
+    residuos = np.sort(rellenar_huecos(Y, inicio) - ajuste.ajustado, axis=1)
+    cantidad = (~np.isnan(residuos)).sum(axis=1)
+    residuos = np.where(np.isnan(residuos), 0.0, residuos)
+
+    rng = np.random.default_rng(semilla)
+    peso = ACUMULACION.get(modelo, 0.0)
+    bandas = np.empty((len(CUANTILES), n, horizonte))
+
+    # -----------------------------------------------------------
+    # Bloques de a lo más "filas" series (filas × caminos × H ≤
+    # max_elementos)
+    # -----------------------------------------------------------
+    for i in range(0, n, filas):
+        bloque = slice(i, min(i + filas, n))
+        k = bloque.stop - bloque.start
+
+        sorteo = rng.random((k, caminos * horizonte))
+        indices = (sorteo * np.maximum(cantidad[bloque], 1)[:, None]).astype(np.int64)
+
+        errores = np.take_along_axis(residuos[bloque], indices, axis=1)
+        errores = errores.reshape(k, caminos, horizonte)
+        errores[cantidad[bloque] == 0] = 0.0
+
+        simulados = ajuste.pronostico[bloque, None, :] + errores
+        if peso:
+            simulados += peso * (np.cumsum(errores, axis=2) - errores)
+        np.maximum(simulados, 0.0, out=simulados)
+
+        bandas[:, bloque] = np.percentile(simulados, CUANTILES, axis=1)
+
+    return ajuste.pronostico, bandas
@@ -0,0 +1,253 @@
+# ===============================================================
+# motor/modelos.py — Modelos de proyección vectorizados
+#
+# Cada modelo recibe un LOTE completo de especies como matriz
+# (ver series.py) y proyecta todas las filas a la vez con
+# operaciones NumPy 2D; no se crea ningún objeto por mes.
+#
+# Firma de un modelo:
+#
+#     modelo(Y, inicio, horizonte) -> Ajuste
+#
+#   Y          → ndarray (n, T) con NaN a la izquierda / en huecos
+#   inicio     → ndarray (n,) primera columna con datos por fila
+#   horizonte  → meses a proyectar (H)
+#
+#   Ajuste.pronostico → ndarray (n, H)
+#   Ajuste.ajustado   → ndarray (n, T) valores ajustados dentro de
+#                       la muestra (NaN donde el modelo no ajusta)
+#
+# Modelos disponibles (registro MODELOS):
+#   promedio                     → promedio × 1.05 (algoritmo original)
+#   estacional_ingenuo           → repite la última temporada
+#   tendencia_lineal             → recta por mínimos cuadrados
+#   holt_winters_aditivo         → Holt-Winters con estacionalidad aditiva
+#   holt_winters_multiplicativo  → Holt-Winters con estacionalidad multiplicativa
+#
+# Para agregar un modelo basta decorarlo con @registrar_modelo("nombre").
+# ===============================================================
+
+from collections import namedtuple
+
+import numpy as np
+
+from .series import rellenar_huecos
+
+
+# Resultado de un modelo
+Ajuste = namedtuple("Ajuste", ["pronostico", "ajustado"])
+
+# Registro de modelos: nombre → función
+MODELOS = {}
+
+# Largo de la temporada (datos mensuales → 12)
+TEMPORADA = 12
+
+# Suavizamientos de Holt-Winters (nivel, tendencia, estacionalidad)
+PARAMETROS_HW = {"alpha": 0.3, "beta": 0.05, "gamma": 0.2}
+
+# Piso numérico para divisiones del modelo multiplicativo
+_EPS = 1e-6
+
+# Piso de los factores estacionales multiplicativos: un mes sin
+# producción (0) dejaría un factor ~0 y la siguiente división
+# y / factor haría explotar el nivel
+_ESTACION_MIN = 0.1
+
+
+# ---------------------------------------------------------------
+# ModeloDesconocido:
+# Se lanza cuando se pide un modelo que no está registrado.
+# ---------------------------------------------------------------
+class ModeloDesconocido(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------
+# registrar_modelo():
+# Decorador que agrega una función al registro MODELOS.
+# ---------------------------------------------------------------
+def registrar_modelo(nombre):
+    def decorator(funcion):
+        MODELOS[nombre] = funcion
+        return funcion
+    return decorator
+
+
+# ===============================================================
+# proyectar()
+#
+# Punto de entrada del motor: aplica el modelo pedido a un lote
+# y recorta el pronóstico a valores no negativos (no existe
+# producción negativa).
+# ===============================================================
+def proyectar(Y, inicio, horizonte, modelo="promedio") -> Ajuste:
+    if modelo not in MODELOS:
+        raise ModeloDesconocido(f"Modelo desconocido: {modelo}")
+
+    if Y.shape[0] == 0 or horizonte <= 0:
+        return Ajuste(np.empty((Y.shape[0], max(horizonte, 0))), Y.copy())
+
+    ajuste = MODELOS[modelo](Y, inicio, horizonte)
+    return Ajuste(np.maximum(ajuste.pronostico, 0.0), ajuste.ajustado)
+
+
+# ===============================================================
+# MODELO: promedio
+#
+# Algoritmo original del microservicio: promedio de los meses con
+# registros (se ignoran los huecos) con +5% de tendencia.
+# ===============================================================
+@registrar_modelo("promedio")
+def promedio(Y, inicio, horizonte):
+    base = np.nanmean(Y, axis=1) * 1.05
+
+    pronostico = np.repeat(base[:, None], horizonte, axis=1)
+    ajustado = np.where(np.isnan(Y), np.nan, base[:, None])
+    return Ajuste(pronostico, ajustado)
+
+
+# ===============================================================
+# MODELO: estacional_ingenuo
+#
+# Cada mes futuro repite el valor del mismo mes de la última
+# temporada observada. Si la serie es más corta que una temporada,
+# los meses sin referencia usan el promedio de la serie.
+# ===============================================================
+@registrar_modelo("estacional_ingenuo")
+def estacional_ingenuo(Y, inicio, horizonte):
+    n, T = Y.shape
+    Y0 = rellenar_huecos(Y, inicio)
+
+    idx = T - TEMPORADA + (np.arange(horizonte) % TEMPORADA)
+    pronostico = np.full((n, horizonte), np.nan)
+    validos = idx >= 0
+    pronostico[:, validos] = Y0[:, idx[validos]]
+
+    respaldo = np.nanmean(Y0, axis=1)[:, None]
+    pronostico = np.where(np.isnan(pronostico), respaldo, pronostico)
+
+    ajustado = np.full((n, T), np.nan)
+    ajustado[:, TEMPORADA:] = Y0[:, :-TEMPORADA]
+    return Ajuste(pronostico, ajustado)
+
+
+# ===============================================================
+# MODELO: tendencia_lineal
+#
+# Recta y = a + b·t por mínimos cuadrados, resuelta en forma
+# cerrada para todas las filas a la vez (sumas enmascaradas).
+# Una serie de un solo mes queda con pendiente 0.
+# ===============================================================
+@registrar_modelo("tendencia_lineal")
+def tendencia_lineal(Y, inicio, horizonte):
+    n, T = Y.shape
+    Y0 = rellenar_huecos(Y, inicio)
+
+    t = np.arange(T, dtype=np.float64)[None, :]
+    mascara = ~np.isnan(Y0)
+    y = np.where(mascara, Y0, 0.0)
+    x = np.where(mascara, t, 0.0)
+
+    cantidad = mascara.sum(axis=1)
+    sx, sy = x.sum(axis=1), y.sum(axis=1)
+    sxx, sxy = (x * x).sum(axis=1), (x * y).sum(axis=1)
+
+    denominador = cantidad * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pendiente = np.where(
+            denominador > 0, (cantidad * sxy - sx * sy) / denominador, 0.0
+        )
+    intercepto = (sy - pendiente * sx) / np.maximum(cantidad, 1)
+
+    futuro = T - 1 + np.arange(1, horizonte + 1, dtype=np.float64)[None, :]
+    pronostico = intercepto[:, None] + pendiente[:, None] * futuro
+    ajustado = np.where(mascara, intercepto[:, None] + pendiente[:, None] * t, np.nan)
+    return Ajuste(pronostico, ajustado)
+
+
+# ===============================================================
+# HOLT-WINTERS (aditivo / multiplicativo)
+#
+# Inicialización por fila con sus dos primeras temporadas:
+#   nivel       = promedio de la temporada 1
+#   tendencia   = (prom. temporada 2 − prom. temporada 1) / 12
+#   estación    = temporada 1 − nivel   (aditivo)
+#               = temporada 1 / nivel   (multiplicativo)
+#
+# La recursión avanza mes a mes, pero cada paso actualiza TODAS
+# las especies a la vez (vectores de largo n); las filas que aún
+# no comienzan simplemente no se actualizan.
+#
+# Filas con menos de dos temporadas → tendencia_lineal.
+# ===============================================================
+def _holt_winters(Y, inicio, horizonte, multiplicativo):
+    n, T = Y.shape
+    m = TEMPORADA
+    alpha, beta, gamma = (PARAMETROS_HW[k] for k in ("alpha", "beta", "gamma"))
+
+    pronostico, ajustado = tendencia_lineal(Y, inicio, horizonte)
+    filas = np.flatnonzero(T - inicio >= 2 * m)
+    if not len(filas):
+        return Ajuste(pronostico, ajustado)
+
+    Ya = rellenar_huecos(Y[filas], inicio[filas])
+    ia = inicio[filas]
+    if multiplicativo:
+        Ya = np.maximum(Ya, _EPS)
+
+    r = np.arange(len(filas))
+    primera = Ya[r[:, None], ia[:, None] + np.arange(m)]
+    segunda = Ya[r[:, None], ia[:, None] + m + np.arange(m)]
+
+    nivel = primera.mean(axis=1)
+    tendencia = (segunda.mean(axis=1) - nivel) / m
+    if multiplicativo:
+        estacion = np.maximum(primera / np.maximum(nivel, _EPS)[:, None], _ESTACION_MIN)
+    else:
+        estacion = primera - nivel[:, None]
+
+    ajuste_hw = np.full((len(filas), T), np.nan)
+
+    for t in range(int(ia.min()) + m, T):
+        activo = t >= ia + m
+        k = (t - ia) % m
+        s = estacion[r, k]
+        y = Ya[:, t]
+
+        if multiplicativo:
+            prediccion = (nivel + tendencia) * s
+            nuevo_nivel = alpha * (y / s) + (1 - alpha) * (nivel + tendencia)
+            nuevo_nivel = np.maximum(nuevo_nivel, _EPS)
+            nueva_estacion = np.maximum(gamma * (y / nuevo_nivel) + (1 - gamma) * s, _ESTACION_MIN)
+        else:
+            prediccion = nivel + tendencia + s
+            nuevo_nivel = alpha * (y - s) + (1 - alpha) * (nivel + tendencia)
+            nueva_estacion = gamma * (y - nuevo_nivel) + (1 - gamma) * s
+
+        nueva_tendencia = beta * (nuevo_nivel - nivel) + (1 - beta) * tendencia
+
+        ajuste_hw[:, t] = np.where(activo, prediccion, np.nan)
+
+        nivel = np.where(activo, nuevo_nivel, nivel)
+        tendencia = np.where(activo, nueva_tendencia, tendencia)
+        estacion[r, k] = np.where(activo, nueva_estacion, s)
+
+    h = np.arange(1, horizonte + 1)
+    k = ((T - ia)[:, None] + h[None, :] - 1) % m
+    s = estacion[r[:, None], k]
+    base = nivel[:, None] + tendencia[:, None] * h[None, :]
+
+    pronostico[filas] = base * s if multiplicativo else base + s
+    ajustado[filas] = ajuste_hw
+    return Ajuste(pronostico, ajustado)
+
+
+@registrar_modelo("holt_winters_aditivo")
+def holt_winters_aditivo(Y, inicio, horizonte):
+    return _holt_winters(Y, inicio, horizonte, multiplicativo=False)
+
+
+@registrar_modelo("holt_winters_multiplicativo")
+def holt_winters_multiplicativo(Y, inicio, horizonte):
+    return _holt_winters(Y, inicio, horizonte, multiplicativo=True)
@@ -0,0 +1,80 @@
+# ===============================================================
+# motor/series.py — Conversión de series a matrices NumPy
+#
+# Todos los modelos del motor trabajan sobre un LOTE de especies
+# representado como una matriz 2D:
+#
+#     Y.shape == (n_especies, T)
+#
+# Las series se alinean a la DERECHA (todas terminan en la columna
+# T - 1) y se rellenan a la izquierda con NaN. El vector "inicio"
+# guarda, por fila, la primera columna con datos reales.
+#
+# Dentro de cada serie, un NaN marca un mes sin registros.
+# ===============================================================
+
+import numpy as np
+
+
+# ---------------------------------------------------------------
+# avanzar_mes():
+# Suma n meses a (anio, mes) manejando el cambio de año.
+# ---------------------------------------------------------------
+def avanzar_mes(anio: int, mes: int, n: int = 1) -> tuple[int, int]:
+    total = anio * 12 + (mes - 1) + n
+    return total // 12, total % 12 + 1
+
+
+# ---------------------------------------------------------------
+# serie_desde_historico():
+# Convierte el formato original (registros (anio, mes, toneladas),
+# posiblemente desordenados y con meses faltantes) en:
+#
+#   (anio_inicio, mes_inicio, valores)
+#
+# donde valores es una lista de meses consecutivos con None en los
+# meses sin registros. Retorna None si el histórico está vacío.
+# ---------------------------------------------------------------
+def serie_desde_historico(registros) -> tuple[int, int, list] | None:
+    periodos = {}
+    for anio, mes, toneladas in registros:
+        clave = anio * 12 + mes - 1
+        periodos[clave] = periodos.get(clave, 0.0) + toneladas
+
+    if not periodos:
+        return None
+
+    primero, ultimo = min(periodos), max(periodos)
+    valores = [periodos.get(p) for p in range(primero, ultimo + 1)]
+
+    return primero // 12, primero % 12 + 1, valores
+
+
+# ---------------------------------------------------------------
+# construir_matriz():
+# Recibe una lista de series (listas de floats o None) y retorna:
+#
+#   Y      → ndarray (n, T) float64, alineada a la derecha
+#   inicio → ndarray (n,) int, primera columna con datos por fila
+# ---------------------------------------------------------------
+def construir_matriz(series) -> tuple[np.ndarray, np.ndarray]:
+    largos = np.array([len(s) for s in series], dtype=np.int64)
+    T = int(largos.max()) if len(series) else 0
+
+    Y = np.full((len(series), T), np.nan)
+    for i, s in enumerate(series):
+        if len(s):
+            Y[i, T - len(s):] = np.array(s, dtype=np.float64)
+
+    return Y, T - largos
+
+
+# ---------------------------------------------------------------
+# rellenar_huecos():
+# Reemplaza por 0 los meses sin registros DENTRO de cada serie
+# (un mes sin entradas es un mes sin producción). El relleno NaN
+# a la izquierda de "inicio" se conserva.
+# ---------------------------------------------------------------
+def rellenar_huecos(Y: np.ndarray, inicio: np.ndarray) -> np.ndarray:
+    dentro = np.arange(Y.shape[1])[None, :] >= inicio[:, None]
+    return np.where(dentro & np.isnan(Y), 0.0, Y)
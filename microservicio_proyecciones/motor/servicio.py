@@ -0,0 +1,142 @@
+# ===============================================================
+# motor/servicio.py — Lógica de servicio compartida
+#
+# Funciones que arman las respuestas del microservicio a partir
+# del motor, sin depender de FastAPI. Las usan:
+#
+#   - main.py (microservicio HTTP), que agrega caché, pool de
+#     procesos y serialización
+#   - ProyeccionesApp/client.py en modo "local", que importa el
+#     paquete directamente y evita el salto HTTP
+#
+# Así ambos caminos producen exactamente los mismos números.
+# ===============================================================
+
+import numpy as np
+
+from .intervalos import CUANTILES, simular_intervalos
+from .modelos import proyectar
+from .series import avanzar_mes, construir_matriz, serie_desde_historico
+
+
+# ---------------------------------------------------------------
+# ajustar():
+# Ajusta un lote ya convertido a matriz y redondea a 2 decimales.
+# Si caminos > 0 además simula las bandas de predicción.
+#
+# Retorna (pronostico (n, H), bandas (len(CUANTILES), n, H) | None).
+# ---------------------------------------------------------------
+def ajustar(Y, inicio, horizonte, modelo="promedio", caminos=0):
+    if caminos:
+        pronostico, bandas = simular_intervalos(Y, inicio, horizonte, modelo, caminos)
+        return np.round(pronostico, 2), np.round(bandas, 2)
+
+    return np.round(proyectar(Y, inicio, horizonte, modelo).pronostico, 2), None
+
+
+# ---------------------------------------------------------------
+# valores_por_serie():
+# Separa el resultado de ajustar() en un dict por fila:
+#     {"proyeccion_ton": [...], ["p10": [...], "p50": ..., "p90": ...]}
+# ---------------------------------------------------------------
+def valores_por_serie(pronostico, bandas) -> list[dict]:
+    resultado = []
+    for j, fila in enumerate(pronostico.tolist()):
+        valor = {"proyeccion_ton": fila}
+        if bandas is not None:
+            for q, banda in zip(CUANTILES, bandas):
+                valor[f"p{q}"] = banda[j].tolist()
+        resultado.append(valor)
+    return resultado
+
+
+# ---------------------------------------------------------------
+# series_con_datos():
+# Índices de las series columnares con al menos un mes con datos
+# (las demás no se pueden proyectar).
+# ---------------------------------------------------------------
+def series_con_datos(series) -> list[int]:
+    return [
+        i for i, (_, _, _, toneladas) in enumerate(series)
+        if any(t is not None for t in toneladas)
+    ]
+
+
+# ---------------------------------------------------------------
+# armar_columnar():
+# Respuesta columnar por serie a partir de los valores proyectados
+# de las series con datos:
+#     {"especie", "inicio" (primer mes proyectado), "proyeccion_ton",
+#      ["p10", "p50", "p90"]}
+# Las series sin datos quedan con inicio None y lista vacía.
+# ---------------------------------------------------------------
+def armar_columnar(series, con_datos, valores_proyectados) -> list[dict]:
+    resultado = [
+        {"especie": especie, "inicio": None, "proyeccion_ton": []}
+        for especie, _, _, _ in series
+    ]
+    for i, valores in zip(con_datos, valores_proyectados):
+        especie, anio, mes, toneladas = series[i]
+
+        # Primer mes proyectado = mes siguiente al último de la serie
+        resultado[i]["inicio"] = list(avanzar_mes(anio, mes, len(toneladas)))
+        resultado[i].update(valores)
+
+    return resultado
+
+
+# ===============================================================
+# proyectar_columnar()
+#
+# Equivalente en proceso de POST /api/proyectar/lote:
+#
+#   series → lista de (especie, anio_inicio, mes_inicio, toneladas)
+#
+# Retorna la lista "series" de la respuesta columnar.
+# ===============================================================
+def proyectar_columnar(series, horizonte, modelo="promedio", caminos=0) -> list[dict]:
+    con_datos = series_con_datos(series)
+
+    valores = []
+    if con_datos:
+        Y, inicio = construir_matriz([series[i][3] for i in con_datos])
+        valores = valores_por_serie(*ajustar(Y, inicio, horizonte, modelo, caminos))
+
+    return armar_columnar(series, con_datos, valores)
+
+
+# ===============================================================
+# proyectar_historico()
+#
+# Equivalente en proceso de POST /api/proyectar (formato original):
+#
+#   historico → registros (anio, mes, toneladas)
+#
+# Retorna [{"anio", "mes", "proyeccion_ton"}, ...] (vacía si no
+# hay histórico).
+# ===============================================================
+def proyectar_historico(historico, horizonte, modelo="promedio") -> list[dict]:
+    serie = serie_desde_historico(historico)
+    if serie is None:
+        return []
+
+    anio, mes, valores = serie
+    Y, inicio = construir_matriz([valores])
+    pronostico, _ = ajustar(Y, inicio, horizonte, modelo)
+
+    return meses_proyectados(anio, mes, len(valores), pronostico[0].tolist())
+
+
+# ---------------------------------------------------------------
+# meses_proyectados():
+# Numera los valores proyectados a partir del mes siguiente al
+# último de una serie que empieza en (anio, mes) y dura "largo".
+# ---------------------------------------------------------------
+def meses_proyectados(anio, mes, largo, valores) -> list[dict]:
+    anio, mes = avanzar_mes(anio, mes, largo - 1)
+
+    proyecciones = []
+    for valor in valores:
+        anio, mes = avanzar_mes(anio, mes)
+        proyecciones.append({"anio": anio, "mes": mes, "proyeccion_ton": valor})
+    return proyecciones
@@ -0,0 +1,105 @@
+# ===============================================================
+# motor/validacion.py — Backtesting con origen móvil (rolling origin)
+#
+# Para medir qué tan bueno es cada modelo se "retrocede en el
+# tiempo": para cada corte k se ajusta el modelo solo con los meses
+# anteriores a k y se compara el pronóstico de los meses
+# [k, k + horizonte) con lo que realmente se produjo.
+#
+# En vez de llamar al modelo una vez por (especie, corte), TODOS
+# los pares se apilan como filas de una sola matriz alineada a la
+# derecha (ver series.py):
+#
+#     fila (i, k) = [NaN ... NaN, Y[i, 0], ..., Y[i, k - 1]]
+#
+# de modo que cada modelo se ajusta UNA vez para el lote completo
+# y los errores (MAE / MAPE) se calculan con operaciones NumPy,
+# agregando por especie con np.bincount.
+# ===============================================================
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .modelos import proyectar
+from .series import rellenar_huecos
+
+
+# ---------------------------------------------------------------
+# apilar_cortes():
+# Construye la matriz de entrenamiento apilada para todos los
+# cortes válidos.
+#
+# Un corte k es válido para la especie i si deja al menos
+# "min_entrenamiento" meses de entrenamiento y "horizonte" meses
+# reales para comparar. Los cortes se toman cada "paso" meses
+# desde el más reciente hacia atrás.
+#
+# Retorna:
+#   X       → ndarray (R, T) entrenamiento, alineado a la derecha
+#   inicio  → ndarray (R,) primera columna con datos por fila
+#   real    → ndarray (R, horizonte) producción real (huecos = 0)
+#   especie → ndarray (R,) índice de la especie de cada fila
+# ---------------------------------------------------------------
+def apilar_cortes(Y, inicio, horizonte, min_entrenamiento=12, paso=1):
+    n, T = Y.shape
+    cortes = np.arange(T - horizonte, 0, -paso)[::-1]
+
+    # Relleno de T columnas NaN a la izquierda: la ventana de largo T
+    # que empieza en la columna k termina justo antes del corte k
+    P = np.concatenate([np.full((n, T), np.nan), Y], axis=1)
+    ventanas = sliding_window_view(P, T, axis=1)[:, cortes]      # (n, K, T)
+
+    validos = (cortes[None, :] - inicio[:, None]) >= min_entrenamiento
+    especie, corte = np.nonzero(validos)
+    k = cortes[corte]
+
+    X = ventanas[especie, corte]
+    inicio_filas = inicio[especie] + (T - k)
+
+    Y0 = rellenar_huecos(Y, inicio)
+    real = Y0[especie[:, None], k[:, None] + np.arange(horizonte)[None, :]]
+
+    return X, inicio_filas, real, especie
+
+
+# ===============================================================
+# evaluar_modelo()
+#
+# Backtest de UN modelo para un lote de especies.
+#
+# Retorna un dict con:
+#   mae, mape              → error global del modelo
+#   mae_especie            → ndarray (n,) NaN si la especie no tiene cortes
+#   mape_especie           → ndarray (n,)
+#   cortes_especie         → ndarray (n,) cantidad de cortes evaluados
+#
+# El MAPE ignora los meses con producción real 0 (no está definido).
+# ===============================================================
+def evaluar_modelo(Y, inicio, horizonte, modelo, min_entrenamiento=12, paso=1) -> dict:
+    n = Y.shape[0]
+    X, inicio_filas, real, especie = apilar_cortes(
+        Y, inicio, horizonte, min_entrenamiento, paso
+    )
+
+    pronostico = proyectar(X, inicio_filas, horizonte, modelo).pronostico
+    error = np.abs(pronostico - real)
+
+    con_real = real > 0
+    porcentual = np.where(con_real, error / np.where(con_real, real, 1.0), 0.0)
+
+    cortes_especie = np.bincount(especie, minlength=n)
+    suma_error = np.bincount(especie, weights=error.sum(axis=1), minlength=n)
+    suma_pct = np.bincount(especie, weights=porcentual.sum(axis=1), minlength=n)
+    meses_pct = np.bincount(especie, weights=con_real.sum(axis=1), minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mae_especie = suma_error / (cortes_especie * horizonte)
+        mape_especie = 100.0 * suma_pct / meses_pct
+
+    return {
+        "mae": float(error.mean()) if error.size else float("nan"),
+        "mape": float(100.0 * porcentual.sum() / con_real.sum()) if con_real.any() else float("nan"),
+        "mae_especie": mae_especie,
+        "mape_especie": mape_especie,
+        "cortes_especie": cortes_especie,
+    }